@@ -0,0 +1,4 @@
+"""
+Reproducible benchmarks for the performance claims in the commit history.
+Run one with e.g. `python -m benchmarks.classwise_summary` from the repository root.
+"""
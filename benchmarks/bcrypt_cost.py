@@ -0,0 +1,104 @@
+"""
+Login cost per bcrypt work factor under concurrency: N client threads call core.security.verify_password,
+which queues every verify on the bounded password pool (PASSWORD_HASH_WORKERS threads, at most
+PASSWORD_HASH_MAX_PENDING queued). Latency includes the wait for a pool slot, as a login request sees it.
+Each step up in cost should roughly double latency and halve throughput; rejected = 503s from a full queue.
+"""
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from benchmarks.common import parse_args, print_table
+
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from core import security
+from core.config import settings
+
+
+@contextmanager
+def password_pool(rounds: int, workers: int):
+    """Swap core.security's CryptContext and pool for ones at this cost and size."""
+    context, executor = security.pwd_context, security._password_executor
+    security.pwd_context = CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+    security._password_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+    try:
+        yield
+    finally:
+        security._password_executor.shutdown()
+        security.pwd_context, security._password_executor = context, executor
+
+
+def run_clients(clients: int, calls_per_client: int, password: str, hashed: str) -> tuple[list[float], int, float]:
+    """Returns (latency of every accepted verify, rejected count, wall time)."""
+    latencies: list[float] = []
+    rejected = 0
+    lock = threading.Lock()
+    start = threading.Barrier(clients + 1)
+
+    def client():
+        nonlocal rejected
+        start.wait()
+        for _ in range(calls_per_client):
+            started = time.perf_counter()
+            try:
+                assert security.verify_password(password, hashed)
+            except HTTPException:
+                with lock:
+                    rejected += 1
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    start.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    return latencies, rejected, time.perf_counter() - started
+
+
+def main():
+    args = parse_args(
+        __doc__,
+        database=False,
+        rounds=dict(type=int, nargs="+", default=[10, 11, 12, 13], help="bcrypt costs to measure"),
+        clients=dict(type=int, default=16, help="Concurrent threads calling verify_password"),
+        workers=dict(type=int, default=settings.PASSWORD_HASH_WORKERS, help="Password pool size"),
+        password=dict(default="correct horse battery staple"),
+    )
+    calls_per_client = max(args.repeat // 4, 3)
+
+    rows = []
+    for rounds in args.rounds:
+        with password_pool(rounds, args.workers):
+            hashed = security.pwd_context.hash(args.password)
+            latencies, rejected, elapsed = run_clients(args.clients, calls_per_client, args.password, hashed)
+
+        p50 = statistics.median(latencies) * 1000
+        p95 = statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) > 1 else p50
+        marker = " *" if rounds == settings.PASSWORD_BCRYPT_ROUNDS else ""
+        rows.append((
+            f"{rounds}{marker}", f"{p50:.0f}", f"{p95:.0f}", f"{len(latencies) / elapsed:.1f}", rejected
+        ))
+
+    print(f"{args.clients} clients x {calls_per_client} verifies, {args.workers} pool workers, "
+          f"queue cap {settings.PASSWORD_HASH_MAX_PENDING}")
+    print_table(["rounds", "p50 ms", "p95 ms", "verifies/s", "rejected"], rows)
+    print("* PASSWORD_BCRYPT_ROUNDS")
+
+
+if __name__ == "__main__":
+    main()
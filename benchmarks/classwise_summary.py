@@ -0,0 +1,42 @@
+"""
+Class-wise attendance summary (/attendance/dashboard/classes) as the number of classes grows.
+The statement count should stay flat: one grouped query however many classes exist.
+"""
+from benchmarks.common import parse_args, benchmark_engines, measure_async, print_table
+
+from sqlmodel import Session
+
+from repository.attendance import getClasswiseSummary
+from tests.factories import seed_school
+
+
+def main():
+    args = parse_args(
+        __doc__,
+        classes=dict(type=int, nargs="+", default=[5, 20, 80], help="Class counts to measure"),
+        students=dict(type=int, default=30, help="Students per class"),
+    )
+
+    rows = []
+    with benchmark_engines(args.database_url) as (engine, async_engine):
+        seeded_classes = 0
+        day = None
+        for classes in sorted(args.classes):
+            with Session(engine) as session:
+                day = seed_school(session, classes - seeded_classes, args.students)["day"]
+            seeded_classes = classes
+
+            queries, median_ms, summary = measure_async(
+                async_engine, lambda session: getClasswiseSummary(day, session), args.repeat
+            )
+
+            # The summary reads attendance_daily_rollup; an empty rollup would time an empty aggregate
+            marked = sum(item.present_count + item.absent_count for item in summary.classes)
+            assert marked == classes * args.students, f"expected {classes * args.students} marked, got {marked}"
+            rows.append((classes, classes * args.students, marked, queries, f"{median_ms:.2f}"))
+
+    print_table(["classes", "students", "marked", "queries", "median ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
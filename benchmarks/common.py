@@ -0,0 +1,92 @@
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+# Settings are read at import time; benchmarks use their own database, never the configured one
+os.environ.setdefault("PROJECT_NAME", "zenith-benchmarks")
+os.environ.setdefault("POSTGRES_SERVER", "localhost")
+os.environ.setdefault("POSTGRES_USER", "benchmarks")
+os.environ.setdefault("FIRST_SUPERUSER", "admin@example.com")
+os.environ.setdefault("FIRST_SUPERUSER_PASSWORD", "benchmarks")
+os.environ.setdefault("UPLOAD_DIR_DP", os.path.join(tempfile.gettempdir(), "zenith-benchmarks", "images"))
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel import SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+import models  # noqa: F401  (registers every table on SQLModel.metadata)
+from core.request_metrics import collect_db_stats, instrument_request_metrics
+
+
+def parse_args(description: str, database: bool = True, **extra: dict) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=description)
+    if database:
+        parser.add_argument(
+            "--database-url",
+            help="Scratch database to benchmark against, e.g. postgresql+psycopg://user:pw@localhost/bench. "
+                 "Its tables are DROPPED and recreated. Defaults to a temporary SQLite file."
+        )
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per data point")
+    for name, options in extra.items():
+        parser.add_argument(f"--{name.replace('_', '-')}", **options)
+    return parser.parse_args()
+
+
+@contextmanager
+def benchmark_engines(database_url: str | None):
+    """Sync engine for seeding and async engine for the code under test, on a fresh schema."""
+    with tempfile.TemporaryDirectory() as scratch:
+        if database_url is None:
+            path = os.path.join(scratch, "benchmark.db")
+            sync_url, async_url = f"sqlite:///{path}", f"sqlite+aiosqlite:///{path}"
+        else:
+            sync_url = async_url = database_url
+
+        engine = create_engine(sync_url)
+        SQLModel.metadata.drop_all(engine)
+        SQLModel.metadata.create_all(engine)
+        if engine.dialect.name == "postgresql":
+            # create_all makes attendance partitioned but creates no partitions
+            with engine.begin() as connection:
+                connection.execute(text("CREATE TABLE attendance_default PARTITION OF attendance DEFAULT"))
+        async_engine = create_async_engine(async_url)
+        instrument_request_metrics(async_engine.sync_engine)
+
+        try:
+            yield engine, async_engine
+        finally:
+            asyncio.run(async_engine.dispose())
+            engine.dispose()
+
+
+def measure_async(async_engine, call, repeat: int) -> tuple[int, float, object]:
+    """
+    Run `await call(session)` repeat times.
+    Returns (statements per call, median ms per call, result of the last call).
+    """
+
+    async def run() -> tuple[int, float, object]:
+        timings = []
+        queries = 0
+        result = None
+        for _ in range(repeat):
+            async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                with collect_db_stats() as stats:
+                    started = time.perf_counter()
+                    result = await call(session)
+                    timings.append(time.perf_counter() - started)
+                queries = stats.queries
+        timings.sort()
+        return queries, timings[len(timings) // 2] * 1000, result
+
+    return asyncio.run(run())
+
+
+def print_table(headers: list[str], rows: list[tuple]) -> None:
+    widths = [max(len(str(value)) for value in column) for column in zip(headers, *rows)]
+    for row in [headers, *rows]:
+        print("  ".join(str(value).rjust(width) for value, width in zip(row, widths)))
@@ -0,0 +1,41 @@
+"""
+Monthly attendance of all of a parent's children (/attendance/parent/children) for 1, 3 and 6 children.
+The statement count should stay flat: children and their month of attendance are loaded in two queries.
+"""
+from benchmarks.common import parse_args, benchmark_engines, measure_async, print_table
+
+from sqlmodel import Session
+
+from repository.attendance import getParentChildrenAttendance
+from tests.factories import make_parent, seed_school
+
+
+def main():
+    args = parse_args(
+        __doc__,
+        children=dict(type=int, nargs="+", default=[1, 3, 6], help="Children counts to measure"),
+        lessons=dict(type=int, default=6, help="Lessons per child's class, all marked on the same day"),
+    )
+
+    rows = []
+    with benchmark_engines(args.database_url) as (engine, async_engine):
+        for children in args.children:
+            with Session(engine) as session:
+                parent = make_parent(session)
+                # One child in each seeded class
+                day = seed_school(session, children, students_per_class=10, lessons_per_class=args.lessons,
+                                  parent=parent)["day"]
+                parent_id = parent.id
+
+            queries, median_ms, _ = measure_async(
+                async_engine,
+                lambda session: getParentChildrenAttendance(parent_id, day.year, day.month, session),
+                args.repeat
+            )
+            rows.append((children, queries, f"{median_ms:.2f}"))
+
+    print_table(["children", "queries", "median ms"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import logging
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session
+
+from core.config import settings
+from core.database import engine
+
+logger = logging.getLogger("zenith.partitions")
+
+
+def _month_start(day: date, offset: int = 0) -> date:
+    month_index = day.year * 12 + (day.month - 1) + offset
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _is_partitioned(session: Session) -> bool:
+    return session.exec(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('attendance')"
+    )).first() is not None
+
+
+def _default_has_rows(session: Session, start: date, end: date) -> bool:
+    return session.exec(
+        text("SELECT EXISTS (SELECT 1 FROM attendance_default WHERE attendance_day >= :start AND attendance_day < :end)"),
+        params={"start": start, "end": end}
+    ).first()[0]
+
+
+def _create_partition(session: Session, name: str, start: date, end: date) -> None:
+    """
+    Create one monthly partition. Rows for that month that already landed in the default
+    partition are moved into it, otherwise CREATE ... PARTITION OF fails and the month would
+    stay in the default partition, where date-bounded queries cannot prune it.
+    Runs in the caller's transaction; the detach/attach holds an exclusive lock on attendance.
+    """
+    bounds = f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    params = {"start": start, "end": end}
+
+    if not _default_has_rows(session, start, end):
+        session.exec(text(f"CREATE TABLE {name} PARTITION OF attendance {bounds}"))
+        return
+
+    session.exec(text("ALTER TABLE attendance DETACH PARTITION attendance_default"))
+    session.exec(text(f"CREATE TABLE {name} PARTITION OF attendance {bounds}"))
+    moved = session.exec(text(
+        f"WITH moved AS ("
+        f"DELETE FROM attendance_default WHERE attendance_day >= :start AND attendance_day < :end RETURNING *"
+        f") INSERT INTO {name} SELECT * FROM moved"
+    ), params=params).rowcount
+    session.exec(text("ALTER TABLE attendance ATTACH PARTITION attendance_default DEFAULT"))
+    logger.warning("Moved %s attendance rows from attendance_default into %s.", moved, name)
+
+
+def ensure_attendance_partitions(months_ahead: int | None = None) -> list[str]:
+    """
+    Create the monthly attendance partitions from the current month up to
+    `months_ahead` months in the future, plus the default partition.
+    Returns the names of the partitions that were created.
+    """
+    if engine.dialect.name != "postgresql":
+        return []
+
+    months_ahead = settings.ATTENDANCE_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    created = []
+
+    with Session(engine) as session:
+        if not _is_partitioned(session):
+            print("Attendance table is not partitioned, skipping partition creation.")
+            return []
+
+        session.exec(text("CREATE TABLE IF NOT EXISTS attendance_default PARTITION OF attendance DEFAULT"))
+        session.commit()
+
+        today = date.today()
+        for offset in range(months_ahead + 1):
+            start = _month_start(today, offset)
+            end = _month_start(today, offset + 1)
+            name = f"attendance_y{start.year}m{start.month:02d}"
+
+            exists = session.exec(text("SELECT to_regclass(:name)"), params={"name": name}).first()[0]
+            if exists:
+                continue
+
+            try:
+                _create_partition(session, name, start, end)
+                session.commit()
+                created.append(name)
+            except SQLAlchemyError:
+                session.rollback()
+                logger.exception("Could not create attendance partition %s.", name)
+
+    return created
+
+
+def create_upcoming_attendance_partitions():
+    print("Running attendance partition task...")
+
+    created = ensure_attendance_partitions()
+
+    print(f"Created {len(created)} attendance partitions: {', '.join(created) or '-'}")
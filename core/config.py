@@ -1,3 +1,4 @@
+import ipaddress
 import re
 import secrets
 import warnings
@@ -62,8 +63,53 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = ""
     POSTGRES_DB: str = ""
 
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a connection is replaced
+    DB_POOL_PRE_PING: bool = True
+    DB_ASYNC_POOL_SIZE: int = 10  # Separate pool for the async read endpoints (attendance, lessons, announcements)
+    DB_ASYNC_MAX_OVERFLOW: int = 20
+
+    SQL_LOG_SAMPLE_RATE: float = 0.0  # Fraction of statements logged, 0 to disable
+    SQL_SLOW_QUERY_MS: float = 0.0  # Always log statements slower than this, 0 to disable
+    SQL_LOG_MAX_STATEMENT_LENGTH: int = 2000
+
+    REQUEST_METRICS_ENABLED: bool = True
+    QUERY_GUARD_MODE: Literal["off", "log", "raise"] = "off"  # Dev/test N+1 and query budget checks
+    QUERY_GUARD_REPEAT_THRESHOLD: int = 5
+    QUERY_GUARD_BUDGET: int = 50
+
     ITEMS_PER_PAGE: int = 1
 
+    ATTENDANCE_PARTITION_MONTHS_AHEAD: int = 2
+    ATTENDANCE_EXPORT_BATCH_SIZE: int = 1000
+    ATTENDANCE_RISK_THRESHOLD: float = 75.0  # Percentage
+    ATTENDANCE_RISK_WINDOW_DAYS: int = 30
+
+    # Per worker process: after a deactivation or profile change other workers may serve the old
+    # principal for up to this long, since invalidation is not broadcast between processes
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    PRINCIPAL_CACHE_MAX_SIZE: int = 4096
+
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # Hashes at any other cost are rehashed on next login
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 32  # Keep below the AnyIO threadpool (40) so sync callers hit the 503 before starving it
+
+    TOKEN_BLACKLIST_BLOOM_CAPACITY: int = 100_000
+    TOKEN_BLACKLIST_BLOOM_ERROR_RATE: float = 0.001
+    TOKEN_BLACKLIST_SYNC_SECONDS: int = 60
+    TOKEN_BLACKLIST_SYNC_LOOKBACK_SECONDS: int = 300  # Overlap re-read on each sync, covers late commits
+    TOKEN_BLACKLIST_CLEANUP_BATCH_SIZE: int = 5000
+
+    LOGIN_RATE_LIMIT_ATTEMPTS: int = 5
+    LOGIN_RATE_LIMIT_IP_ATTEMPTS: int = 100  # Failed logins per IP; a whole school may share one NAT address
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = 60
+    LOGIN_RATE_LIMIT_ACCOUNT_ATTEMPTS: int = 10  # Failed logins per username from any IP
+    LOGIN_RATE_LIMIT_ACCOUNT_WINDOW_SECONDS: int = 900
+    RATE_LIMIT_TRUSTED_PROXIES: str = ""  # Comma-separated IPs/CIDRs whose X-Forwarded-For is honoured
+
     UPLOAD_DIR_DP: Annotated[Path, BeforeValidator(parse_path)] = Path("uploads/images")
     ALLOWED_DP_EXTENSIONS: str = ".jpg,.jpeg,.png,.webp"
     MAX_DP_FILE_SIZE: int = 5 * 1024 * 1024  # 5MB
@@ -80,6 +126,13 @@ class Settings(BaseSettings):
         cleaned = self.ALLOWED_DP_EXTENSIONS.strip().strip("{}[]()").replace(" ", "")
         return {ext.strip() for ext in cleaned.split(",") if ext.strip()}
 
+    @property
+    def rate_limit_trusted_proxies(self) -> list[ipaddress.IPv4Network | ipaddress.IPv6Network]:
+        return [
+            ipaddress.ip_network(proxy.strip(), strict=False)
+            for proxy in self.RATE_LIMIT_TRUSTED_PROXIES.split(",") if proxy.strip()
+        ]
+
     # @computed_field
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> PostgresDsn:
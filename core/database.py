@@ -1,13 +1,50 @@
-from typing import Generator, Annotated
+from typing import Generator, Annotated, AsyncGenerator
 
 from fastapi.params import Depends
 
 from .config import Settings
+from .db_metrics import TimedQueuePool, TimedAsyncQueuePool, instrument_pool
+from .sql_logging import instrument_sql_logging
+from .request_metrics import instrument_request_metrics
+from .query_guard import instrument_query_guard
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import create_engine, Session, SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 settings = Settings()
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), echo=True)
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    echo=settings.DB_ECHO,
+    poolclass=TimedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+instrument_pool(engine)
+instrument_sql_logging(engine)
+if settings.REQUEST_METRICS_ENABLED:
+    instrument_request_metrics(engine)
+instrument_query_guard(engine)
+
+# Same driver (psycopg 3) in async mode, used by the read-heavy endpoints so they don't hold threadpool workers
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    echo=settings.DB_ECHO,
+    poolclass=TimedAsyncQueuePool,
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+instrument_pool(async_engine.sync_engine)
+instrument_sql_logging(async_engine.sync_engine)
+if settings.REQUEST_METRICS_ENABLED:
+    instrument_request_metrics(async_engine.sync_engine)
+instrument_query_guard(async_engine.sync_engine)
 
 def init_db(session: Session) -> None:
     SQLModel.metadata.create_all(engine)
@@ -16,4 +53,11 @@ def get_db() -> Generator[Session, None, None]:
     with Session(engine) as session:
         yield session
 
-SessionDep = Annotated[Session, Depends(get_db)]
\ No newline at end of file
+SessionDep = Annotated[Session, Depends(get_db)]
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # Responses are serialized after the session closes, so keep loaded attributes on commit
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
\ No newline at end of file
@@ -0,0 +1,162 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Optional, Union
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from models import Admin, Parent, Teacher, Student
+
+Principal = Union[Admin, Parent, Teacher, Student]
+
+
+def _as_uuid(user_id: Union[str, uuid.UUID]) -> uuid.UUID:
+    # Token payloads carry the id as a string, repository code as a UUID
+    return user_id if isinstance(user_id, uuid.UUID) else uuid.UUID(str(user_id))
+
+
+class PrincipalCache:
+    """
+        Process-local TTL + LRU cache of authenticated principals keyed by (role, user_id).
+        Entries are detached column snapshots, never the instance a request session is mutating.
+        invalidate() only reaches this process: other workers keep serving their copy (including
+        is_delete and the password hash) until it expires, at most ttl_seconds after the change.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[tuple[str, uuid.UUID], tuple[float, Principal]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, role: str, user_id: uuid.UUID) -> Optional[Principal]:
+        key = (role, _as_uuid(user_id))
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, role: str, user_id: uuid.UUID, principal: Principal) -> None:
+        if self.max_size <= 0 or self.ttl_seconds <= 0:
+            return
+
+        key = (role, _as_uuid(user_id))
+        expires_at = time.monotonic() + self.ttl_seconds
+
+        with self._lock:
+            self._entries[key] = (expires_at, principal)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, role: str, user_id: uuid.UUID) -> None:
+        with self._lock:
+            if self._entries.pop((role, _as_uuid(user_id)), None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+principal_cache = PrincipalCache(
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+def _snapshot(principal: Principal) -> Principal:
+    """
+        Copy the loaded column values into a new detached instance so later changes made
+        through the request session never leak into the cache.
+    """
+    model = type(principal)
+    snapshot = model(**{
+        attr.key: getattr(principal, attr.key)
+        for attr in inspect(model).column_attrs
+    })
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def cache_principal(role: str, principal: Principal) -> None:
+    principal_cache.put(role, principal.id, _snapshot(principal))
+
+
+def get_cached_principal(role: str, user_id: Union[str, uuid.UUID], session: Session) -> Optional[Principal]:
+    """
+        Attach a cached principal to the request session without a SELECT.
+        Relationships (e.g. parent.students) still lazy-load through that session.
+    """
+    try:
+        snapshot = principal_cache.get(role, user_id)
+    except ValueError:
+        return None
+    if snapshot is None:
+        return None
+    return session.merge(snapshot, load=False)
+
+
+async def get_cached_principal_async(role: str, user_id: Union[str, uuid.UUID],
+                                     session: AsyncSession) -> Optional[Principal]:
+    """Async-session counterpart of get_cached_principal; relationships cannot lazy-load there."""
+    try:
+        snapshot = principal_cache.get(role, user_id)
+    except ValueError:
+        return None
+    if snapshot is None:
+        return None
+    return await session.merge(snapshot, load=False)
+
+
+def reload_principal(principal: Principal, session: Session) -> Principal:
+    """
+        Re-SELECT a principal before writing to it. A cached principal is merged with load=False,
+        so its column values are whatever the snapshot held, possibly up to the TTL old.
+    """
+    return session.get(type(principal), principal.id, populate_existing=True)
+
+
+async def reload_principal_async(principal: Principal, session: AsyncSession) -> Principal:
+    return await session.get(type(principal), principal.id, populate_existing=True)
+
+
+def invalidate_principal(role: str, user_id: Union[str, uuid.UUID]) -> None:
+    principal_cache.invalidate(role, user_id)
+
+
+def principal_cache_stats() -> dict:
+    return principal_cache.stats()
@@ -0,0 +1,82 @@
+import logging
+import traceback
+from collections import Counter
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import settings
+from core.request_metrics import current_request_db_stats
+from core.sql_logging import current_route, fingerprint
+
+logger = logging.getLogger("zenith.query_guard")
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_THIS_FILE = Path(__file__).resolve()
+
+
+class QueryGuardViolation(RuntimeError):
+    """Raised in QUERY_GUARD_MODE=raise so tests fail on N+1 patterns or blown query budgets."""
+
+
+def _project_stack(limit: int = 12) -> str:
+    # Only our own frames: the interesting part is which repository/router line triggered the load
+    frames = [
+        frame for frame in traceback.extract_stack()[:-1]
+        if frame.filename.startswith(str(_PROJECT_ROOT))
+        and Path(frame.filename).resolve() != _THIS_FILE
+        and "site-packages" not in frame.filename
+    ]
+    return "".join(traceback.format_list(frames[-limit:]))
+
+
+def _report(message: str) -> None:
+    if settings.QUERY_GUARD_MODE == "raise":
+        raise QueryGuardViolation(message)
+    logger.warning("%s\n%s", message, _project_stack())
+
+
+def instrument_query_guard(engine: Engine) -> bool:
+    """
+        Dev/test check on top of the per-request query counter.
+        Flags a request once when the same SELECT shape repeats QUERY_GUARD_REPEAT_THRESHOLD times
+        (typically a lazy relationship loaded per row during serialization) and once when it
+        exceeds QUERY_GUARD_BUDGET statements.
+    """
+    if settings.QUERY_GUARD_MODE == "off":
+        return False
+
+    if not settings.REQUEST_METRICS_ENABLED:
+        logger.warning("QUERY_GUARD_MODE needs REQUEST_METRICS_ENABLED; query guard not installed.")
+        return False
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _check(conn, cursor, statement, parameters, context, executemany):
+        stats = current_request_db_stats()
+        if stats is None:
+            return
+
+        if stats.guard is None:
+            stats.guard = {"shapes": Counter(), "flagged": set(), "over_budget": False}
+        guard = stats.guard
+
+        budget = settings.QUERY_GUARD_BUDGET
+        if 0 < budget < stats.queries and not guard["over_budget"]:
+            guard["over_budget"] = True
+            _report(f"Query budget exceeded on {current_route()}: {stats.queries} statements (budget {budget}).")
+
+        if not statement.lstrip()[:6].upper() == "SELECT":
+            return
+
+        shape, normalised = fingerprint(statement)
+        guard["shapes"][shape] += 1
+
+        if guard["shapes"][shape] >= settings.QUERY_GUARD_REPEAT_THRESHOLD and shape not in guard["flagged"]:
+            guard["flagged"].add(shape)
+            _report(
+                f"Possible N+1 on {current_route()}: same SELECT ran {guard['shapes'][shape]} times "
+                f"[{shape}] {normalised[:300]}"
+            )
+
+    return True
@@ -0,0 +1,198 @@
+import ipaddress
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+import jwt
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import OAuth2PasswordRequestForm
+
+from core.config import settings
+from core.security import ALGORITHM
+
+
+class RateLimitBackend(ABC):
+    """
+        Storage for sliding-window counters.
+        hit() records one attempt for key and returns 0 when it is allowed,
+        or the seconds until the oldest attempt leaves the window when it is not.
+    """
+
+    @abstractmethod
+    def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        ...
+
+    @abstractmethod
+    def peek(self, key: str, limit: int, window_seconds: float) -> float:
+        """Like hit(), without recording an attempt."""
+        ...
+
+    @abstractmethod
+    def record(self, key: str, window_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    def reset(self, key: str) -> None:
+        ...
+
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Process-local sliding windows: one deque of attempt timestamps per key."""
+
+    def __init__(self, sweep_every: int = 1000):
+        self._windows: dict[str, deque[float]] = {}
+        self._lock = threading.Lock()
+        self._sweep_every = sweep_every
+        self._hits_since_sweep = 0
+        self._longest_window = 0.0
+
+    def hit(self, key: str, limit: int, window_seconds: float) -> float:
+        return self._check(key, limit, window_seconds, record=True)
+
+    def peek(self, key: str, limit: int, window_seconds: float) -> float:
+        return self._check(key, limit, window_seconds, record=False)
+
+    def record(self, key: str, window_seconds: float) -> None:
+        self._check(key, math.inf, window_seconds, record=True)
+
+    def _check(self, key: str, limit: float, window_seconds: float, record: bool) -> float:
+        now = time.monotonic()
+        cutoff = now - window_seconds
+
+        with self._lock:
+            self._longest_window = max(self._longest_window, window_seconds)
+            self._hits_since_sweep += 1
+            if self._hits_since_sweep >= self._sweep_every:
+                self._sweep(now)
+
+            window = self._windows.get(key)
+            if window is None:
+                if not record:
+                    return 0.0
+                window = self._windows[key] = deque()
+
+            while window and window[0] <= cutoff:
+                window.popleft()
+
+            if len(window) >= limit:
+                return window[0] - cutoff
+
+            if record:
+                window.append(now)
+            return 0.0
+
+    def reset(self, key: str) -> None:
+        with self._lock:
+            self._windows.pop(key, None)
+
+    def _sweep(self, now: float) -> None:
+        # Drop keys whose newest attempt already left every window, so memory follows active clients only
+        cutoff = now - self._longest_window
+        for key in [key for key, window in self._windows.items() if not window or window[-1] <= cutoff]:
+            del self._windows[key]
+        self._hits_since_sweep = 0
+
+
+_backend: RateLimitBackend = InMemoryRateLimitBackend()
+
+
+def set_rate_limit_backend(backend: RateLimitBackend) -> None:
+    global _backend
+    _backend = backend
+
+
+def enforce_rate_limit(key: str, limit: int, window_seconds: float, record: bool = True) -> None:
+    """Reject with 429 when key is over limit; record=False checks without counting this attempt."""
+    if record:
+        retry_after = _backend.hit(key, limit, window_seconds)
+    else:
+        retry_after = _backend.peek(key, limit, window_seconds)
+    if retry_after > 0:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many attempts. Please try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))}
+        )
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in settings.rate_limit_trusted_proxies)
+
+
+def _client_ip(request: Request) -> str:
+    """
+        The connecting address, or, when that is a trusted proxy, the nearest X-Forwarded-For
+        hop that is not one. Hops added before the first untrusted one are client-controlled.
+    """
+    peer = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(peer):
+        return peer
+
+    forwarded = [hop.strip() for hop in request.headers.get("X-Forwarded-For", "").split(",") if hop.strip()]
+    for hop in reversed(forwarded):
+        if not _is_trusted_proxy(hop):
+            return hop
+
+    return forwarded[0] if forwarded else peer
+
+
+def login_rate_limit(request: Request, form: OAuth2PasswordRequestForm = Depends()):
+    """
+        Sliding-window limits for /auth/access-token, per IP, per username+IP and per username.
+        Runs as a route dependency, so rejected attempts never reach the DB or bcrypt.
+        The per-IP bucket only counts failed logins: a school behind one NAT address logs
+        everyone in at once, and successful logins must not lock the rest out.
+        The per-username bucket ignores the IP so rotating addresses does not buy more guesses
+        against one account; it also counts failures only and is cleared by a successful login.
+    """
+    ip = _client_ip(request)
+    username = form.username.strip().lower()
+    window = settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+    account_window = settings.LOGIN_RATE_LIMIT_ACCOUNT_WINDOW_SECONDS
+    ip_key = f"login:ip:{ip}"
+    account_key = f"login:account:{username}"
+    user_ip_key = f"login:user:{username}:{ip}"
+
+    enforce_rate_limit(ip_key, settings.LOGIN_RATE_LIMIT_IP_ATTEMPTS, window, record=False)
+    enforce_rate_limit(account_key, settings.LOGIN_RATE_LIMIT_ACCOUNT_ATTEMPTS, account_window, record=False)
+    enforce_rate_limit(user_ip_key, settings.LOGIN_RATE_LIMIT_ATTEMPTS, window)
+
+    try:
+        yield
+    except HTTPException as e:
+        if e.status_code == 400:
+            _backend.record(ip_key, window)
+            _backend.record(account_key, account_window)
+        raise
+
+    _backend.reset(account_key)
+    _backend.reset(user_ip_key)
+
+
+def password_change_rate_limit(request: Request) -> None:
+    """
+        Sliding-window limit for /auth/changePassword, per user (from the bearer token) and per IP.
+        The token is only decoded here, not looked up, so this stays free of DB work.
+    """
+    ip = _client_ip(request)
+    window = settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS
+
+    enforce_rate_limit(f"password:ip:{ip}", settings.LOGIN_RATE_LIMIT_IP_ATTEMPTS, window)
+
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return
+
+    try:
+        user_id = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM]).get("user_id")
+    except jwt.PyJWTError:
+        return
+
+    if user_id:
+        enforce_rate_limit(f"password:user:{user_id}", settings.LOGIN_RATE_LIMIT_ATTEMPTS, window)
@@ -0,0 +1,164 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.sql_logging import route_template
+
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+DB_TIME_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+class RequestDbStats:
+    __slots__ = ("queries", "db_time", "guard")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.guard = None  # Per-request state of core.query_guard, only when enabled
+
+
+# Mutable per-request counters; sync endpoints run in a copied context but share this object
+_current_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("current_request_db_stats", default=None)
+
+
+def current_request_db_stats() -> Optional[RequestDbStats]:
+    return _current_stats.get()
+
+
+@contextmanager
+def collect_db_stats():
+    """Count statements outside a request (tests, benchmarks, jobs) on instrumented engines."""
+    stats = RequestDbStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+class RouteHistogram:
+    """Per-route histograms of queries and DB time per request, aggregated in this worker."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes: dict[str, dict] = {}
+
+    def record(self, route: str, queries: int, db_time: float, total_time: float) -> None:
+        db_ms = db_time * 1000
+
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                stats = self._routes[route] = {
+                    "requests": 0,
+                    "queries_total": 0,
+                    "queries_max": 0,
+                    "db_ms_total": 0.0,
+                    "db_ms_max": 0.0,
+                    "request_ms_total": 0.0,
+                    "queries_buckets": [0] * (len(QUERY_COUNT_BUCKETS) + 1),
+                    "db_ms_buckets": [0] * (len(DB_TIME_BUCKETS_MS) + 1),
+                }
+
+            stats["requests"] += 1
+            stats["queries_total"] += queries
+            stats["queries_max"] = max(stats["queries_max"], queries)
+            stats["db_ms_total"] += db_ms
+            stats["db_ms_max"] = max(stats["db_ms_max"], db_ms)
+            stats["request_ms_total"] += total_time * 1000
+            stats["queries_buckets"][bisect.bisect_left(QUERY_COUNT_BUCKETS, queries)] += 1
+            stats["db_ms_buckets"][bisect.bisect_left(DB_TIME_BUCKETS_MS, db_ms)] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            routes = {}
+            for route, stats in self._routes.items():
+                requests = stats["requests"]
+                routes[route] = {
+                    "requests": requests,
+                    "avg_queries": round(stats["queries_total"] / requests, 2),
+                    "max_queries": stats["queries_max"],
+                    "avg_db_ms": round(stats["db_ms_total"] / requests, 3),
+                    "max_db_ms": round(stats["db_ms_max"], 3),
+                    "avg_request_ms": round(stats["request_ms_total"] / requests, 3),
+                    "queries_histogram": _labelled(QUERY_COUNT_BUCKETS, stats["queries_buckets"]),
+                    "db_ms_histogram": _labelled(DB_TIME_BUCKETS_MS, stats["db_ms_buckets"]),
+                }
+
+        return dict(sorted(routes.items(), key=lambda item: item[1]["avg_queries"], reverse=True))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+def _labelled(bounds: tuple, counts: list[int]) -> dict[str, int]:
+    labels = [f"<={bound}" for bound in bounds] + [f">{bounds[-1]}"]
+    return dict(zip(labels, counts))
+
+
+route_histogram = RouteHistogram()
+
+
+def instrument_request_metrics(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._request_metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += time.perf_counter() - context._request_metrics_started
+
+
+class QueryMetricsMiddleware:
+    """
+        Pure ASGI middleware that counts the queries and DB time of each request.
+        Adds Server-Timing and X-DB-Queries headers and feeds the per-route histogram.
+        Streaming responses report what had run when their headers were sent; the
+        histogram always gets the final numbers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDbStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", app;dur={elapsed_ms:.2f}'.encode()
+                ))
+                headers.append((b"x-db-queries", str(stats.queries).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current_stats.reset(token)
+            # Unmatched paths share one bucket so scanners can't grow the histogram without bound
+            route = route_template(scope) if scope.get("route") else "UNMATCHED"
+            route_histogram.record(route, stats.queries, stats.db_time, time.perf_counter() - started)
+
+
+def request_metrics_snapshot() -> dict:
+    return route_histogram.snapshot()
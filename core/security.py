@@ -1,17 +1,30 @@
+import asyncio
+import hashlib
+import threading
+import time
 import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import timedelta, datetime, timezone
 from typing import Any
 import jwt
 from fastapi import HTTPException
 from passlib.context import CryptContext
-from sqlalchemy.exc import SQLAlchemyError
-from sqlmodel import Session, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlmodel import Session, select, delete, update
 
 from core.config import settings
 from core.database import engine
-from models import BlacklistToken
+from core.principal_cache import invalidate_principal
+from core.token_blacklist import remember_revoked_tokens, load_token_blacklist
+from models import BlacklistToken, RefreshToken
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
 
 ALGORITHM = "HS256"
 
@@ -48,6 +61,162 @@ def decode_refresh_token(refresh_token: str):
 
     return payload
 
+def _hash_jti(jti: str) -> str:
+    return hashlib.sha256(jti.encode()).hexdigest()
+
+
+def issue_refresh_token(data: dict, session: Session, family_id: uuid.UUID | None = None) -> str:
+    """
+        Create a refresh token with its own jti and record it in refresh_token.
+        A login starts a new family; rotation passes the family of the token being replaced.
+        The caller commits.
+    """
+    family_id = family_id or uuid.uuid4()
+    jti = uuid.uuid4().hex
+
+    session.add(RefreshToken(
+        jti_hash=_hash_jti(jti),
+        family_id=family_id,
+        user_id=uuid.UUID(str(data["user_id"])),
+        role=data["role"],
+        expires_at=datetime.now() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    ))
+
+    return create_refresh_token({**data, "jti": jti, "fam": str(family_id)})
+
+
+def revoke_refresh_token_family(family_id: uuid.UUID, session: Session) -> None:
+    session.exec(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked == False)
+        .values(revoked=True)
+    )
+
+
+def _adopt_legacy_refresh_token(refresh_token: str, payload: dict, session: Session) -> RefreshToken | None:
+    """
+        Refresh tokens issued before rotation carry no jti and have no row, so rejecting them would
+        log every session out on deploy. The first presentation gets a row keyed by the hash of the
+        whole token in a new family; the caller then rotates it like any other, so presenting the
+        same legacy token again is reuse. Returns None if a concurrent request adopted it first.
+    """
+    stored = RefreshToken(
+        jti_hash=_hash_jti(refresh_token),
+        family_id=uuid.uuid4(),
+        user_id=uuid.UUID(str(payload["user_id"])),
+        role=payload.get("role") or "",
+        expires_at=datetime.fromtimestamp(payload["exp"])
+    )
+    session.add(stored)
+    try:
+        session.flush()
+    except IntegrityError:
+        session.rollback()
+        return None
+    return stored
+
+
+def rotate_refresh_token(refresh_token: str, session: Session) -> tuple[dict, str]:
+    """
+        Exchange a refresh token for the next one in its family.
+        The stored row is found by primary key (hash of the jti). Presenting a token that was
+        already rotated means it leaked, so the whole family is revoked.
+        Callers check the logout blacklist first. Returns (payload, new_refresh_token).
+    """
+    payload = decode_refresh_token(refresh_token)
+
+    if payload.get("type") != "refresh":
+        raise HTTPException(status_code=401, detail="Invalid token type")
+
+    if payload.get("sub") is None or payload.get("user_id") is None:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    # Legacy tokens (no jti) are tracked by the hash of the token itself
+    jti = payload.get("jti")
+    stored = session.get(RefreshToken, _hash_jti(jti or refresh_token), with_for_update=True)
+
+    if not stored and not jti:
+        stored = _adopt_legacy_refresh_token(refresh_token, payload, session)
+        if stored is None:
+            raise HTTPException(status_code=401, detail="Refresh token reuse detected. Please log in again.")
+
+    if not stored or stored.revoked:
+        raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+
+    if stored.used_at is not None:
+        revoke_refresh_token_family(stored.family_id, session)
+        session.commit()
+        raise HTTPException(status_code=401, detail="Refresh token reuse detected. Please log in again.")
+
+    stored.used_at = datetime.now()
+    session.add(stored)
+
+    new_refresh_token = issue_refresh_token(
+        {"sub": payload["sub"], "user_id": payload["user_id"], "role": payload.get("role")},
+        session,
+        family_id=stored.family_id
+    )
+    session.commit()
+
+    return payload, new_refresh_token
+
+
+def delete_expired_refresh_tokens():
+    print("Running refresh token cleanup task...")
+    started = time.perf_counter()
+
+    now = datetime.now()
+    batch_size = settings.TOKEN_BLACKLIST_CLEANUP_BATCH_SIZE
+
+    deleted = 0
+
+    with Session(engine) as session:
+        while True:
+            expired = (
+                select(RefreshToken.jti_hash)
+                .where(RefreshToken.expires_at < now)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = session.exec(
+                delete(RefreshToken).where(RefreshToken.jti_hash.in_(expired))
+            )
+            session.commit()
+
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                break
+
+    elapsed = time.perf_counter() - started
+    print(f"Deleted {deleted} expired refresh tokens in {elapsed:.2f}s.")
+
+
+def _blacklist_expires_at(access_token: str, refresh_token: str) -> datetime:
+    """
+        When a blacklist row can be purged: the later exp of the two tokens, since after that
+        neither can be presented. Falls back to now plus the longest lifetime for tokens
+        whose exp cannot be read.
+    """
+    expiries = []
+    for token in (access_token, refresh_token):
+        try:
+            exp = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[ALGORITHM], options={"verify_exp": False}
+            ).get("exp")
+        except jwt.PyJWTError:
+            exp = None
+        if exp is not None:
+            expiries.append(datetime.fromtimestamp(exp))
+
+    if len(expiries) == 2:
+        return max(expiries)
+
+    return datetime.now() + max(
+        timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+
+
 def secureLogout(user_id: uuid.UUID, access_token: str, refresh_token: str, session: Session):
     try:
         # Validate token format
@@ -59,13 +228,25 @@ def secureLogout(user_id: uuid.UUID, access_token: str, refresh_token: str, sess
         token_blacklist = BlacklistToken(
             user_id=user_id,
             access_token=access_token,
-            refresh_token=refresh_token
+            refresh_token=refresh_token,
+            expires_at=_blacklist_expires_at(access_token, refresh_token)
         )
 
         session.add(token_blacklist)
         session.commit()
         session.refresh(token_blacklist)
 
+        remember_revoked_tokens(access_token, refresh_token)
+
+        try:
+            family_id = decode_refresh_token(refresh_token).get("fam")
+        except jwt.PyJWTError:
+            family_id = None
+
+        if family_id:
+            revoke_refresh_token_family(uuid.UUID(family_id), session)
+            session.commit()
+
         return "User logged out successfully."
 
     except HTTPException:
@@ -88,33 +269,117 @@ def secureLogout(user_id: uuid.UUID, access_token: str, refresh_token: str, sess
         )
 
 
+# bcrypt is CPU bound (~250ms per call), so every hash/verify runs on a small dedicated pool.
+# Concurrency is capped at PASSWORD_HASH_WORKERS and the backlog at PASSWORD_HASH_MAX_PENDING;
+# beyond that callers get a 503 instead of stalling the worker.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_password_pending = 0
+_password_pending_lock = threading.Lock()
+
+
+def _release_password_slot(_: Future) -> None:
+    global _password_pending
+    with _password_pending_lock:
+        _password_pending -= 1
+
+
+def _submit_password_job(fn, *args) -> Future:
+    global _password_pending
+    with _password_pending_lock:
+        if _password_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many password operations in progress. Please retry shortly.",
+                headers={"Retry-After": "1"}
+            )
+        _password_pending += 1
+
+    future = _password_executor.submit(fn, *args)
+    future.add_done_callback(_release_password_slot)
+    return future
+
+
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return _submit_password_job(pwd_context.hash, password).result()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return _submit_password_job(pwd_context.verify, plain_password, hashed_password).result()
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    return pwd_context.needs_update(hashed_password)
+
+
+def rehash_password(model, user_id: uuid.UUID, role: str, plain_password: str, old_hash: str) -> None:
+    """
+        Store a hash of plain_password at the current bcrypt cost.
+        Meant to run after the login response as a background task; the UPDATE only applies
+        if the stored hash is still old_hash, so a concurrent password change always wins.
+    """
+    try:
+        new_hash = get_password_hash(plain_password)
+
+        with Session(engine) as session:
+            result = session.exec(
+                update(model)
+                .where(model.id == user_id, model.password == old_hash)
+                .values(password=new_hash)
+            )
+            session.commit()
+
+        if result.rowcount:
+            invalidate_principal(role, user_id)
+
+    except (HTTPException, SQLAlchemyError) as e:
+        detail = e.detail if isinstance(e, HTTPException) else str(e)
+        print(f"Password rehash skipped for {role} {user_id}: {detail}")
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await asyncio.wrap_future(_submit_password_job(pwd_context.hash, password))
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.wrap_future(
+        _submit_password_job(pwd_context.verify, plain_password, hashed_password)
+    )
 
 
 def delete_old_blacklisted_tokens():
+    """
+        Remove blacklist rows whose tokens can no longer be presented: expires_at is the later
+        exp of the access and refresh token, so past it both are rejected by jwt.decode anyway.
+    """
     print("Running token cleanup task...")
+    started = time.perf_counter()
 
-    one_month_ago = datetime.now() - timedelta(days=30)
+    now = datetime.now()
+    batch_size = settings.TOKEN_BLACKLIST_CLEANUP_BATCH_SIZE
 
-    with Session(engine) as session:
-        session.exec(
-            select(BlacklistToken)
-            .where(BlacklistToken.created_at < one_month_ago)
-        )
+    deleted = 0
 
-        old_tokens = session.exec(
-            select(BlacklistToken)
-            .where(BlacklistToken.created_at < one_month_ago)
-        ).all()
+    with Session(engine) as session:
+        while True:
+            expired_ids = (
+                select(BlacklistToken.id)
+                .where(BlacklistToken.expires_at < now)
+                .limit(batch_size)
+                .scalar_subquery()
+            )
+            result = session.exec(
+                delete(BlacklistToken).where(BlacklistToken.id.in_(expired_ids))
+            )
+            session.commit()
 
-        if old_tokens:
-            for token in old_tokens:
-                session.delete(token)
+            deleted += result.rowcount
+            if result.rowcount < batch_size:
+                break
 
-        session.commit()
+    # Rebuild the revocation filter so bits of purged tokens stop costing a DB check
+    if deleted:
+        load_token_blacklist()
 
-        print(f"Deleted {len(old_tokens)} old tokens.")
\ No newline at end of file
+    elapsed = time.perf_counter() - started
+    print(f"Deleted {deleted} blacklisted tokens that expired before {now:%Y-%m-%d %H:%M} in {elapsed:.2f}s.")
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import logging
+import queue
+import random
+import re
+import time
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from core.config import settings
+
+logger = logging.getLogger("zenith.sql")
+
+# ASGI scope of the request being served, so statements can be tagged with their route
+current_request_scope: ContextVar[Optional[dict]] = ContextVar("current_request_scope", default=None)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_PARAM_LIST_RE = re.compile(r"\(\s*(?:%\(\w+\)s|\?|\$\d+|%s)(?:\s*,\s*(?:%\(\w+\)s|\?|\$\d+|%s))*\s*\)")
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+_listener: Optional[QueueListener] = None
+
+
+def fingerprint(statement: str) -> tuple[str, str]:
+    """
+        Normalise a statement so executions that differ only in literals or IN-list length
+        group together. Returns (short hash, normalised text).
+    """
+    normalised = _WHITESPACE_RE.sub(" ", statement).strip()
+    normalised = _PARAM_LIST_RE.sub("(?)", normalised)
+    normalised = _LITERAL_RE.sub("?", normalised)
+    return hashlib.sha1(normalised.encode()).hexdigest()[:12], normalised
+
+
+def route_template(scope: dict) -> str:
+    # "route" is filled in by the router, so this is the path template once routing has happened
+    route = scope.get("route")
+    path = getattr(route, "path", None) or scope.get("path")
+    return f"{scope.get('method', '')} {path}".strip()
+
+
+def current_route() -> Optional[str]:
+    scope = current_request_scope.get()
+    if scope is None:
+        return None
+    return route_template(scope)
+
+
+class RequestScopeMiddleware:
+    """Pure ASGI middleware that exposes the current request scope to SQL instrumentation."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = current_request_scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_request_scope.reset(token)
+
+
+def _start_listener() -> None:
+    # Records are queued on the request thread and written by a background thread
+    global _listener
+    if _listener is not None:
+        return
+
+    records = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter("%(message)s"))
+
+    logger.addHandler(QueueHandler(records))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    _listener = QueueListener(records, stream)
+    _listener.start()
+
+
+def instrument_sql_logging(engine: Engine) -> bool:
+    """
+        Attach sampled / slow-query logging to engine.
+        With SQL_LOG_SAMPLE_RATE and SQL_SLOW_QUERY_MS both at 0 no listener is attached,
+        so statements pay nothing.
+    """
+    sample_rate = settings.SQL_LOG_SAMPLE_RATE
+    slow_seconds = settings.SQL_SLOW_QUERY_MS / 1000
+
+    if sample_rate <= 0 and slow_seconds <= 0:
+        return False
+
+    _start_listener()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        context._sql_log_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context._sql_log_started
+        slow = 0 < slow_seconds <= duration
+
+        if not slow and (sample_rate <= 0 or random.random() >= sample_rate):
+            return
+
+        statement_hash, normalised = fingerprint(statement)
+        logger.info(json.dumps({
+            "event": "slow_query" if slow else "sql_sample",
+            "fingerprint": statement_hash,
+            "statement": normalised[:settings.SQL_LOG_MAX_STATEMENT_LENGTH],
+            "duration_ms": round(duration * 1000, 3),
+            "rows": cursor.rowcount,
+            "executemany": executemany,
+            "route": current_route(),
+        }))
+
+    return True
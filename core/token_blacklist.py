@@ -0,0 +1,201 @@
+import hashlib
+import math
+import threading
+from datetime import datetime, timedelta
+from typing import Iterable, Optional
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlmodel import Session, select, or_, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core.config import settings
+from core.database import engine
+from models import BlacklistToken
+
+
+class BloomFilter:
+    """
+        Fixed-size Bloom filter over token strings.
+        May report false positives, never false negatives.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterable[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str) -> None:
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                added = True
+        # Re-adding a known token (overlapping syncs) must not count towards capacity
+        if added:
+            self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class TokenBlacklist:
+    """
+        Process-local view of the BlacklistToken table.
+        Until the first load succeeds every lookup goes to the database, so revocation is
+        never skipped; afterwards only Bloom filter hits are confirmed with an indexed query.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = BloomFilter(settings.TOKEN_BLACKLIST_BLOOM_CAPACITY, settings.TOKEN_BLACKLIST_BLOOM_ERROR_RATE)
+        self._ready = False
+        self._synced_until: Optional[datetime] = None
+        # One list per load() in progress: tokens add()ed while it reads the table
+        self._load_journals: list[list[str]] = []
+
+    def load(self) -> int:
+        """
+            Rebuild the filter from every blacklisted token.
+            A logout that commits after the table was read is only in the old filter, so add()
+            also journals tokens while a load runs and they are replayed before the swap.
+        """
+        journal: list[str] = []
+        with self._lock:
+            self._load_journals.append(journal)
+
+        try:
+            bloom, total, synced_until = self._read_filter()
+        except BaseException:
+            with self._lock:
+                self._load_journals.remove(journal)
+            raise
+
+        with self._lock:
+            self._load_journals.remove(journal)
+            for token in journal:
+                bloom.add(token)
+            self._filter = bloom
+            self._synced_until = synced_until
+            self._ready = True
+
+        return total
+
+    def _read_filter(self) -> tuple[BloomFilter, int, Optional[datetime]]:
+        with Session(engine) as session:
+            total = session.exec(select(func.count()).select_from(BlacklistToken)).one()
+            bloom = BloomFilter(
+                max(settings.TOKEN_BLACKLIST_BLOOM_CAPACITY, total * 2),
+                settings.TOKEN_BLACKLIST_BLOOM_ERROR_RATE
+            )
+            synced_until = None
+
+            rows = session.exec(
+                select(BlacklistToken.access_token, BlacklistToken.refresh_token, BlacklistToken.created_at)
+                .execution_options(yield_per=5000)
+            )
+            for access_token, refresh_token, created_at in rows:
+                bloom.add(access_token)
+                bloom.add(refresh_token)
+                if synced_until is None or created_at > synced_until:
+                    synced_until = created_at
+
+        return bloom, total, synced_until
+
+    def sync(self) -> int:
+        """
+            Pull tokens blacklisted by other workers since the last load/sync.
+            created_at is set before the row commits, so a slow transaction can land behind the
+            newest row already seen; re-reading a look-back window keeps those from being skipped.
+        """
+        if not self._ready:
+            return self.load()
+
+        with Session(engine) as session:
+            query = select(BlacklistToken.access_token, BlacklistToken.refresh_token, BlacklistToken.created_at)
+            if self._synced_until is not None:
+                lookback = timedelta(seconds=settings.TOKEN_BLACKLIST_SYNC_LOOKBACK_SECONDS)
+                query = query.where(BlacklistToken.created_at >= self._synced_until - lookback)
+            rows = session.exec(query).all()
+
+        with self._lock:
+            for access_token, refresh_token, created_at in rows:
+                self._filter.add(access_token)
+                self._filter.add(refresh_token)
+                if self._synced_until is None or created_at > self._synced_until:
+                    self._synced_until = created_at
+            overfull = self._filter.count > self._filter.capacity
+
+        if overfull:
+            self.load()
+
+        return len(rows)
+
+    def add(self, *tokens: str) -> None:
+        with self._lock:
+            for token in tokens:
+                self._filter.add(token)
+            for journal in self._load_journals:
+                journal.extend(tokens)
+
+    def _needs_db_check(self, token: str) -> bool:
+        return not self._ready or token in self._filter
+
+    def is_revoked(self, token: str, session: Session) -> bool:
+        if not self._needs_db_check(token):
+            return False
+
+        return session.exec(_revoked_query(token)).first() is not None
+
+    async def is_revoked_async(self, token: str, session: AsyncSession) -> bool:
+        if not self._needs_db_check(token):
+            return False
+
+        return (await session.exec(_revoked_query(token))).first() is not None
+
+
+def _revoked_query(token: str):
+    return (
+        select(BlacklistToken.id)
+        .where(or_(BlacklistToken.access_token == token, BlacklistToken.refresh_token == token))
+        .limit(1)
+    )
+
+
+token_blacklist = TokenBlacklist()
+
+
+def load_token_blacklist() -> None:
+    try:
+        total = token_blacklist.load()
+        print(f"Loaded {total} blacklisted token pairs into the revocation filter.")
+    except SQLAlchemyError as e:
+        print(f"Could not load token blacklist, falling back to database checks: {e}")
+
+
+def sync_token_blacklist() -> None:
+    try:
+        token_blacklist.sync()
+    except SQLAlchemyError as e:
+        print(f"Token blacklist sync failed: {e}")
+
+
+def remember_revoked_tokens(*tokens: str) -> None:
+    token_blacklist.add(*tokens)
+
+
+def is_token_revoked(token: str, session: Session) -> bool:
+    return token_blacklist.is_revoked(token, session)
+
+
+async def is_token_revoked_async(token: str, session: AsyncSession) -> bool:
+    return await token_blacklist.is_revoked_async(token, session)
@@ -11,7 +11,9 @@ from starlette import status
 
 from core import security
 from core.config import settings
-from core.database import SessionDep
+from core.database import SessionDep, AsyncSessionDep
+from core.principal_cache import get_cached_principal, get_cached_principal_async, cache_principal
+from core.token_blacklist import is_token_revoked, is_token_revoked_async
 from models import User, Admin, Parent, Teacher, Student
 from schemas import UserPublic, TokenPayload
 
@@ -30,37 +32,35 @@ class UserRole(str, Enum):
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> tuple[Union[Admin, Parent, Teacher, Student], str]:
-    """
-        Returns tuple of (user_object, role)
-    """
+ROLE_MODELS = {
+    "admin": Admin,
+    "parent": Parent,
+    "teacher": Teacher,
+    "student": Student,
+}
+
 
+def decode_token(token: str) -> TokenPayload:
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
-        token_data = TokenPayload(**payload)
+        return TokenPayload(**payload)
     except (InvalidTokenError, ValidationError):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
 
-    # Fetch user based on role
-    user = None
-    role = token_data.role
 
-    if role == "admin":
-        user = session.exec(select(Admin).where(Admin.id == token_data.user_id)).first()
-    elif role == "parent":
-        user = session.exec(select(Parent).where(Parent.id == token_data.user_id)).first()
-    elif role == "teacher":
-        user = session.exec(select(Teacher).where(Teacher.id == token_data.user_id)).first()
-    elif role == "student":
-        user = session.exec(select(Student).where(Student.id == token_data.user_id)).first()
+def raise_revoked_token():
+    raise HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Token has been revoked",
+    )
 
-    # user = session.query(User).filter_by(username=token_data.sub).first()
 
+def check_active_user(user, role: str):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -68,12 +68,85 @@ def get_current_user(session: SessionDep, token: TokenDep) -> tuple[Union[Admin,
     if role != "admin" and hasattr(user, 'is_delete') and user.is_delete:
         raise HTTPException(status_code=400, detail="Inactive user")
 
+
+def get_current_user(session: SessionDep, token: TokenDep) -> tuple[Union[Admin, Parent, Teacher, Student], str]:
+    """
+        Returns tuple of (user_object, role)
+    """
+
+    token_data = decode_token(token)
+
+    if is_token_revoked(token, session):
+        raise_revoked_token()
+
+    # Fetch user based on role, served from the principal cache when possible
+    role = token_data.role
+    user = get_cached_principal(role, token_data.user_id, session)
+
+    if user is None:
+        if role == "admin":
+            user = session.exec(select(Admin).where(Admin.id == token_data.user_id)).first()
+        elif role == "parent":
+            user = session.exec(select(Parent).where(Parent.id == token_data.user_id)).first()
+        elif role == "teacher":
+            user = session.exec(select(Teacher).where(Teacher.id == token_data.user_id)).first()
+        elif role == "student":
+            user = session.exec(select(Student).where(Student.id == token_data.user_id)).first()
+
+        if user:
+            cache_principal(role, user)
+
+    # user = session.query(User).filter_by(username=token_data.sub).first()
+
+    check_active_user(user, role)
+
     return user, role
 
 
 CurrentUser = Annotated[tuple[Union[Admin, Parent, Teacher, Student], str], Depends(get_current_user)]
 
 
+async def get_current_user_async(session: AsyncSessionDep,
+                                 token: TokenDep) -> tuple[Union[Admin, Parent, Teacher, Student], str]:
+    """
+        get_current_user for async endpoints: the lookup runs on the async session, so a cache
+        miss does not hold a sync-pool connection for the rest of the request.
+        Relationships of the returned user cannot lazy-load.
+    """
+
+    token_data = decode_token(token)
+
+    if await is_token_revoked_async(token, session):
+        raise_revoked_token()
+
+    role = token_data.role
+    user = await get_cached_principal_async(role, token_data.user_id, session)
+
+    if user is None and role in ROLE_MODELS:
+        model = ROLE_MODELS[role]
+        user = (await session.exec(select(model).where(model.id == token_data.user_id))).first()
+
+        if user:
+            cache_principal(role, user)
+
+    check_active_user(user, role)
+
+    return user, role
+
+
+AsyncCurrentUser = Annotated[tuple[Union[Admin, Parent, Teacher, Student], str], Depends(get_current_user_async)]
+
+
+def check_role(current_user: tuple, allowed_roles: tuple[UserRole, ...]):
+    user, role = current_user
+    if role not in [r.value for r in allowed_roles]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Access denied. Required roles: {', '.join([r.value for r in allowed_roles])}"
+        )
+    return current_user
+
+
 def require_roles(*allowed_roles: UserRole):
     """
         Dependency to check if current user has required role.
@@ -81,13 +154,16 @@ def require_roles(*allowed_roles: UserRole):
     """
 
     def role_checker(current_user: CurrentUser):
-        user, role = current_user
-        if role not in [r.value for r in allowed_roles]:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=f"Access denied. Required roles: {', '.join([r.value for r in allowed_roles])}"
-            )
-        return current_user
+        return check_role(current_user, allowed_roles)
+
+    return role_checker
+
+
+def require_roles_async(*allowed_roles: UserRole):
+    """require_roles for endpoints that take AsyncSessionDep."""
+
+    async def role_checker(current_user: AsyncCurrentUser):
+        return check_role(current_user, allowed_roles)
 
     return role_checker
 
@@ -147,3 +223,35 @@ AllUser = Annotated[
     tuple[Union[Admin, Parent, Teacher, Student], str],
     Depends(require_roles(UserRole.ADMIN, UserRole.TEACHER, UserRole.STUDENT, UserRole.PARENT))
 ]
+
+
+# Async-session counterparts, used by the async read endpoints
+AsyncAdminUser = Annotated[
+    tuple[Union[Admin, Parent, Teacher, Student], str],
+    Depends(require_roles_async(UserRole.ADMIN))
+]
+
+AsyncTeacherOrAdminUser = Annotated[
+    tuple[Union[Admin, Parent, Teacher, Student], str],
+    Depends(require_roles_async(UserRole.ADMIN, UserRole.TEACHER))
+]
+
+AsyncStudentOrTeacherOrAdminUser = Annotated[
+    tuple[Union[Admin, Parent, Teacher, Student], str],
+    Depends(require_roles_async(UserRole.STUDENT, UserRole.TEACHER, UserRole.ADMIN))
+]
+
+AsyncParentUser = Annotated[
+    tuple[Union[Admin, Parent, Teacher, Student], str],
+    Depends(require_roles_async(UserRole.PARENT))
+]
+
+AsyncStudentOrParentOrAdminUser = Annotated[
+    tuple[Union[Admin, Parent, Teacher, Student], str],
+    Depends(require_roles_async(UserRole.STUDENT, UserRole.PARENT, UserRole.ADMIN))
+]
+
+AsyncAllUser = Annotated[
+    tuple[Union[Admin, Parent, Teacher, Student], str],
+    Depends(require_roles_async(UserRole.ADMIN, UserRole.TEACHER, UserRole.STUDENT, UserRole.PARENT))
+]
@@ -9,9 +9,14 @@ from starlette.middleware.cors import CORSMiddleware
 from apscheduler.schedulers.background import BackgroundScheduler
 from starlette.staticfiles import StaticFiles
 
+from core.attendance_partitions import create_upcoming_attendance_partitions
 from core.config import settings
 from core.database import init_db
-from core.security import delete_old_blacklisted_tokens
+from core.sql_logging import RequestScopeMiddleware
+from core.request_metrics import QueryMetricsMiddleware
+from core.security import delete_old_blacklisted_tokens, delete_expired_refresh_tokens
+from core.token_blacklist import load_token_blacklist, sync_token_blacklist
+from repository.attendance_risk import detect_at_risk_students
 from routers.main import api_router
 import os
 
@@ -23,6 +28,8 @@ def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 init_db(Session)
+create_upcoming_attendance_partitions()
+load_token_blacklist()
 
 
 @asynccontextmanager
@@ -60,8 +67,17 @@ app = FastAPI(
 
 scheduler = BackgroundScheduler()
 scheduler.add_job(delete_old_blacklisted_tokens, "cron", day_of_week="mon", hour=1)
+scheduler.add_job(delete_expired_refresh_tokens, "cron", day_of_week="mon", hour=1, minute=15)
+scheduler.add_job(create_upcoming_attendance_partitions, "cron", day=1, hour=2)
+scheduler.add_job(detect_at_risk_students, "cron", hour=0, minute=30)
+scheduler.add_job(sync_token_blacklist, "interval", seconds=settings.TOKEN_BLACKLIST_SYNC_SECONDS)
 scheduler.start()
 
+app.add_middleware(RequestScopeMiddleware)
+
+if settings.REQUEST_METRICS_ENABLED:
+    app.add_middleware(QueryMetricsMiddleware)
+
 if settings.all_cors_origins:
     app.add_middleware(
         CORSMiddleware,
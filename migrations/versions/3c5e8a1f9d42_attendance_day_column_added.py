@@ -0,0 +1,34 @@
+"""attendance day column added
+
+Revision ID: 3c5e8a1f9d42
+Revises: 1721d4d5074d
+Create Date: 2026-10-17 09:12:31.402518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c5e8a1f9d42'
+down_revision: Union[str, Sequence[str], None] = '1721d4d5074d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('attendance', sa.Column('attendance_day', sa.Date(), nullable=True))
+    op.execute("UPDATE attendance SET attendance_day = CAST(attendance_date AS DATE) WHERE attendance_day IS NULL")
+    op.alter_column('attendance', 'attendance_day', nullable=False)
+    op.create_index('ix_attendance_lesson_id_attendance_day', 'attendance', ['lesson_id', 'attendance_day'], unique=False)
+    op.create_index('ix_attendance_student_id_attendance_day', 'attendance', ['student_id', 'attendance_day'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_attendance_student_id_attendance_day', table_name='attendance')
+    op.drop_index('ix_attendance_lesson_id_attendance_day', table_name='attendance')
+    op.drop_column('attendance', 'attendance_day')
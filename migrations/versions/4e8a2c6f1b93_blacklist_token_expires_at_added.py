@@ -0,0 +1,49 @@
+"""blacklist token expires_at added
+
+Revision ID: 4e8a2c6f1b93
+Revises: 0b7e4f2a9c61
+Create Date: 2026-10-17 18:12:40.217604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from core.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e8a2c6f1b93'
+down_revision: Union[str, Sequence[str], None] = '0b7e4f2a9c61'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # blacklisttoken is created by init_db (create_all), so it may not exist yet on a fresh database
+    if 'blacklisttoken' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.add_column('blacklisttoken', sa.Column('expires_at', sa.DateTime(), nullable=True))
+
+    # Existing rows keep the old retention: created_at plus the longest token lifetime
+    lifetime_minutes = max(settings.ACCESS_TOKEN_EXPIRE_MINUTES, settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60)
+    op.execute(
+        sa.text(
+            "UPDATE blacklisttoken SET expires_at = created_at + make_interval(mins => :minutes) "
+            "WHERE expires_at IS NULL"
+        ).bindparams(minutes=lifetime_minutes)
+    )
+
+    op.alter_column('blacklisttoken', 'expires_at', nullable=False)
+    op.create_index(op.f('ix_blacklisttoken_expires_at'), 'blacklisttoken', ['expires_at'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if 'blacklisttoken' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.drop_index(op.f('ix_blacklisttoken_expires_at'), table_name='blacklisttoken', if_exists=True)
+    op.drop_column('blacklisttoken', 'expires_at')
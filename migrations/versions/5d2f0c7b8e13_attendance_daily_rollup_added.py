@@ -0,0 +1,56 @@
+"""attendance daily rollup added
+
+Revision ID: 5d2f0c7b8e13
+Revises: 9e41b7c2d5a0
+Create Date: 2026-10-17 11:20:07.553914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2f0c7b8e13'
+down_revision: Union[str, Sequence[str], None] = '9e41b7c2d5a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('attendance_daily_rollup',
+    sa.Column('class_id', sa.Uuid(), nullable=False),
+    sa.Column('student_id', sa.Uuid(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('present_count', sa.Integer(), nullable=False),
+    sa.Column('absent_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['class.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['student.id'], ),
+    sa.PrimaryKeyConstraint('class_id', 'student_id', 'day')
+    )
+    op.create_index('ix_attendance_daily_rollup_day_class_id', 'attendance_daily_rollup', ['day', 'class_id'], unique=False)
+    op.create_index('ix_attendance_daily_rollup_student_id_day', 'attendance_daily_rollup', ['student_id', 'day'], unique=False)
+
+    # Backfill from existing attendance
+    op.execute("""
+        INSERT INTO attendance_daily_rollup (class_id, student_id, day, present_count, absent_count)
+        SELECT lesson.class_id, attendance.student_id, attendance.attendance_day,
+               SUM(CASE WHEN attendance.present THEN 1 ELSE 0 END),
+               SUM(CASE WHEN attendance.present THEN 0 ELSE 1 END)
+        FROM attendance
+        JOIN lesson ON attendance.lesson_id = lesson.id
+        WHERE attendance.is_delete = FALSE
+          AND attendance.student_id IS NOT NULL
+          AND lesson.class_id IS NOT NULL
+          AND lesson.is_delete = FALSE
+        GROUP BY lesson.class_id, attendance.student_id, attendance.attendance_day
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_attendance_daily_rollup_student_id_day', table_name='attendance_daily_rollup')
+    op.drop_index('ix_attendance_daily_rollup_day_class_id', table_name='attendance_daily_rollup')
+    op.drop_table('attendance_daily_rollup')
@@ -0,0 +1,44 @@
+"""attendance unique student lesson day
+
+Revision ID: 9e41b7c2d5a0
+Revises: 3c5e8a1f9d42
+Create Date: 2026-10-17 10:05:48.117302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9e41b7c2d5a0'
+down_revision: Union[str, Sequence[str], None] = '3c5e8a1f9d42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the most recent active mark per (student, lesson, day) and soft-delete the rest
+    op.execute("""
+        UPDATE attendance SET is_delete = TRUE
+        FROM (
+            SELECT id, ROW_NUMBER() OVER (
+                PARTITION BY student_id, lesson_id, attendance_day
+                ORDER BY attendance_date DESC, id DESC
+            ) AS rn
+            FROM attendance
+            WHERE is_delete = FALSE
+        ) AS ranked
+        WHERE attendance.id = ranked.id AND ranked.rn > 1
+    """)
+    op.create_index(
+        'uq_attendance_student_lesson_day', 'attendance', ['student_id', 'lesson_id', 'attendance_day'],
+        unique=True, postgresql_where=sa.text('is_delete = false')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_attendance_student_lesson_day', table_name='attendance')
@@ -0,0 +1,108 @@
+"""attendance partitioned by month
+
+Revision ID: a7c4e2d91b36
+Revises: 5d2f0c7b8e13
+Create Date: 2026-10-17 12:02:44.219880
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c4e2d91b36'
+down_revision: Union[str, Sequence[str], None] = '5d2f0c7b8e13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ATTENDANCE_COLUMNS = "id, attendance_date, attendance_day, present, is_delete, student_id, lesson_id"
+
+MONTHS_AHEAD = 2
+
+
+def _month_start(day: date, offset: int = 0) -> date:
+    month_index = day.year * 12 + (day.month - 1) + offset
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def _drop_attendance_indexes() -> None:
+    op.drop_index('uq_attendance_student_lesson_day', table_name='attendance')
+    op.drop_index('ix_attendance_student_id_attendance_day', table_name='attendance')
+    op.drop_index('ix_attendance_lesson_id_attendance_day', table_name='attendance')
+
+
+def _create_attendance_indexes() -> None:
+    op.create_index('ix_attendance_lesson_id_attendance_day', 'attendance', ['lesson_id', 'attendance_day'], unique=False)
+    op.create_index('ix_attendance_student_id_attendance_day', 'attendance', ['student_id', 'attendance_day'], unique=False)
+    op.create_index(
+        'uq_attendance_student_lesson_day', 'attendance', ['student_id', 'lesson_id', 'attendance_day'],
+        unique=True, postgresql_where=sa.text('is_delete = false')
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _drop_attendance_indexes()
+    op.rename_table('attendance', 'attendance_old')
+    op.execute("ALTER TABLE attendance_old RENAME CONSTRAINT attendance_pkey TO attendance_old_pkey")
+
+    # Range partitioned on attendance_day: Postgres requires the partition key in every
+    # unique constraint, and attendance_day is already part of the roster unique index.
+    op.execute("""
+        CREATE TABLE attendance (
+            id UUID NOT NULL,
+            attendance_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            attendance_day DATE NOT NULL,
+            present BOOLEAN NOT NULL,
+            is_delete BOOLEAN NOT NULL,
+            student_id UUID REFERENCES student (id),
+            lesson_id UUID REFERENCES lesson (id),
+            CONSTRAINT attendance_pkey PRIMARY KEY (id, attendance_day)
+        ) PARTITION BY RANGE (attendance_day)
+    """)
+    op.execute("CREATE TABLE attendance_default PARTITION OF attendance DEFAULT")
+
+    # One partition per month from the oldest row up to MONTHS_AHEAD months from now
+    first_day = op.get_bind().execute(sa.text("SELECT MIN(attendance_day) FROM attendance_old")).scalar()
+    today = date.today()
+    month = _month_start(first_day or today)
+    last_month = _month_start(today, MONTHS_AHEAD)
+
+    while month <= last_month:
+        next_month = _month_start(month, 1)
+        op.execute(
+            f"CREATE TABLE attendance_y{month.year}m{month.month:02d} PARTITION OF attendance "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month.isoformat()}')"
+        )
+        month = next_month
+
+    op.execute(f"INSERT INTO attendance ({ATTENDANCE_COLUMNS}) SELECT {ATTENDANCE_COLUMNS} FROM attendance_old")
+    op.drop_table('attendance_old')
+    _create_attendance_indexes()
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _drop_attendance_indexes()
+    op.rename_table('attendance', 'attendance_partitioned')
+
+    op.execute("""
+        CREATE TABLE attendance (
+            id UUID NOT NULL,
+            attendance_date TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            attendance_day DATE NOT NULL,
+            present BOOLEAN NOT NULL,
+            is_delete BOOLEAN NOT NULL,
+            student_id UUID REFERENCES student (id),
+            lesson_id UUID REFERENCES lesson (id),
+            CONSTRAINT attendance_plain_pkey PRIMARY KEY (id)
+        )
+    """)
+    op.execute(f"INSERT INTO attendance ({ATTENDANCE_COLUMNS}) SELECT {ATTENDANCE_COLUMNS} FROM attendance_partitioned")
+    # Dropping the parent drops every monthly partition with it
+    op.drop_table('attendance_partitioned')
+    op.execute("ALTER TABLE attendance RENAME CONSTRAINT attendance_plain_pkey TO attendance_pkey")
+    _create_attendance_indexes()
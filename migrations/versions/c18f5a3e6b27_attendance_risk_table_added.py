@@ -0,0 +1,42 @@
+"""attendance risk table added
+
+Revision ID: c18f5a3e6b27
+Revises: a7c4e2d91b36
+Create Date: 2026-10-17 13:41:15.870342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c18f5a3e6b27'
+down_revision: Union[str, Sequence[str], None] = 'a7c4e2d91b36'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('attendance_risk',
+    sa.Column('student_id', sa.Uuid(), nullable=False),
+    sa.Column('class_id', sa.Uuid(), nullable=True),
+    sa.Column('present_count', sa.Integer(), nullable=False),
+    sa.Column('absent_count', sa.Integer(), nullable=False),
+    sa.Column('attendance_rate', sa.Float(), nullable=False),
+    sa.Column('window_start', sa.Date(), nullable=False),
+    sa.Column('window_end', sa.Date(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['class_id'], ['class.id'], ),
+    sa.ForeignKeyConstraint(['student_id'], ['student.id'], ),
+    sa.PrimaryKeyConstraint('student_id')
+    )
+    op.create_index(op.f('ix_attendance_risk_attendance_rate'), 'attendance_risk', ['attendance_rate'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_attendance_risk_attendance_rate'), table_name='attendance_risk')
+    op.drop_table('attendance_risk')
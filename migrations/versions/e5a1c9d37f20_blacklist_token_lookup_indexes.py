@@ -0,0 +1,33 @@
+"""blacklist token lookup indexes
+
+Revision ID: e5a1c9d37f20
+Revises: d2b96e0f4a58
+Create Date: 2026-10-17 15:02:41.227604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a1c9d37f20'
+down_revision: Union[str, Sequence[str], None] = 'd2b96e0f4a58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # blacklisttoken is created by init_db (create_all), so it may not exist yet on a fresh database
+    if 'blacklisttoken' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_index(op.f('ix_blacklisttoken_access_token'), 'blacklisttoken', ['access_token'], unique=False, if_not_exists=True)
+    op.create_index(op.f('ix_blacklisttoken_refresh_token'), 'blacklisttoken', ['refresh_token'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_blacklisttoken_refresh_token'), table_name='blacklisttoken', if_exists=True)
+    op.drop_index(op.f('ix_blacklisttoken_access_token'), table_name='blacklisttoken', if_exists=True)
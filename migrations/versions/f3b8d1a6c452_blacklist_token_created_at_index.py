@@ -0,0 +1,31 @@
+"""blacklist token created_at index
+
+Revision ID: f3b8d1a6c452
+Revises: e5a1c9d37f20
+Create Date: 2026-10-17 15:37:09.514382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b8d1a6c452'
+down_revision: Union[str, Sequence[str], None] = 'e5a1c9d37f20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # blacklisttoken is created by init_db (create_all), so it may not exist yet on a fresh database
+    if 'blacklisttoken' not in sa.inspect(op.get_bind()).get_table_names():
+        return
+    op.create_index(op.f('ix_blacklisttoken_created_at'), 'blacklisttoken', ['created_at'], unique=False, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_blacklisttoken_created_at'), table_name='blacklisttoken', if_exists=True)
@@ -4,6 +4,7 @@ import uuid
 from typing import Optional, List, TYPE_CHECKING
 
 from pydantic import EmailStr
+from sqlalchemy import Index, text
 from sqlmodel import SQLModel, Field, Relationship
 
 if TYPE_CHECKING:
@@ -260,9 +261,32 @@ class Result(SQLModel, table=True):
     student: Student = Relationship(back_populates="results")
 
 
+def _attendance_day_of_insert(context) -> date:
+    return context.get_current_parameters()["attendance_date"].date()
+
+
 class Attendance(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_attendance_lesson_id_attendance_day", "lesson_id", "attendance_day"),
+        Index("ix_attendance_student_id_attendance_day", "student_id", "attendance_day"),
+        # One active mark per student, lesson and day; soft-deleted rows don't block a new mark
+        Index(
+            "uq_attendance_student_lesson_day", "student_id", "lesson_id", "attendance_day",
+            unique=True, postgresql_where=text("is_delete = false")
+        ),
+        # Monthly partitions are created by core.attendance_partitions
+        {"postgresql_partition_by": "RANGE (attendance_day)"},
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     attendance_date: datetime = Field(default_factory=datetime.now, nullable=False)
+    # Calendar day of attendance_date, stored so day filters can use the composite indexes.
+    # It is also the partition key, so it is part of the primary key.
+    # When not given it is derived from attendance_date at INSERT, never from today's date.
+    attendance_day: date = Field(
+        primary_key=True,
+        sa_column_kwargs={"default": _attendance_day_of_insert}
+    )
     present: bool = Field(default=False, nullable=False)
     is_delete: bool = Field(default=False, nullable=False)
 
@@ -273,9 +297,68 @@ class Attendance(SQLModel, table=True):
     lesson: Optional["Lesson"] = Relationship(back_populates="attendances")
 
 
+class AttendanceDailyRollup(SQLModel, table=True):
+    """Per class, student and day present/absent totals, maintained from Attendance writes."""
+    __tablename__ = "attendance_daily_rollup"
+    __table_args__ = (
+        Index("ix_attendance_daily_rollup_day_class_id", "day", "class_id"),
+        Index("ix_attendance_daily_rollup_student_id_day", "student_id", "day"),
+    )
+
+    class_id: uuid.UUID = Field(foreign_key="class.id", primary_key=True)
+    student_id: uuid.UUID = Field(foreign_key="student.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    present_count: int = Field(default=0, nullable=False)
+    absent_count: int = Field(default=0, nullable=False)
+
+
+class AttendanceRisk(SQLModel, table=True):
+    """Students whose rolling attendance rate is below the threshold, refreshed daily."""
+    __tablename__ = "attendance_risk"
+
+    student_id: uuid.UUID = Field(foreign_key="student.id", primary_key=True)
+    class_id: Optional[uuid.UUID] = Field(default=None, foreign_key="class.id")
+    present_count: int = Field(nullable=False)
+    absent_count: int = Field(nullable=False)
+    attendance_rate: float = Field(nullable=False, index=True)
+    window_start: date = Field(nullable=False)
+    window_end: date = Field(nullable=False)
+    computed_at: datetime = Field(default_factory=datetime.now, nullable=False)
+
+
+class AttendanceSyncKey(SQLModel, table=True):
+    """Idempotency keys of applied offline-sync rosters, with the result returned on replay."""
+    __tablename__ = "attendance_sync_key"
+
+    user_id: uuid.UUID = Field(primary_key=True)
+    idempotency_key: str = Field(primary_key=True, max_length=64)
+    lesson_id: uuid.UUID = Field(nullable=False)
+    attendance_date: date = Field(nullable=False)
+    total_students: int = Field(nullable=False)
+    created_count: int = Field(nullable=False)
+    updated_count: int = Field(nullable=False)
+    present_count: int = Field(nullable=False)
+    absent_count: int = Field(nullable=False)
+    applied_at: datetime = Field(default_factory=datetime.now, nullable=False)
+
+
+class RefreshToken(SQLModel, table=True):
+    """One row per issued refresh token; rotation marks it used and issues the next one in the same family."""
+    __tablename__ = "refresh_token"
+
+    jti_hash: str = Field(primary_key=True, max_length=64)
+    family_id: uuid.UUID = Field(nullable=False, index=True)
+    user_id: uuid.UUID = Field(nullable=False)
+    role: str = Field(nullable=False, max_length=16)
+    expires_at: datetime = Field(nullable=False, index=True)
+    used_at: Optional[datetime] = Field(default=None, nullable=True)
+    revoked: bool = Field(default=False, nullable=False)
+
+
 class BlacklistToken(SQLModel, table=True):
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID = Field(nullable=False)
-    access_token: str = Field(nullable=False)
-    refresh_token: str = Field(nullable=False)
-    created_at: datetime = Field(default_factory=datetime.now, nullable=False)
+    access_token: str = Field(nullable=False, index=True)
+    refresh_token: str = Field(nullable=False, index=True)
+    created_at: datetime = Field(default_factory=datetime.now, nullable=False, index=True)
+    expires_at: datetime = Field(nullable=False, index=True)  # Latest exp of the two tokens; purge after it
@@ -6,6 +6,7 @@ from sqlalchemy import func
 from sqlmodel import Session, select
 
 from core.security import get_password_hash
+from core.principal_cache import invalidate_principal
 from models import Admin
 from schemas import updatePasswordModel
 
@@ -44,4 +45,6 @@ def updateAdminPassword(data: updatePasswordModel, session: Session):
             detail="Database error while updating password."
         )
 
+    invalidate_principal("admin", data.id)
+
     return "Password updated successfully"
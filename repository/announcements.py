@@ -7,6 +7,7 @@ from psycopg import IntegrityError
 from sqlalchemy import Select, func
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from core.FileStorage import process_and_save_pdf, cleanup_pdf
 from core.config import settings
@@ -29,7 +30,7 @@ def addSearchOption(query: Select, search: str):
     return query
 
 
-def getAllAnnouncementsIsDeleteFalse(session: Session, search: str, page: int):
+async def getAllAnnouncementsIsDeleteFalse(session: AsyncSession, search: str, page: int):
     offset_value = (page - 1) * settings.ITEMS_PER_PAGE
 
     # Base query for counting
@@ -38,17 +39,18 @@ def getAllAnnouncementsIsDeleteFalse(session: Session, search: str, page: int):
         .where(Announcement.is_delete == False)
     )
     count_query = addSearchOption(count_query, search)
-    total_count = session.exec(count_query).one()
+    total_count = (await session.exec(count_query)).one()
 
     # Main query for data
     query = (
         select(Announcement)
+        .options(selectinload(Announcement.related_class))
         .where(Announcement.is_delete == False)
     )
     query = query.order_by(Announcement.announcement_date.desc())
     query = addSearchOption(query, search)
     query = query.offset(offset_value).limit(settings.ITEMS_PER_PAGE)
-    announcements = session.exec(query).unique().all()
+    announcements = (await session.exec(query)).unique().all()
 
     # Calculate pagination metadata
     total_pages = (total_count + settings.ITEMS_PER_PAGE - 1) // settings.ITEMS_PER_PAGE
@@ -80,7 +82,7 @@ def getAnnouncementById(session: Session, announcementId: uuid.UUID):
     return announcement_detail
 
 
-def getAllAnnouncementsByTeacherAndIsDeleteFalse(teacherId, session, search, page):
+async def getAllAnnouncementsByTeacherAndIsDeleteFalse(teacherId, session, search, page):
     offset_value = (page - 1) * settings.ITEMS_PER_PAGE
 
     # Base query for counting
@@ -93,11 +95,12 @@ def getAllAnnouncementsByTeacherAndIsDeleteFalse(teacherId, session, search, pag
         )
     )
     count_query = addSearchOption(count_query, search)
-    total_count = session.exec(count_query).one()
+    total_count = (await session.exec(count_query)).one()
 
     # Main query for data
     query = (
         select(Announcement)
+        .options(selectinload(Announcement.related_class))
         .join(Class, onclause=(Announcement.class_id == Class.id), isouter=True)
         .where(
             Announcement.is_delete == False,
@@ -107,7 +110,7 @@ def getAllAnnouncementsByTeacherAndIsDeleteFalse(teacherId, session, search, pag
     query = query.order_by(Announcement.announcement_date.desc())
     query = addSearchOption(query, search)
     query = query.offset(offset_value).limit(settings.ITEMS_PER_PAGE)
-    announcements = session.exec(query).unique().all()
+    announcements = (await session.exec(query)).unique().all()
 
     # Calculate pagination metadata
     total_pages = (total_count + settings.ITEMS_PER_PAGE - 1) // settings.ITEMS_PER_PAGE
@@ -122,7 +125,7 @@ def getAllAnnouncementsByTeacherAndIsDeleteFalse(teacherId, session, search, pag
     )
 
 
-def getAllAnnouncementsByStudentAndIsDeleteFalse(studentId, session, search, page):
+async def getAllAnnouncementsByStudentAndIsDeleteFalse(studentId, session, search, page):
     offset_value = (page - 1) * settings.ITEMS_PER_PAGE
 
     # Base query for counting
@@ -136,11 +139,12 @@ def getAllAnnouncementsByStudentAndIsDeleteFalse(studentId, session, search, pag
         )
     )
     count_query = addSearchOption(count_query, search)
-    total_count = session.exec(count_query).one()
+    total_count = (await session.exec(count_query)).one()
 
     # Main query for data
     query = (
         select(Announcement)
+        .options(selectinload(Announcement.related_class))
         .join(Class, onclause=(Class.id == Announcement.class_id), isouter=True)
         .join(Student, onclause=(Class.id == Student.class_id))
         .where(
@@ -151,7 +155,7 @@ def getAllAnnouncementsByStudentAndIsDeleteFalse(studentId, session, search, pag
     query = query.order_by(Announcement.announcement_date.desc())
     query = addSearchOption(query, search)
     query = query.offset(offset_value).limit(settings.ITEMS_PER_PAGE)
-    announcements = session.exec(query).unique().all()
+    announcements = (await session.exec(query)).unique().all()
 
     # Calculate pagination metadata
     total_pages = (total_count + settings.ITEMS_PER_PAGE - 1) // settings.ITEMS_PER_PAGE
@@ -166,7 +170,7 @@ def getAllAnnouncementsByStudentAndIsDeleteFalse(studentId, session, search, pag
     )
 
 
-def getAllAnnouncementsByParentAndIsDeleteFalse(parentId, session, search, page):
+async def getAllAnnouncementsByParentAndIsDeleteFalse(parentId, session, search, page):
     offset_value = (page - 1) * settings.ITEMS_PER_PAGE
 
     # Base query for counting
@@ -180,11 +184,12 @@ def getAllAnnouncementsByParentAndIsDeleteFalse(parentId, session, search, page)
         )
     )
     count_query = addSearchOption(count_query, search)
-    total_count = session.exec(count_query).one()
+    total_count = (await session.exec(count_query)).one()
 
     # Main query for data
     query = (
         select(Announcement)
+        .options(selectinload(Announcement.related_class))
         .join(Class, onclause=(Class.id == Announcement.class_id), isouter=True)
         .join(Student, onclause=(Class.id == Student.class_id))
         .where(
@@ -195,7 +200,7 @@ def getAllAnnouncementsByParentAndIsDeleteFalse(parentId, session, search, page)
     query = query.order_by(Announcement.announcement_date.desc())
     query = addSearchOption(query, search)
     query = query.offset(offset_value).limit(settings.ITEMS_PER_PAGE)
-    announcements = session.exec(query).unique().all()
+    announcements = (await session.exec(query)).unique().all()
 
     # Calculate pagination metadata
     total_pages = (total_count + settings.ITEMS_PER_PAGE - 1) // settings.ITEMS_PER_PAGE
@@ -1,21 +1,31 @@
+import base64
+import csv
+import io
+import json
 import uuid
 from datetime import datetime, date
-from typing import Optional
+from typing import Optional, Iterator
 from calendar import monthrange
 
 from fastapi import HTTPException
-from psycopg import IntegrityError
 from sqlalchemy import func, case, and_, distinct
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from models import Attendance, Lesson, Student, Class, Subject, Teacher, Day
+from core.config import settings
+from core.database import engine
+from models import Attendance, AttendanceDailyRollup, AttendanceSyncKey, Lesson, Student, Class, Subject, Teacher, Day, Grade
+from repository.attendance_rollup import refreshAttendanceRollup
 from schemas import (
     AttendanceBulkSave, AttendanceSave, AttendanceUpdate, AttendanceDetail,
     AttendanceDashboardSummary, ClassAttendanceSummary, ClasswiseAttendanceResponse,
     StudentMonthlyAttendance, StudentAttendanceRecord, CalendarDayData,
-    CalendarHeatmapResponse, ClassStudentAttendance, ClassAttendanceDetailResponse,
+    CalendarHeatmapResponse, StudentAttendanceBitset, ClassStudentAttendance, ClassAttendanceDetailResponse,
     TeacherClassSummary, StudentRosterItem, LessonRosterResponse, LessonForDateItem,
-    LessonsForDateResponse, AttendanceTakeRequest, AttendanceTakeResponse
+    LessonsForDateResponse, AttendanceTakeRequest, AttendanceTakeResponse, AttendanceRecord,
+    AttendanceSyncRequest, AttendanceSyncItemResult, AttendanceSyncResponse
 )
 
 
@@ -23,8 +33,8 @@ def attendanceOfWeek(session: Session, monday: datetime, sunday: datetime):
     query = (
         select(Attendance)
         .where(
-            Attendance.attendance_date >= monday,
-            Attendance.attendance_date <= sunday,
+            Attendance.attendance_day >= monday.date(),
+            Attendance.attendance_day <= sunday.date(),
             Attendance.is_delete == False
         )
     )
@@ -38,7 +48,7 @@ def attendanceOfWeek(session: Session, monday: datetime, sunday: datetime):
 def attendanceOfStudentOfCurrentYear(studentId: uuid.UUID, startDate: date, session: Session):
     query = (
         select(Attendance)
-        .where(Attendance.attendance_date >= startDate, Attendance.student_id == studentId,
+        .where(Attendance.attendance_day >= startDate, Attendance.student_id == studentId,
                Attendance.is_delete == False)
     )
 
@@ -48,6 +58,59 @@ def attendanceOfStudentOfCurrentYear(studentId: uuid.UUID, startDate: date, sess
     return attendance
 
 
+def _upsertAttendanceRows(
+    lesson_id: uuid.UUID,
+    attendance_date: date,
+    records: list[AttendanceRecord],
+    overwrite: bool,
+    session: Session
+) -> dict[uuid.UUID, bool]:
+    """
+    Write a whole roster in one INSERT ... ON CONFLICT statement.
+    Conflicts on (student_id, lesson_id, attendance_day) update the row when overwrite is set,
+    otherwise they are skipped. Returns {student_id: created} for every row written.
+    """
+    attendance_datetime = datetime.combine(attendance_date, datetime.now().time())
+
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "student_id": record.student_id,
+            "lesson_id": lesson_id,
+            "attendance_date": attendance_datetime,
+            "attendance_day": attendance_date,
+            "present": record.present,
+            "is_delete": False
+        }
+        for record in records
+    ]
+    new_ids = {row["id"] for row in rows}
+
+    insert_stmt = pg_insert(Attendance).values(rows)
+    conflict_target = dict(
+        index_elements=[Attendance.student_id, Attendance.lesson_id, Attendance.attendance_day],
+        index_where=Attendance.is_delete == False
+    )
+
+    if overwrite:
+        insert_stmt = insert_stmt.on_conflict_do_update(
+            **conflict_target,
+            set_={
+                "present": insert_stmt.excluded.present,
+                "attendance_date": insert_stmt.excluded.attendance_date
+            }
+        )
+    else:
+        insert_stmt = insert_stmt.on_conflict_do_nothing(**conflict_target)
+
+    # A conflicting row keeps its original id, so ids we generated identify the inserted rows
+    written = session.exec(insert_stmt.returning(Attendance.id, Attendance.student_id)).all()
+
+    refreshAttendanceRollup(((student_id, attendance_date) for _, student_id in written), session)
+
+    return {student_id: attendance_id in new_ids for attendance_id, student_id in written}
+
+
 def attendanceBulkSave(bulk_data: AttendanceBulkSave, userId: uuid.UUID, role: str, session: Session):
     lesson_query = (
         select(Lesson)
@@ -95,58 +158,21 @@ def attendanceBulkSave(bulk_data: AttendanceBulkSave, userId: uuid.UUID, role: s
             detail="Duplicate student IDs found in the attendance list."
         )
 
-    existing_query = (
-        select(Attendance)
-        .where(
-            Attendance.lesson_id == bulk_data.lesson_id,
-            func.date(Attendance.attendance_date) == bulk_data.attendance_date,
-            Attendance.student_id.in_(provided_student_ids),
-            Attendance.is_delete == False
-        )
+    written = _upsertAttendanceRows(
+        bulk_data.lesson_id, bulk_data.attendance_date, bulk_data.attendances, False, session
     )
-    existing_attendances = session.exec(existing_query).all()
 
-    if existing_attendances:
-        existing_student_ids = [str(att.student_id) for att in existing_attendances]
+    if len(written) != len(bulk_data.attendances):
+        session.rollback()
+        existing_student_ids = [str(sid) for sid in provided_student_ids - written.keys()]
         raise HTTPException(
             status_code=409,
             detail=f"Attendance already exists for students: {', '.join(existing_student_ids)} on {bulk_data.attendance_date}"
         )
 
-    new_attendances = []
-    saved_count = 0
+    saved_count = len(written)
     failed_records = []
 
-    for record in bulk_data.attendances:
-        try:
-            attendance_datetime = datetime.combine(
-                bulk_data.attendance_date,
-                datetime.now().time()
-            )
-
-            new_attendance = Attendance(
-                student_id=record.student_id,
-                lesson_id=bulk_data.lesson_id,
-                attendance_date=attendance_datetime,
-                present=record.present,
-                is_delete=False
-            )
-            new_attendances.append(new_attendance)
-            session.add(new_attendance)
-            saved_count += 1
-        except Exception as e:
-            failed_records.append({
-                "student_id": str(record.student_id),
-                "error": str(e)
-            })
-
-    if failed_records:
-        session.rollback()
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to save some attendance records: {failed_records}"
-        )
-
     try:
         session.commit()
     except IntegrityError as e:
@@ -208,7 +234,7 @@ def attendanceSave(attendance_data: AttendanceSave, userId: uuid.UUID, role: str
     duplicate_query = select(Attendance).where(
         Attendance.lesson_id == attendance_data.lesson_id,
         Attendance.student_id == attendance_data.student_id,
-        func.date(Attendance.attendance_date) == attendance_data.attendance_date,
+        Attendance.attendance_day == attendance_data.attendance_date,
         Attendance.is_delete == False
     )
     existing = session.exec(duplicate_query).first()
@@ -228,6 +254,7 @@ def attendanceSave(attendance_data: AttendanceSave, userId: uuid.UUID, role: str
         student_id=attendance_data.student_id,
         lesson_id=attendance_data.lesson_id,
         attendance_date=attendance_datetime,
+        attendance_day=attendance_data.attendance_date,
         present=attendance_data.present,
         is_delete=False
     )
@@ -235,6 +262,8 @@ def attendanceSave(attendance_data: AttendanceSave, userId: uuid.UUID, role: str
     session.add(new_attendance)
 
     try:
+        # The rollup refresh flushes, so a concurrent duplicate can surface here as well as on commit
+        refreshAttendanceRollup([(new_attendance.student_id, new_attendance.attendance_day)], session)
         session.commit()
     except IntegrityError:
         session.rollback()
@@ -279,6 +308,7 @@ def attendanceUpdate(attendance_data: AttendanceUpdate, userId: uuid.UUID, role:
     session.add(current_attendance)
 
     try:
+        refreshAttendanceRollup([(current_attendance.student_id, current_attendance.attendance_day)], session)
         session.commit()
     except IntegrityError:
         session.rollback()
@@ -323,6 +353,7 @@ def attendanceSoftDelete(id: uuid.UUID, userId: uuid.UUID, role: str, session: S
     session.add(current_attendance)
 
     try:
+        refreshAttendanceRollup([(current_attendance.student_id, current_attendance.attendance_day)], session)
         session.commit()
     except IntegrityError:
         session.rollback()
@@ -372,7 +403,7 @@ def getAttendanceByLesson(lesson_id: uuid.UUID, attendance_date: Optional[date],
 
     if attendance_date:
         attendance_query = attendance_query.where(
-            func.date(Attendance.attendance_date) == attendance_date
+            Attendance.attendance_day == attendance_date
         )
 
     attendance_query = attendance_query.order_by(Attendance.attendance_date.desc())
@@ -400,48 +431,34 @@ def getAttendanceByLesson(lesson_id: uuid.UUID, attendance_date: Optional[date],
 
 # ===================== Dashboard & Summary Functions =====================
 
-def getDashboardSummary(target_date: date, session: Session) -> AttendanceDashboardSummary:
+async def getDashboardSummary(target_date: date, session: AsyncSession) -> AttendanceDashboardSummary:
     """
     Get admin dashboard summary for a specific date.
     Returns: total classes, classes with attendance, pending, present/absent counts, rate
     """
     # Get all active classes
     total_classes_query = select(func.count(Class.id)).where(Class.is_delete == False)
-    total_classes = session.exec(total_classes_query).first() or 0
+    total_classes = (await session.exec(total_classes_query)).first() or 0
 
     # Get total students
     total_students_query = select(func.count(Student.id)).where(Student.is_delete == False)
-    total_students = session.exec(total_students_query).first() or 0
+    total_students = (await session.exec(total_students_query)).first() or 0
 
-    # Get attendance records for the specific date
+    # Attendance totals and classes with attendance for the specific date, from the daily rollup
     attendance_query = (
         select(
-            func.count(Attendance.id).label('total'),
-            func.sum(case((Attendance.present == True, 1), else_=0)).label('present'),
-            func.sum(case((Attendance.present == False, 1), else_=0)).label('absent')
-        )
-        .where(
-            func.date(Attendance.attendance_date) == target_date,
-            Attendance.is_delete == False
+            func.sum(AttendanceDailyRollup.present_count).label('present'),
+            func.sum(AttendanceDailyRollup.absent_count).label('absent'),
+            func.count(distinct(AttendanceDailyRollup.class_id)).label('classes')
         )
+        .where(AttendanceDailyRollup.day == target_date)
     )
-    attendance_stats = session.exec(attendance_query).first()
+    attendance_stats = (await session.exec(attendance_query)).first()
 
-    present_count = int(attendance_stats[1] or 0)
-    absent_count = int(attendance_stats[2] or 0)
+    present_count = int(attendance_stats[0] or 0)
+    absent_count = int(attendance_stats[1] or 0)
     total_attendance = present_count + absent_count
-
-    # Get classes that have attendance recorded for this date
-    classes_with_attendance_query = (
-        select(func.count(distinct(Lesson.class_id)))
-        .join(Attendance, Attendance.lesson_id == Lesson.id)
-        .where(
-            func.date(Attendance.attendance_date) == target_date,
-            Attendance.is_delete == False,
-            Lesson.is_delete == False
-        )
-    )
-    classes_with_attendance = session.exec(classes_with_attendance_query).first() or 0
+    classes_with_attendance = int(attendance_stats[2] or 0)
 
     pending_classes = total_classes - classes_with_attendance
     attendance_rate = (present_count / total_attendance * 100) if total_attendance > 0 else 0.0
@@ -458,60 +475,88 @@ def getDashboardSummary(target_date: date, session: Session) -> AttendanceDashbo
     )
 
 
-def getClasswiseSummary(target_date: date, session: Session) -> ClasswiseAttendanceResponse:
+def _studentCountByClass():
+    """Subquery: active student headcount per class_id."""
+    return (
+        select(
+            Student.class_id.label('class_id'),
+            func.count(Student.id).label('total_students')
+        )
+        .where(Student.is_delete == False)
+        .group_by(Student.class_id)
+        .subquery()
+    )
+
+
+def _attendanceStatsByLesson(target_date: date):
+    """Subquery: present/absent totals per lesson_id on a specific date."""
+    return (
+        select(
+            Attendance.lesson_id.label('lesson_id'),
+            func.sum(case((Attendance.present == True, 1), else_=0)).label('present'),
+            func.sum(case((Attendance.present == False, 1), else_=0)).label('absent')
+        )
+        .where(
+            Attendance.attendance_day == target_date,
+            Attendance.is_delete == False
+        )
+        .group_by(Attendance.lesson_id)
+        .subquery()
+    )
+
+
+async def getClasswiseSummary(target_date: date, session: AsyncSession) -> ClasswiseAttendanceResponse:
     """
     Get class-wise attendance summary for a specific date.
     Returns list of classes with their attendance stats.
+    Classes, grades, headcounts and attendance totals are resolved in a single grouped query.
     """
-    # Get all active classes with their student counts
+    student_counts = _studentCountByClass()
+
+    # Attendance totals per class on this date, from the daily rollup
+    attendance_stats = (
+        select(
+            AttendanceDailyRollup.class_id.label('class_id'),
+            func.sum(AttendanceDailyRollup.present_count).label('present'),
+            func.sum(AttendanceDailyRollup.absent_count).label('absent')
+        )
+        .where(AttendanceDailyRollup.day == target_date)
+        .group_by(AttendanceDailyRollup.class_id)
+        .subquery()
+    )
+
     classes_query = (
-        select(Class)
+        select(
+            Class.id,
+            Class.name,
+            Grade.level,
+            func.coalesce(student_counts.c.total_students, 0),
+            func.coalesce(attendance_stats.c.present, 0),
+            func.coalesce(attendance_stats.c.absent, 0)
+        )
+        .outerjoin(Grade, Class.grade_id == Grade.id)
+        .outerjoin(student_counts, student_counts.c.class_id == Class.id)
+        .outerjoin(attendance_stats, attendance_stats.c.class_id == Class.id)
         .where(Class.is_delete == False)
         .order_by(Class.name)
     )
-    classes = session.exec(classes_query).all()
+    rows = (await session.exec(classes_query)).all()
 
     class_summaries = []
 
-    for cls in classes:
-        # Count students in this class
-        student_count_query = (
-            select(func.count(Student.id))
-            .where(Student.class_id == cls.id, Student.is_delete == False)
-        )
-        total_students = session.exec(student_count_query).first() or 0
-
-        # Get attendance for this class on this date
-        attendance_query = (
-            select(
-                func.count(Attendance.id).label('total'),
-                func.sum(case((Attendance.present == True, 1), else_=0)).label('present'),
-                func.sum(case((Attendance.present == False, 1), else_=0)).label('absent')
-            )
-            .join(Lesson, Attendance.lesson_id == Lesson.id)
-            .where(
-                Lesson.class_id == cls.id,
-                func.date(Attendance.attendance_date) == target_date,
-                Attendance.is_delete == False,
-                Lesson.is_delete == False
-            )
-        )
-        attendance_stats = session.exec(attendance_query).first()
-
-        present_count = int(attendance_stats[1] or 0)
-        absent_count = int(attendance_stats[2] or 0)
+    for class_id, class_name, grade_level, total_students, present, absent in rows:
+        total_students = int(total_students or 0)
+        present_count = int(present or 0)
+        absent_count = int(absent or 0)
         marked_count = present_count + absent_count
         not_marked_count = max(0, total_students - marked_count)
 
         has_attendance = marked_count > 0
         attendance_rate = (present_count / marked_count * 100) if marked_count > 0 else 0.0
 
-        # Get grade level if available
-        grade_level = cls.grade.level if cls.grade else None
-
         class_summaries.append(ClassAttendanceSummary(
-            class_id=cls.id,
-            class_name=cls.name,
+            class_id=class_id,
+            class_name=class_name,
             grade_level=grade_level,
             total_students=total_students,
             present_count=present_count,
@@ -557,7 +602,7 @@ def getClassAttendanceDetail(
         .join(Lesson, Attendance.lesson_id == Lesson.id)
         .where(
             Lesson.class_id == class_id,
-            func.date(Attendance.attendance_date) == target_date,
+            Attendance.attendance_day == target_date,
             Attendance.is_delete == False,
             Lesson.is_delete == False
         )
@@ -618,43 +663,28 @@ def getClassAttendanceDetail(
     )
 
 
-def getStudentMonthlyAttendance(
-    student_id: uuid.UUID,
-    year: int,
-    month: int,
-    session: Session
-) -> StudentMonthlyAttendance:
-    """
-    Get monthly attendance for a specific student.
-    Returns daily records and summary stats.
-    """
-    # Verify student exists
-    student_query = select(Student).where(Student.id == student_id, Student.is_delete == False)
-    student = session.exec(student_query).first()
-    if not student:
-        raise HTTPException(status_code=404, detail=f"Student not found with ID: {student_id}")
-
-    # Calculate date range for the month
+def _monthlyAttendanceQuery(student_ids: list[uuid.UUID], year: int, month: int):
+    """Active attendance rows (with lesson and subject) of the given students in one month."""
     _, last_day = monthrange(year, month)
     start_date = date(year, month, 1)
     end_date = date(year, month, last_day)
 
-    # Get all attendance records for this student in this month
-    attendance_query = (
+    return (
         select(Attendance, Lesson, Subject)
         .join(Lesson, Attendance.lesson_id == Lesson.id)
         .outerjoin(Subject, Lesson.subject_id == Subject.id)
         .where(
-            Attendance.student_id == student_id,
-            func.date(Attendance.attendance_date) >= start_date,
-            func.date(Attendance.attendance_date) <= end_date,
+            Attendance.student_id.in_(student_ids),
+            Attendance.attendance_day >= start_date,
+            Attendance.attendance_day <= end_date,
             Attendance.is_delete == False,
             Lesson.is_delete == False
         )
         .order_by(Attendance.attendance_date.desc())
     )
-    results = session.exec(attendance_query).all()
 
+
+def _buildStudentMonthlyAttendance(student: Student, year: int, month: int, results) -> StudentMonthlyAttendance:
     records = []
     present_days = 0
     absent_days = 0
@@ -690,11 +720,33 @@ def getStudentMonthlyAttendance(
     )
 
 
-def getCalendarHeatmap(
+async def getStudentMonthlyAttendance(
     student_id: uuid.UUID,
     year: int,
     month: int,
-    session: Session
+    session: AsyncSession
+) -> StudentMonthlyAttendance:
+    """
+    Get monthly attendance for a specific student.
+    Returns daily records and summary stats.
+    """
+    # Verify student exists
+    student_query = select(Student).where(Student.id == student_id, Student.is_delete == False)
+    student = (await session.exec(student_query)).first()
+    if not student:
+        raise HTTPException(status_code=404, detail=f"Student not found with ID: {student_id}")
+
+    # Get all attendance records for this student in this month
+    results = (await session.exec(_monthlyAttendanceQuery([student_id], year, month))).all()
+
+    return _buildStudentMonthlyAttendance(student, year, month, results)
+
+
+async def getCalendarHeatmap(
+    student_id: uuid.UUID,
+    year: int,
+    month: int,
+    session: AsyncSession
 ) -> CalendarHeatmapResponse:
     """
     Get calendar heatmap data for a student's attendance.
@@ -702,7 +754,7 @@ def getCalendarHeatmap(
     """
     # Verify student exists
     student_query = select(Student).where(Student.id == student_id, Student.is_delete == False)
-    student = session.exec(student_query).first()
+    student = (await session.exec(student_query)).first()
     if not student:
         raise HTTPException(status_code=404, detail=f"Student not found with ID: {student_id}")
 
@@ -711,24 +763,23 @@ def getCalendarHeatmap(
     start_date = date(year, month, 1)
     end_date = date(year, month, last_day)
 
-    # Get attendance grouped by date
+    # Get attendance grouped by date, from the daily rollup
     attendance_query = (
         select(
-            func.date(Attendance.attendance_date).label('att_date'),
-            func.count(Attendance.id).label('total'),
-            func.sum(case((Attendance.present == True, 1), else_=0)).label('present'),
-            func.sum(case((Attendance.present == False, 1), else_=0)).label('absent')
+            AttendanceDailyRollup.day.label('att_date'),
+            func.sum(AttendanceDailyRollup.present_count + AttendanceDailyRollup.absent_count).label('total'),
+            func.sum(AttendanceDailyRollup.present_count).label('present'),
+            func.sum(AttendanceDailyRollup.absent_count).label('absent')
         )
         .where(
-            Attendance.student_id == student_id,
-            func.date(Attendance.attendance_date) >= start_date,
-            func.date(Attendance.attendance_date) <= end_date,
-            Attendance.is_delete == False
+            AttendanceDailyRollup.student_id == student_id,
+            AttendanceDailyRollup.day >= start_date,
+            AttendanceDailyRollup.day <= end_date
         )
-        .group_by(func.date(Attendance.attendance_date))
-        .order_by(func.date(Attendance.attendance_date))
+        .group_by(AttendanceDailyRollup.day)
+        .order_by(AttendanceDailyRollup.day)
     )
-    results = session.exec(attendance_query).all()
+    results = (await session.exec(attendance_query)).all()
 
     # Build daily data
     days_data = []
@@ -772,19 +823,83 @@ def getCalendarHeatmap(
     )
 
 
-def getTeacherClasses(
+async def getStudentAttendanceBitset(
+    student_id: uuid.UUID,
+    start_date: date,
+    end_date: date,
+    session: AsyncSession
+) -> StudentAttendanceBitset:
+    """
+    Get a student's attendance between two days as a packed bit array.
+    Slots are the student's marked lessons in chronological order; bit 1 means present.
+    """
+    # Verify student exists
+    student_query = select(Student.id).where(Student.id == student_id, Student.is_delete == False)
+    if not (await session.exec(student_query)).first():
+        raise HTTPException(status_code=404, detail=f"Student not found with ID: {student_id}")
+
+    # Only the two columns needed for the bits, no ORM objects
+    slots_query = (
+        select(Attendance.attendance_day, Attendance.present)
+        .where(
+            Attendance.student_id == student_id,
+            Attendance.attendance_day >= start_date,
+            Attendance.attendance_day <= end_date,
+            Attendance.is_delete == False
+        )
+        .order_by(Attendance.attendance_day, Attendance.attendance_date)
+    )
+    slots = (await session.exec(slots_query)).all()
+
+    packed = bytearray((len(slots) + 7) // 8)
+    days = []
+    day_offsets = []
+    present_count = 0
+
+    for index, (attendance_day, present) in enumerate(slots):
+        if not days or days[-1] != attendance_day:
+            days.append(attendance_day)
+            day_offsets.append(index)
+        if present:
+            packed[index >> 3] |= 0x80 >> (index & 7)
+            present_count += 1
+
+    return StudentAttendanceBitset(
+        student_id=student_id,
+        start_date=start_date,
+        end_date=end_date,
+        total_slots=len(slots),
+        present_count=present_count,
+        absent_count=len(slots) - present_count,
+        bits=base64.b64encode(bytes(packed)).decode("ascii"),
+        days=days,
+        day_offsets=day_offsets
+    )
+
+
+async def getTeacherClasses(
     teacher_id: uuid.UUID,
     target_date: date,
-    session: Session
+    session: AsyncSession
 ) -> list[TeacherClassSummary]:
     """
     Get classes assigned to a teacher with attendance status for a specific date.
     """
-    # Get lessons taught by this teacher
+    student_counts = _studentCountByClass()
+    attendance_stats = _attendanceStatsByLesson(target_date)
+
+    # Get lessons taught by this teacher with class headcounts and attendance totals joined in
     lessons_query = (
-        select(Lesson, Class, Subject)
+        select(
+            Lesson, Class, Subject,
+            func.coalesce(student_counts.c.total_students, 0),
+            func.coalesce(attendance_stats.c.present, 0),
+            func.coalesce(attendance_stats.c.absent, 0)
+        )
         .join(Class, Lesson.class_id == Class.id)
         .outerjoin(Subject, Lesson.subject_id == Subject.id)
+        .outerjoin(student_counts, student_counts.c.class_id == Class.id)
+        .outerjoin(attendance_stats, attendance_stats.c.lesson_id == Lesson.id)
         .where(
             Lesson.teacher_id == teacher_id,
             Lesson.is_delete == False,
@@ -792,34 +907,12 @@ def getTeacherClasses(
         )
         .order_by(Class.name, Lesson.name)
     )
-    lessons = session.exec(lessons_query).all()
+    lessons = (await session.exec(lessons_query)).all()
 
     summaries = []
-    for lesson, cls, subject in lessons:
-        # Count students in this class
-        student_count_query = (
-            select(func.count(Student.id))
-            .where(Student.class_id == cls.id, Student.is_delete == False)
-        )
-        total_students = session.exec(student_count_query).first() or 0
-
-        # Check if attendance is marked for this lesson today
-        attendance_query = (
-            select(
-                func.count(Attendance.id).label('total'),
-                func.sum(case((Attendance.present == True, 1), else_=0)).label('present'),
-                func.sum(case((Attendance.present == False, 1), else_=0)).label('absent')
-            )
-            .where(
-                Attendance.lesson_id == lesson.id,
-                func.date(Attendance.attendance_date) == target_date,
-                Attendance.is_delete == False
-            )
-        )
-        attendance_stats = session.exec(attendance_query).first()
-
-        present_count = int(attendance_stats[1] or 0)
-        absent_count = int(attendance_stats[2] or 0)
+    for lesson, cls, subject, total_students, present, absent in lessons:
+        present_count = int(present or 0)
+        absent_count = int(absent or 0)
         attendance_marked = (present_count + absent_count) > 0
 
         summaries.append(TeacherClassSummary(
@@ -829,7 +922,7 @@ def getTeacherClasses(
             lesson_name=lesson.name,
             subject_name=subject.name if subject else None,
             day=lesson.day.value if lesson.day else "",
-            total_students=total_students,
+            total_students=int(total_students or 0),
             attendance_marked=attendance_marked,
             present_count=present_count,
             absent_count=absent_count
@@ -838,11 +931,11 @@ def getTeacherClasses(
     return summaries
 
 
-def getParentChildrenAttendance(
+async def getParentChildrenAttendance(
     parent_id: uuid.UUID,
     year: int,
     month: int,
-    session: Session
+    session: AsyncSession
 ) -> list[StudentMonthlyAttendance]:
     """
     Get monthly attendance for all children of a parent.
@@ -852,17 +945,22 @@ def getParentChildrenAttendance(
         select(Student)
         .where(Student.parent_id == parent_id, Student.is_delete == False)
     )
-    children = session.exec(children_query).all()
+    children = (await session.exec(children_query)).all()
 
     if not children:
         raise HTTPException(status_code=404, detail="No children found for this parent")
 
-    results = []
-    for child in children:
-        monthly_attendance = getStudentMonthlyAttendance(child.id, year, month, session)
-        results.append(monthly_attendance)
+    # Fetch every child's month in one query and group the rows per child
+    rows = (await session.exec(_monthlyAttendanceQuery([child.id for child in children], year, month))).all()
+
+    rows_by_child = {child.id: [] for child in children}
+    for row in rows:
+        rows_by_child[row[0].student_id].append(row)
 
-    return results
+    return [
+        _buildStudentMonthlyAttendance(child, year, month, rows_by_child[child.id])
+        for child in children
+    ]
 
 
 # ===================== Take Attendance Workflow Functions =====================
@@ -912,7 +1010,7 @@ def getLessonRoster(
         select(Attendance)
         .where(
             Attendance.lesson_id == lesson_id,
-            func.date(Attendance.attendance_date) == target_date,
+            Attendance.attendance_day == target_date,
             Attendance.is_delete == False
         )
     )
@@ -997,12 +1095,22 @@ def getLessonsForDate(
     
     day_enum = day_enum_map.get(day_of_week)
     
-    # Build query
+    student_counts = _studentCountByClass()
+    attendance_stats = _attendanceStatsByLesson(target_date)
+
+    # Build query (headcounts and attendance totals are joined in, not queried per lesson)
     lessons_query = (
-        select(Lesson, Class, Subject, Teacher)
+        select(
+            Lesson, Class, Subject, Teacher,
+            func.coalesce(student_counts.c.total_students, 0),
+            func.coalesce(attendance_stats.c.present, 0),
+            func.coalesce(attendance_stats.c.absent, 0)
+        )
         .join(Class, Lesson.class_id == Class.id)
         .outerjoin(Subject, Lesson.subject_id == Subject.id)
         .outerjoin(Teacher, Lesson.teacher_id == Teacher.id)
+        .outerjoin(student_counts, student_counts.c.class_id == Class.id)
+        .outerjoin(attendance_stats, attendance_stats.c.lesson_id == Lesson.id)
         .where(
             Lesson.day == day_enum,
             Lesson.is_delete == False,
@@ -1023,31 +1131,10 @@ def getLessonsForDate(
     results = session.exec(lessons_query).all()
     
     lesson_items = []
-    for lesson, cls, subject, teacher in results:
-        # Count students in this class
-        student_count_query = (
-            select(func.count(Student.id))
-            .where(Student.class_id == cls.id, Student.is_delete == False)
-        )
-        students_count = session.exec(student_count_query).first() or 0
-        
-        # Get attendance status for this lesson on this date
-        attendance_query = (
-            select(
-                func.count(Attendance.id).label('total'),
-                func.sum(case((Attendance.present == True, 1), else_=0)).label('present'),
-                func.sum(case((Attendance.present == False, 1), else_=0)).label('absent')
-            )
-            .where(
-                Attendance.lesson_id == lesson.id,
-                func.date(Attendance.attendance_date) == target_date,
-                Attendance.is_delete == False
-            )
-        )
-        att_stats = session.exec(attendance_query).first()
-        
-        present_count = int(att_stats[1] or 0)
-        absent_count = int(att_stats[2] or 0)
+    for lesson, cls, subject, teacher, students_count, present, absent in results:
+        students_count = int(students_count or 0)
+        present_count = int(present or 0)
+        absent_count = int(absent or 0)
         marked_count = present_count + absent_count
         
         # Determine attendance status
@@ -1084,15 +1171,15 @@ def getLessonsForDate(
     )
 
 
-def takeAttendance(
+def _applyAttendanceTake(
     request: AttendanceTakeRequest,
     user_id: uuid.UUID,
     role: str,
     session: Session
 ) -> AttendanceTakeResponse:
     """
-    Take or update attendance for a lesson.
-    Supports both creating new records and updating existing ones.
+    Validate a roster and write it, without committing.
+    Raises HTTPException on validation errors; the caller must then roll back.
     """
     # Verify lesson exists
     lesson_query = select(Lesson).where(Lesson.id == request.lesson_id, Lesson.is_delete == False)
@@ -1135,67 +1222,55 @@ def takeAttendance(
             detail="Duplicate student IDs found in the attendance records."
         )
     
-    # Get existing attendance records for this lesson on this date
-    existing_query = (
-        select(Attendance)
-        .where(
-            Attendance.lesson_id == request.lesson_id,
-            func.date(Attendance.attendance_date) == request.attendance_date,
-            Attendance.student_id.in_(provided_student_ids),
-            Attendance.is_delete == False
-        )
+    # Write the roster in one statement; existing rows are only updated in overwrite mode
+    written = _upsertAttendanceRows(
+        request.lesson_id, request.attendance_date, request.records, request.overwrite_existing, session
     )
-    existing_attendance = session.exec(existing_query).all()
-    existing_map = {att.student_id: att for att in existing_attendance}
     
     # If attendance exists and overwrite is not allowed
-    if existing_attendance and not request.overwrite_existing:
-        existing_student_ids = [str(att.student_id) for att in existing_attendance]
+    if len(written) != len(request.records):
+        existing_student_ids = [str(sid) for sid in provided_student_ids - written.keys()]
         raise HTTPException(
             status_code=409,
             detail={
-                "message": f"Attendance already exists for {len(existing_attendance)} students on {request.attendance_date}",
+                "message": f"Attendance already exists for {len(existing_student_ids)} students on {request.attendance_date}",
                 "existing_students": existing_student_ids,
                 "hint": "Set 'overwrite_existing: true' to update existing records"
             }
         )
     
-    # Process attendance records
-    created_count = 0
-    updated_count = 0
-    present_count = 0
-    absent_count = 0
+    created_count = sum(1 for created in written.values() if created)
+    updated_count = len(written) - created_count
+    present_count = sum(1 for record in request.records if record.present)
+    absent_count = len(request.records) - present_count
     
-    attendance_datetime = datetime.combine(
-        request.attendance_date,
-        datetime.now().time()
+    return AttendanceTakeResponse(
+        message="Attendance saved successfully",
+        lesson_id=request.lesson_id,
+        attendance_date=request.attendance_date,
+        total_students=len(request.records),
+        created_count=created_count,
+        updated_count=updated_count,
+        present_count=present_count,
+        absent_count=absent_count
     )
-    
-    for record in request.records:
-        if record.present:
-            present_count += 1
-        else:
-            absent_count += 1
-        
-        existing_att = existing_map.get(record.student_id)
-        
-        if existing_att:
-            # Update existing record
-            existing_att.present = record.present
-            existing_att.attendance_date = attendance_datetime
-            session.add(existing_att)
-            updated_count += 1
-        else:
-            # Create new record
-            new_attendance = Attendance(
-                student_id=record.student_id,
-                lesson_id=request.lesson_id,
-                attendance_date=attendance_datetime,
-                present=record.present,
-                is_delete=False
-            )
-            session.add(new_attendance)
-            created_count += 1
+
+
+def takeAttendance(
+    request: AttendanceTakeRequest,
+    user_id: uuid.UUID,
+    role: str,
+    session: Session
+) -> AttendanceTakeResponse:
+    """
+    Take or update attendance for a lesson.
+    Supports both creating new records and updating existing ones.
+    """
+    try:
+        response = _applyAttendanceTake(request, user_id, role, session)
+    except HTTPException:
+        session.rollback()
+        raise
     
     try:
         session.commit()
@@ -1206,15 +1281,130 @@ def takeAttendance(
             detail="Database error while saving attendance records."
         )
     
-    return AttendanceTakeResponse(
-        message="Attendance saved successfully",
-        lesson_id=request.lesson_id,
-        attendance_date=request.attendance_date,
-        total_students=len(request.records),
-        created_count=created_count,
-        updated_count=updated_count,
-        present_count=present_count,
-        absent_count=absent_count
+    return response
+
+
+def _syncDuplicateResult(sync_key: AttendanceSyncKey) -> AttendanceSyncItemResult:
+    return AttendanceSyncItemResult(
+        idempotency_key=sync_key.idempotency_key,
+        status="duplicate",
+        result=AttendanceTakeResponse(
+            message="Attendance already synced",
+            lesson_id=sync_key.lesson_id,
+            attendance_date=sync_key.attendance_date,
+            total_students=sync_key.total_students,
+            created_count=sync_key.created_count,
+            updated_count=sync_key.updated_count,
+            present_count=sync_key.present_count,
+            absent_count=sync_key.absent_count
+        )
+    )
+
+
+def syncAttendanceBatch(
+    request: AttendanceSyncRequest,
+    user_id: uuid.UUID,
+    role: str,
+    session: Session
+) -> AttendanceSyncResponse:
+    """
+    Apply many lesson rosters in one transaction, each guarded by a client idempotency key.
+    Keys this user already applied return their stored result without touching attendance.
+    Each new roster runs in its own savepoint, so one invalid roster does not discard the rest.
+    """
+    keys = {item.idempotency_key for item in request.items}
+    applied_query = select(AttendanceSyncKey).where(
+        AttendanceSyncKey.user_id == user_id,
+        AttendanceSyncKey.idempotency_key.in_(keys)
+    )
+    applied = {sync_key.idempotency_key: sync_key for sync_key in session.exec(applied_query).all()}
+
+    results = []
+
+    for item in request.items:
+        sync_key = applied.get(item.idempotency_key)
+        if sync_key:
+            results.append(_syncDuplicateResult(sync_key))
+            continue
+
+        savepoint = session.begin_nested()
+
+        # Claim the key before touching attendance. A concurrent retry with the same key waits here
+        # until the first one commits, then gets no row back and replays its stored result.
+        claimed = session.exec(
+            pg_insert(AttendanceSyncKey)
+            .values(
+                user_id=user_id,
+                idempotency_key=item.idempotency_key,
+                lesson_id=item.lesson_id,
+                attendance_date=item.attendance_date,
+                total_students=0,
+                created_count=0,
+                updated_count=0,
+                present_count=0,
+                absent_count=0,
+                applied_at=datetime.now()
+            )
+            .on_conflict_do_nothing(index_elements=[AttendanceSyncKey.user_id, AttendanceSyncKey.idempotency_key])
+            .returning(AttendanceSyncKey.idempotency_key)
+        ).first()
+
+        if claimed is None:
+            savepoint.rollback()
+            sync_key = session.exec(
+                select(AttendanceSyncKey)
+                .where(
+                    AttendanceSyncKey.user_id == user_id,
+                    AttendanceSyncKey.idempotency_key == item.idempotency_key
+                )
+                .execution_options(populate_existing=True)
+            ).one()
+            applied[item.idempotency_key] = sync_key
+            results.append(_syncDuplicateResult(sync_key))
+            continue
+
+        try:
+            response = _applyAttendanceTake(item, user_id, role, session)
+        except HTTPException as e:
+            # Also releases the claimed key, so a corrected retry can apply
+            savepoint.rollback()
+            results.append(AttendanceSyncItemResult(
+                idempotency_key=item.idempotency_key,
+                status="failed",
+                error={"status_code": e.status_code, "detail": e.detail}
+            ))
+            continue
+
+        sync_key = session.get(AttendanceSyncKey, (user_id, item.idempotency_key))
+        sync_key.total_students = response.total_students
+        sync_key.created_count = response.created_count
+        sync_key.updated_count = response.updated_count
+        sync_key.present_count = response.present_count
+        sync_key.absent_count = response.absent_count
+        session.add(sync_key)
+        savepoint.commit()
+
+        applied[item.idempotency_key] = sync_key
+        results.append(AttendanceSyncItemResult(
+            idempotency_key=item.idempotency_key,
+            status="applied",
+            result=response
+        ))
+
+    try:
+        session.commit()
+    except IntegrityError:
+        session.rollback()
+        raise HTTPException(
+            status_code=500,
+            detail="Database error while syncing attendance records."
+        )
+
+    return AttendanceSyncResponse(
+        applied_count=sum(1 for result in results if result.status == "applied"),
+        duplicate_count=sum(1 for result in results if result.status == "duplicate"),
+        failed_count=sum(1 for result in results if result.status == "failed"),
+        results=results
     )
 
 
@@ -1256,7 +1446,7 @@ def checkAttendanceExists(
         )
         .where(
             Attendance.lesson_id == lesson_id,
-            func.date(Attendance.attendance_date) == target_date,
+            Attendance.attendance_day == target_date,
             Attendance.is_delete == False
         )
     )
@@ -1279,3 +1469,78 @@ def checkAttendanceExists(
         "absent_count": absent_count,
         "not_marked_count": total_students - marked_count
     }
+
+
+# ===================== Export Functions =====================
+
+EXPORT_COLUMNS = [
+    "attendance_id", "attendance_day", "marked_at", "present",
+    "student_id", "username", "student_name",
+    "class_id", "class_name", "lesson_id", "lesson_name", "subject_name"
+]
+
+
+def streamAttendanceExport(
+    start_date: date,
+    end_date: date,
+    class_id: Optional[uuid.UUID],
+    export_format: str
+) -> Iterator[str]:
+    """
+    Stream active attendance rows between two days (inclusive) as CSV or NDJSON chunks.
+    Rows are read through a server-side cursor in batches, so memory stays flat however
+    large the range is. Opens its own session because it outlives the request handler.
+    """
+    export_query = (
+        select(
+            Attendance.id, Attendance.attendance_day, Attendance.attendance_date, Attendance.present,
+            Student.id, Student.username, Student.first_name, Student.last_name,
+            Class.id, Class.name, Lesson.id, Lesson.name, Subject.name
+        )
+        .join(Student, Attendance.student_id == Student.id)
+        .join(Lesson, Attendance.lesson_id == Lesson.id)
+        .join(Class, Lesson.class_id == Class.id)
+        .outerjoin(Subject, Lesson.subject_id == Subject.id)
+        .where(
+            Attendance.attendance_day >= start_date,
+            Attendance.attendance_day <= end_date,
+            Attendance.is_delete == False
+        )
+        .order_by(Attendance.attendance_day, Class.name, Lesson.start_time, Student.first_name, Student.last_name)
+        .execution_options(yield_per=settings.ATTENDANCE_EXPORT_BATCH_SIZE)
+    )
+
+    if class_id:
+        export_query = export_query.where(Lesson.class_id == class_id)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    if export_format == "csv":
+        writer.writerow(EXPORT_COLUMNS)
+
+    with Session(engine) as session:
+        result = session.exec(export_query)
+
+        for batch in result.partitions():
+            for row in batch:
+                (attendance_id, attendance_day, marked_at, present, student_id, username,
+                 first_name, last_name, row_class_id, class_name, lesson_id, lesson_name, subject_name) = row
+                values = [
+                    str(attendance_id), attendance_day.isoformat(), marked_at.isoformat(), present,
+                    str(student_id), username, f"{first_name} {last_name}",
+                    str(row_class_id), class_name, str(lesson_id), lesson_name, subject_name
+                ]
+
+                if export_format == "csv":
+                    writer.writerow(values)
+                else:
+                    buffer.write(json.dumps(dict(zip(EXPORT_COLUMNS, values))) + "\n")
+
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+
+    # Header-only (or empty) exports still need their first chunk
+    if buffer.getvalue():
+        yield buffer.getvalue()
@@ -0,0 +1,109 @@
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, delete, insert, literal, Float, cast
+from sqlmodel import Session, select
+
+from core.config import settings
+from core.database import engine
+from models import AttendanceDailyRollup, AttendanceRisk, Student, Class
+from schemas import AtRiskStudentItem, PaginatedAtRiskStudentResponse
+
+
+def refreshAttendanceRisk(session: Session, as_of: Optional[date] = None) -> int:
+    """
+    Replace the attendance_risk table with every active student whose attendance rate over
+    the last ATTENDANCE_RISK_WINDOW_DAYS days is below ATTENDANCE_RISK_THRESHOLD.
+    All students are rated in one grouped pass over the daily rollup.
+    Returns the number of students flagged.
+    """
+    window_end = as_of or date.today()
+    window_start = window_end - timedelta(days=settings.ATTENDANCE_RISK_WINDOW_DAYS - 1)
+
+    present = func.sum(AttendanceDailyRollup.present_count)
+    absent = func.sum(AttendanceDailyRollup.absent_count)
+
+    rates_query = (
+        select(
+            AttendanceDailyRollup.student_id,
+            Student.class_id,
+            present,
+            absent,
+            cast(present, Float) * 100 / (present + absent),
+            literal(window_start),
+            literal(window_end),
+            literal(datetime.now())
+        )
+        .join(Student, AttendanceDailyRollup.student_id == Student.id)
+        .where(
+            AttendanceDailyRollup.day >= window_start,
+            AttendanceDailyRollup.day <= window_end,
+            Student.is_delete == False
+        )
+        .group_by(AttendanceDailyRollup.student_id, Student.class_id)
+        .having(present * 100 < settings.ATTENDANCE_RISK_THRESHOLD * (present + absent))
+    )
+
+    session.exec(delete(AttendanceRisk))
+    session.exec(
+        insert(AttendanceRisk).from_select(
+            ["student_id", "class_id", "present_count", "absent_count", "attendance_rate",
+             "window_start", "window_end", "computed_at"],
+            rates_query
+        )
+    )
+    session.commit()
+
+    return session.exec(select(func.count()).select_from(AttendanceRisk)).one()
+
+
+def getAtRiskStudents(session: Session, page: int) -> PaginatedAtRiskStudentResponse:
+    offset_value = (page - 1) * settings.ITEMS_PER_PAGE
+
+    total_count = session.exec(select(func.count()).select_from(AttendanceRisk)).one()
+
+    query = (
+        select(AttendanceRisk, Student, Class)
+        .join(Student, AttendanceRisk.student_id == Student.id)
+        .outerjoin(Class, AttendanceRisk.class_id == Class.id)
+        .order_by(AttendanceRisk.attendance_rate, Student.first_name, Student.last_name)
+        .offset(offset_value)
+        .limit(settings.ITEMS_PER_PAGE)
+    )
+    rows = session.exec(query).all()
+
+    data = [
+        AtRiskStudentItem(
+            student_id=risk.student_id,
+            student_name=f"{student.first_name} {student.last_name}",
+            username=student.username,
+            class_id=risk.class_id,
+            class_name=cls.name if cls else None,
+            present_count=risk.present_count,
+            absent_count=risk.absent_count,
+            attendance_rate=round(risk.attendance_rate, 2),
+            window_start=risk.window_start,
+            window_end=risk.window_end
+        )
+        for risk, student, cls in rows
+    ]
+
+    total_pages = (total_count + settings.ITEMS_PER_PAGE - 1) // settings.ITEMS_PER_PAGE
+
+    return PaginatedAtRiskStudentResponse(
+        data=data,
+        total_count=total_count,
+        page=page,
+        total_pages=total_pages,
+        has_next=page < total_pages,
+        has_prev=page > 1
+    )
+
+
+def detect_at_risk_students():
+    print("Running at-risk attendance task...")
+
+    with Session(engine) as session:
+        flagged = refreshAttendanceRisk(session)
+
+    print(f"Flagged {flagged} students below {settings.ATTENDANCE_RISK_THRESHOLD}% attendance.")
@@ -0,0 +1,125 @@
+import argparse
+import uuid
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy import func, case, delete, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlmodel import Session, select
+
+from models import Attendance, AttendanceDailyRollup, Lesson
+
+ROLLUP_COLUMNS = ["class_id", "student_id", "day", "present_count", "absent_count"]
+
+
+def _rollupSource():
+    """Active attendance aggregated to one row per (class, student, day)."""
+    return (
+        select(
+            Lesson.class_id,
+            Attendance.student_id,
+            Attendance.attendance_day,
+            func.sum(case((Attendance.present == True, 1), else_=0)),
+            func.sum(case((Attendance.present == False, 1), else_=0))
+        )
+        .join(Lesson, Attendance.lesson_id == Lesson.id)
+        .where(
+            Attendance.is_delete == False,
+            Attendance.student_id.isnot(None),
+            Lesson.class_id.isnot(None),
+            Lesson.is_delete == False
+        )
+        .group_by(Lesson.class_id, Attendance.student_id, Attendance.attendance_day)
+    )
+
+
+def _insertRollupRows(source, session: Session):
+    insert_stmt = pg_insert(AttendanceDailyRollup).from_select(ROLLUP_COLUMNS, source)
+    insert_stmt = insert_stmt.on_conflict_do_update(
+        index_elements=[AttendanceDailyRollup.class_id, AttendanceDailyRollup.student_id, AttendanceDailyRollup.day],
+        set_={
+            "present_count": insert_stmt.excluded.present_count,
+            "absent_count": insert_stmt.excluded.absent_count
+        }
+    )
+    session.exec(insert_stmt)
+
+
+def refreshAttendanceRollup(keys: Iterable[tuple[uuid.UUID, date]], session: Session) -> None:
+    """
+    Recompute the rollup rows for the given (student_id, day) keys from Attendance.
+    Runs inside the caller's transaction; the caller commits.
+    """
+    keys = {(student_id, day) for student_id, day in keys if student_id is not None}
+    if not keys:
+        return
+
+    # Make pending Attendance changes visible to the aggregate below
+    session.flush()
+
+    session.exec(
+        delete(AttendanceDailyRollup)
+        .where(tuple_(AttendanceDailyRollup.student_id, AttendanceDailyRollup.day).in_(keys))
+    )
+    _insertRollupRows(
+        _rollupSource().where(tuple_(Attendance.student_id, Attendance.attendance_day).in_(keys)),
+        session
+    )
+
+
+def attendanceKeysOfLessons(lesson_ids: Iterable[uuid.UUID], session: Session) -> list[tuple[uuid.UUID, date]]:
+    """(student_id, day) keys of the active attendance of the given lessons, for refreshAttendanceRollup."""
+    lesson_ids = list(lesson_ids)
+    if not lesson_ids:
+        return []
+
+    return session.exec(
+        select(Attendance.student_id, Attendance.attendance_day)
+        .where(Attendance.lesson_id.in_(lesson_ids), Attendance.is_delete == False)
+        .distinct()
+    ).all()
+
+
+def clearClassAttendanceRollup(class_id: uuid.UUID, session: Session) -> None:
+    """Drop the rollup rows of a class whose lessons are being soft-deleted."""
+    session.exec(delete(AttendanceDailyRollup).where(AttendanceDailyRollup.class_id == class_id))
+
+
+def rebuildAttendanceRollup(session: Session, start_day: Optional[date] = None,
+                            end_day: Optional[date] = None) -> int:
+    """
+    Rebuild the rollup from Attendance for an inclusive day range (all days when omitted).
+    Returns the number of rollup rows in the rebuilt range.
+    """
+    clear_query = delete(AttendanceDailyRollup)
+    source = _rollupSource()
+    count_query = select(func.count()).select_from(AttendanceDailyRollup)
+
+    if start_day:
+        clear_query = clear_query.where(AttendanceDailyRollup.day >= start_day)
+        source = source.where(Attendance.attendance_day >= start_day)
+        count_query = count_query.where(AttendanceDailyRollup.day >= start_day)
+    if end_day:
+        clear_query = clear_query.where(AttendanceDailyRollup.day <= end_day)
+        source = source.where(Attendance.attendance_day <= end_day)
+        count_query = count_query.where(AttendanceDailyRollup.day <= end_day)
+
+    session.exec(clear_query)
+    _insertRollupRows(source, session)
+    session.commit()
+
+    return session.exec(count_query).one()
+
+
+if __name__ == "__main__":
+    from core.database import engine
+
+    parser = argparse.ArgumentParser(description="Rebuild the attendance_daily_rollup table from attendance.")
+    parser.add_argument("--start", type=date.fromisoformat, default=None, help="First day to rebuild (YYYY-MM-DD)")
+    parser.add_argument("--end", type=date.fromisoformat, default=None, help="Last day to rebuild (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        rebuilt = rebuildAttendanceRollup(session, args.start, args.end)
+
+    print(f"Rebuilt {rebuilt} attendance rollup rows.")
@@ -8,6 +8,7 @@ from sqlmodel import Session, select
 
 from core.config import settings
 from models import Class, Teacher, Grade, Lesson, Student, Event
+from repository.attendance_rollup import clearClassAttendanceRollup
 from schemas import ClassSave, ClassUpdateBase, PaginatedClassResponse
 
 
@@ -321,6 +322,8 @@ def ClassSoftDeleteWithLessonsStudentsEventsAnnoucements(id: uuid.UUID, session:
     for lesson in lessons:
         lesson.is_delete = True
 
+    clearClassAttendanceRollup(current_class.id, session)
+
     events = current_class.events
 
     for event in events:
@@ -7,10 +7,12 @@ from psycopg import IntegrityError
 from sqlalchemy import Select, func
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select, or_, and_
+from sqlmodel.ext.asyncio.session import AsyncSession
 from starlette import status
 
 from core.config import settings
 from models import Lesson, Teacher, Class, Student, Subject, Exam, Assignment, Attendance, Parent
+from repository.attendance_rollup import refreshAttendanceRollup, attendanceKeysOfLessons
 from schemas import LessonSave, LessonUpdate, PaginatedLessonResponse
 
 
@@ -32,7 +34,7 @@ def addSearchOption(query: Select, search: str):
     return query
 
 
-def getAllLessonIsDeleteFalse(session: Session, search: str, page: int):
+async def getAllLessonIsDeleteFalse(session: AsyncSession, search: str, page: int):
     offset_value = (page - 1) * settings.ITEMS_PER_PAGE
 
     count_query = (
@@ -43,7 +45,7 @@ def getAllLessonIsDeleteFalse(session: Session, search: str, page: int):
     )
 
     count_query = addSearchOption(count_query, search)
-    total_count = session.exec(count_query).one()
+    total_count = (await session.exec(count_query)).one()
 
     query = (
         select(Lesson)
@@ -59,7 +61,7 @@ def getAllLessonIsDeleteFalse(session: Session, search: str, page: int):
 
     query = addSearchOption(query, search)
     query = query.offset(offset_value).limit(settings.ITEMS_PER_PAGE)
-    all_lessons = session.exec(query).unique().all()
+    all_lessons = (await session.exec(query)).unique().all()
 
     total_pages = (total_count + settings.ITEMS_PER_PAGE - 1) // settings.ITEMS_PER_PAGE
 
@@ -73,7 +75,7 @@ def getAllLessonIsDeleteFalse(session: Session, search: str, page: int):
     )
 
 
-def getAllLessonOfCurrentWeekIsDeleteFalse(session: Session):
+async def getAllLessonOfCurrentWeekIsDeleteFalse(session: AsyncSession):
     query = (
         select(Lesson)
         .options(
@@ -85,7 +87,7 @@ def getAllLessonOfCurrentWeekIsDeleteFalse(session: Session):
         .order_by(Lesson.day, Lesson.start_time)
     )
 
-    all_lessons = session.exec(query).all()
+    all_lessons = (await session.exec(query)).all()
     return all_lessons
 
 
@@ -107,8 +109,8 @@ def getLessonById(lessonId: uuid.UUID, session: Session):
     return lesson_detail
 
 
-def getAllLessonOfTeacherIsDeleteFalse(teacherId: uuid.UUID, session: Session, search: str, page: int,
-                                       withPagination: bool = True):
+async def getAllLessonOfTeacherIsDeleteFalse(teacherId: uuid.UUID, session: AsyncSession, search: str, page: int,
+                                             withPagination: bool = True):
     offset_value = (page - 1) * settings.ITEMS_PER_PAGE
 
     if (not withPagination):
@@ -125,7 +127,7 @@ def getAllLessonOfTeacherIsDeleteFalse(teacherId: uuid.UUID, session: Session, s
             )
         )
 
-        all_lessons = session.exec(query).unique().all()
+        all_lessons = (await session.exec(query)).unique().all()
 
         return all_lessons
 
@@ -141,7 +143,7 @@ def getAllLessonOfTeacherIsDeleteFalse(teacherId: uuid.UUID, session: Session, s
         )
 
         count_query = addSearchOption(count_query, search)
-        total_count = session.exec(count_query).one()
+        total_count = (await session.exec(count_query)).one()
 
         query = (
             select(Lesson)
@@ -160,7 +162,7 @@ def getAllLessonOfTeacherIsDeleteFalse(teacherId: uuid.UUID, session: Session, s
 
         query = addSearchOption(query, search)
         query = query.offset(offset_value).limit(settings.ITEMS_PER_PAGE)
-        all_lessons = session.exec(query).unique().all()
+        all_lessons = (await session.exec(query)).unique().all()
         total_pages = (total_count + settings.ITEMS_PER_PAGE - 1) // settings.ITEMS_PER_PAGE
 
         return PaginatedLessonResponse(
@@ -173,7 +175,7 @@ def getAllLessonOfTeacherIsDeleteFalse(teacherId: uuid.UUID, session: Session, s
         )
 
 
-def getAllLessonOfTeacherOfCurrentWeekIsDeleteFalse(teacherId: uuid.UUID, session: Session):
+async def getAllLessonOfTeacherOfCurrentWeekIsDeleteFalse(teacherId: uuid.UUID, session: AsyncSession):
     query = (
         select(Lesson)
         .options(
@@ -188,22 +190,22 @@ def getAllLessonOfTeacherOfCurrentWeekIsDeleteFalse(teacherId: uuid.UUID, sessio
         .order_by(Lesson.day, Lesson.start_time)
     )
 
-    all_lessons = session.exec(query).all()
+    all_lessons = (await session.exec(query)).all()
     return all_lessons
 
 
-def countAllLessonOfTeacher(teacherId: uuid.UUID, session: Session):
+async def countAllLessonOfTeacher(teacherId: uuid.UUID, session: AsyncSession):
     query = (
         select(func.count())
         .select_from(Lesson)
         .where(Lesson.teacher_id == teacherId, Lesson.is_delete == False)
     )
 
-    total_lessons = session.exec(query).one()
+    total_lessons = (await session.exec(query)).one()
     return total_lessons
 
 
-def countAllLessonOfStudent(studentId: uuid.UUID, session: Session):
+async def countAllLessonOfStudent(studentId: uuid.UUID, session: AsyncSession):
     query = (
         select(func.count())
         .select_from(Lesson)
@@ -212,11 +214,11 @@ def countAllLessonOfStudent(studentId: uuid.UUID, session: Session):
         .where(Student.id == studentId, Lesson.is_delete == False)
     )
 
-    total_lessons = session.exec(query).one()
+    total_lessons = (await session.exec(query)).one()
     return total_lessons
 
 
-def getAllLessonOfClassIsDeleteFalse(classId: uuid.UUID, session: Session, search: str, page: int):
+async def getAllLessonOfClassIsDeleteFalse(classId: uuid.UUID, session: AsyncSession, search: str, page: int):
     offset_value = (page - 1) * settings.ITEMS_PER_PAGE
 
     count_query = (
@@ -230,7 +232,7 @@ def getAllLessonOfClassIsDeleteFalse(classId: uuid.UUID, session: Session, searc
     )
 
     count_query = addSearchOption(count_query, search)
-    total_count = session.exec(count_query).one()
+    total_count = (await session.exec(count_query)).one()
 
     query = (
         select(Lesson)
@@ -250,7 +252,7 @@ def getAllLessonOfClassIsDeleteFalse(classId: uuid.UUID, session: Session, searc
     query = addSearchOption(query, search)
 
     query = query.offset(offset_value).limit(settings.ITEMS_PER_PAGE)
-    all_lessons = session.exec(query).unique().all()
+    all_lessons = (await session.exec(query)).unique().all()
     total_pages = (total_count + settings.ITEMS_PER_PAGE - 1) // settings.ITEMS_PER_PAGE
 
     return PaginatedLessonResponse(
@@ -263,7 +265,7 @@ def getAllLessonOfClassIsDeleteFalse(classId: uuid.UUID, session: Session, searc
     )
 
 
-def getAllLessonOfClassOfCurrentWeekIsDeleteFalse(classId: uuid.UUID, session: Session):
+async def getAllLessonOfClassOfCurrentWeekIsDeleteFalse(classId: uuid.UUID, session: AsyncSession):
     query = (
         select(Lesson)
         .options(
@@ -278,11 +280,11 @@ def getAllLessonOfClassOfCurrentWeekIsDeleteFalse(classId: uuid.UUID, session: S
         .order_by(Lesson.day, Lesson.start_time)
     )
 
-    all_lessons = session.exec(query).all()
+    all_lessons = (await session.exec(query)).all()
     return all_lessons
 
 
-def getAllLessonOfStudentOfCurrentWeekIsDeleteFalse(studentId: uuid.UUID, user, role: str, session: Session):
+async def getAllLessonOfStudentOfCurrentWeekIsDeleteFalse(studentId: uuid.UUID, user, role: str, session: AsyncSession):
     query = (
         select(Lesson)
         .join(Class, Lesson.class_id == Class.id)
@@ -314,7 +316,7 @@ def getAllLessonOfStudentOfCurrentWeekIsDeleteFalse(studentId: uuid.UUID, user,
 
     query = query.order_by(Lesson.day, Lesson.start_time)
 
-    lessons = session.exec(query).all()
+    lessons = (await session.exec(query)).all()
 
     if not lessons:
         # Check if student exists and belongs to parent
@@ -331,7 +333,7 @@ def getAllLessonOfStudentOfCurrentWeekIsDeleteFalse(studentId: uuid.UUID, user,
                 Student.parent_id == user.id,
             )
 
-        student_check = session.exec(student_query).first()
+        student_check = (await session.exec(student_query)).first()
 
         if not student_check:
             raise HTTPException(
@@ -345,7 +347,7 @@ def getAllLessonOfStudentOfCurrentWeekIsDeleteFalse(studentId: uuid.UUID, user,
     return lessons
 
 
-def getAllLessonOfParentIsDeleteFalse(parentId: uuid.UUID, session: Session, search: str, page: int):
+async def getAllLessonOfParentIsDeleteFalse(parentId: uuid.UUID, session: AsyncSession, search: str, page: int):
     offset_value = (page - 1) * settings.ITEMS_PER_PAGE
 
     count_query = (
@@ -360,7 +362,7 @@ def getAllLessonOfParentIsDeleteFalse(parentId: uuid.UUID, session: Session, sea
     )
 
     count_query = addSearchOption(count_query, search)
-    total_count = session.exec(count_query).one()
+    total_count = (await session.exec(count_query)).one()
 
     query = (
         select(Lesson)
@@ -381,7 +383,7 @@ def getAllLessonOfParentIsDeleteFalse(parentId: uuid.UUID, session: Session, sea
     query = addSearchOption(query, search)
 
     query = query.offset(offset_value).limit(settings.ITEMS_PER_PAGE)
-    all_lessons = session.exec(query).unique().all()
+    all_lessons = (await session.exec(query)).unique().all()
     total_pages = (total_count + settings.ITEMS_PER_PAGE - 1) // settings.ITEMS_PER_PAGE
 
     return PaginatedLessonResponse(
@@ -394,13 +396,18 @@ def getAllLessonOfParentIsDeleteFalse(parentId: uuid.UUID, session: Session, sea
     )
 
 
-def getAllLessonList(session: Session):
+async def getAllLessonList(session: AsyncSession):
     query = (
         select(Lesson)
         .where(Lesson.is_delete == False)
+        .options(
+            selectinload(Lesson.teacher),
+            selectinload(Lesson.related_class),
+            selectinload(Lesson.subject)
+        )
     )
 
-    return session.exec(query).all()
+    return (await session.exec(query)).all()
 
 
 def lessonSave(lesson: LessonSave, session: Session):
@@ -611,6 +618,7 @@ def lessonUpdate(lesson: LessonUpdate, session: Session):
 
         currentLesson.subject_id = subject.id
 
+    class_changed = False
     if lesson.class_id != currentLesson.class_id:
         class_query = (
             select(Class)
@@ -625,6 +633,7 @@ def lessonUpdate(lesson: LessonUpdate, session: Session):
             )
 
         currentLesson.class_id = related_class.id
+        class_changed = True
 
     if lesson.teacher_id != currentLesson.teacher_id:
         teacher_query = (
@@ -734,6 +743,10 @@ def lessonUpdate(lesson: LessonUpdate, session: Session):
 
     session.add(currentLesson)
 
+    if class_changed:
+        # The rollup is grouped by the lesson's class, so its past attendance moves with it
+        refreshAttendanceRollup(attendanceKeysOfLessons([currentLesson.id], session), session)
+
     try:
         session.commit()
     except IntegrityError as e:
@@ -819,6 +832,7 @@ def lessonSoftDelete(id: uuid.UUID, session: Session):
 
     currentLesson.is_delete = True
     session.add(currentLesson)
+    refreshAttendanceRollup(((att.student_id, att.attendance_day) for att in relatedAttendance), session)
 
     try:
         session.commit()
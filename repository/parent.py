@@ -7,6 +7,7 @@ from sqlalchemy import Select, func
 from sqlmodel import Session, select, or_
 
 from core.config import settings
+from core.principal_cache import invalidate_principal
 from core.security import get_password_hash
 from models import Parent, Student
 from schemas import ParentSave, ParentUpdate, PaginatedParentResponse, updatePasswordModel
@@ -283,6 +284,8 @@ def parentUpdate(parent: ParentUpdate, session: Session):
         session.rollback()
         raise HTTPException(status_code=400, detail="Unique constraint violated (username/email/phone).")
 
+    invalidate_principal("parent", parent.id)
+
     session.refresh(current_parent)
 
     return {
@@ -319,6 +322,8 @@ def updateParentPassword(data: updatePasswordModel, session: Session):
             detail="Database error while updating password."
         )
 
+    invalidate_principal("parent", data.id)
+
     return "Password updated successfully"
 
 
@@ -359,6 +364,8 @@ def parentSoftDelete(id: uuid.UUID, session: Session):
         session.rollback()
         raise HTTPException(status_code=500, detail="Error deleting parent and related records.")
 
+    invalidate_principal("parent", id)
+
     session.refresh(current_parent)
 
     return {
@@ -7,9 +7,11 @@ from sqlmodel import Session, select, or_
 from sqlalchemy import func, Select
 
 from core.FileStorage import process_and_save_image, cleanup_image
+from core.principal_cache import invalidate_principal
 from core.config import settings
-from core.security import get_password_hash
+from core.security import get_password_hash, get_password_hash_async
 from models import Student, Teacher, Lesson, Class, Parent, Grade, Result, Attendance, UserSex
+from repository.attendance_rollup import refreshAttendanceRollup
 from schemas import StudentSave, StudentUpdateBase, PaginatedStudentResponse, updatePasswordModel
 
 
@@ -301,7 +303,7 @@ async def studentSaveWithImage(student_data: dict, img: Optional[UploadFile], se
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Error processing image: {str(e)}")
 
-    hashed_password = get_password_hash(student_data["password"].strip())
+    hashed_password = await get_password_hash_async(student_data["password"].strip())
 
     new_student = Student(
         username=username,
@@ -373,6 +375,8 @@ def updateStudentPassword(data: updatePasswordModel, session: Session):
             detail="Database error while updating password."
         )
 
+    invalidate_principal("student", data.id)
+
     return "Password updated successfully"
 
 
@@ -515,6 +519,8 @@ async def StudentUpdate(student_data: dict, img: Optional[UploadFile], session:
             detail="Database integrity error: Username, email, or phone already exists."
         )
 
+    invalidate_principal("student", student_data["id"])
+
     session.refresh(currentStudent)
 
     return {
@@ -567,6 +573,7 @@ def studentSoftDelete(id: uuid.UUID, session: Session):
     # Soft delete the student
     currentStudent.is_delete = True
     session.add(currentStudent)
+    refreshAttendanceRollup(((id, attendance.attendance_day) for attendance in attendances), session)
 
     try:
         session.commit()
@@ -574,6 +581,8 @@ def studentSoftDelete(id: uuid.UUID, session: Session):
         session.rollback()
         raise HTTPException(status_code=500, detail="Error deleting student and related records.")
 
+    invalidate_principal("student", id)
+
     # Refresh to get latest relationships (optional)
     session.refresh(currentStudent)
 
@@ -9,9 +9,11 @@ from sqlmodel import Session, select
 import os
 
 from core.FileStorage import process_and_save_image, cleanup_image
+from core.principal_cache import invalidate_principal
 from core.config import settings
-from core.security import get_password_hash
+from core.security import get_password_hash, get_password_hash_async
 from models import Teacher, Lesson, Subject, Class
+from repository.attendance_rollup import refreshAttendanceRollup, attendanceKeysOfLessons
 from schemas import PaginatedTeacherResponse, updatePasswordModel
 
 
@@ -195,7 +197,7 @@ async def teacherSaveWithImage(teacher_data: dict, img: Optional[UploadFile], se
         except Exception as e:
             raise HTTPException(status_code=400, detail=f"Error processing image: {str(e)}")
 
-    hashed_password = get_password_hash(teacher_data["password"].strip())
+    hashed_password = await get_password_hash_async(teacher_data["password"].strip())
 
     new_teacher = Teacher(
         username=username,
@@ -267,6 +269,8 @@ def updateTeacherPassword(data: updatePasswordModel, session: Session):
             detail="Database error while updating password."
         )
 
+    invalidate_principal("teacher", data.id)
+
     return "Password updated successfully"
 
 
@@ -373,6 +377,8 @@ async def TeacherUpdate(teacher_data: dict, img: Optional[UploadFile], session:
             cleanup_image(new_image_path)
         raise HTTPException(status_code=400, detail="Unique constraint violated (username/email/phone).")
 
+    invalidate_principal("teacher", teacher_data["id"])
+
     session.refresh(currentTeacher)
 
     return {
@@ -417,6 +423,8 @@ def teacherSoftDeleteWithLessonAndClassAndSubject(id: uuid.UUID, session: Sessio
         .where(Lesson.teacher_id == id, Lesson.is_delete == False)
     )
     lessons: List[Lesson] = session.exec(lesson_query).all()
+    # Collected before the lessons are deleted: their attendance drops out of the rollup
+    rollup_keys = attendanceKeysOfLessons([lesson.id for lesson in lessons], session)
     lesson_count = 0
     for lesson in lessons:
         lesson.is_delete = True
@@ -425,6 +433,7 @@ def teacherSoftDeleteWithLessonAndClassAndSubject(id: uuid.UUID, session: Sessio
 
     currentTeacher.is_delete = True
     session.add(currentTeacher)
+    refreshAttendanceRollup(rollup_keys, session)
 
     try:
         session.commit()
@@ -432,6 +441,9 @@ def teacherSoftDeleteWithLessonAndClassAndSubject(id: uuid.UUID, session: Sessio
         session.rollback()
         raise HTTPException(status_code=500, detail="Error deleting teacher and related records.")
         # refresh to get latest relationships (optional)
+
+    invalidate_principal("teacher", id)
+
     session.refresh(currentTeacher)
 
     return {
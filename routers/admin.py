@@ -6,7 +6,10 @@ from fastapi.params import Form
 from pyexpat.errors import messages
 
 from deps import AdminUser
-from core.database import SessionDep
+from core.database import SessionDep, engine, async_engine
+from core.db_metrics import pool_metrics_snapshot
+from core.request_metrics import request_metrics_snapshot
+from core.principal_cache import principal_cache_stats
 from repository.admin import countAdmin, updateAdminPassword
 from repository.parent import countParent
 from repository.student import countStudent
@@ -38,6 +41,24 @@ def usersCount(current_user: AdminUser, session: SessionDep):
     )
 
 
+@router.get("/principalCacheStats", response_model=dict)
+def principalCacheStats(current_user: AdminUser):
+    return principal_cache_stats()
+
+
+@router.get("/dbPoolStats", response_model=dict)
+def dbPoolStats(current_user: AdminUser):
+    return {
+        "sync": pool_metrics_snapshot(engine),
+        "async": pool_metrics_snapshot(async_engine.sync_engine),
+    }
+
+
+@router.get("/requestQueryStats", response_model=dict)
+def requestQueryStats(current_user: AdminUser):
+    return request_metrics_snapshot()
+
+
 @router.put("/updatePassword/{admin_id}", response_model=str)
 def updatePassword(
         current_user: AdminUser,
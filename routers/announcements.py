@@ -1,9 +1,10 @@
 import uuid
 from datetime import date
 from typing import List, Union, Optional
-from core.database import SessionDep
+from core.database import SessionDep, AsyncSessionDep
 from fastapi import APIRouter, HTTPException, Form, UploadFile, File
 from deps import CurrentUser, AllUser, AdminUser, TeacherOrAdminUser
+from deps import AsyncAllUser, AsyncTeacherOrAdminUser
 from models import Announcement
 from repository.announcements import getAllAnnouncementsIsDeleteFalse, getAllAnnouncementsByTeacherAndIsDeleteFalse, \
     getAllAnnouncementsByStudentAndIsDeleteFalse, getAllAnnouncementsByParentAndIsDeleteFalse, announcementSave, \
@@ -16,28 +17,28 @@ router = APIRouter(
 
 
 @router.get("/getAll", response_model=PaginatedAnnouncementResponse)
-def getAllAnnouncements(current_user: AllUser, session: SessionDep, search: str = None, page: int = 1):
+async def getAllAnnouncements(current_user: AsyncAllUser, session: AsyncSessionDep, search: str = None, page: int = 1):
     user, role = current_user
     if role == "admin":
-        announcements = getAllAnnouncementsIsDeleteFalse(session, search, page)
+        announcements = await getAllAnnouncementsIsDeleteFalse(session, search, page)
     elif role == "teacher":
-        announcements = getAllAnnouncementsByTeacherAndIsDeleteFalse(user.id, session, search, page)
+        announcements = await getAllAnnouncementsByTeacherAndIsDeleteFalse(user.id, session, search, page)
     elif role == "student":
-        announcements = getAllAnnouncementsByStudentAndIsDeleteFalse(user.id, session, search, page)
+        announcements = await getAllAnnouncementsByStudentAndIsDeleteFalse(user.id, session, search, page)
     else:
-        announcements = getAllAnnouncementsByParentAndIsDeleteFalse(user.id, session, search, page)
+        announcements = await getAllAnnouncementsByParentAndIsDeleteFalse(user.id, session, search, page)
     return announcements
 
 
 @router.get("/teacher/{teacherId}", response_model=PaginatedAnnouncementResponse)
-def getTeacherAnnouncements(current_user: TeacherOrAdminUser, teacherId: uuid.UUID, session: SessionDep, page: int = 1):
-    announcements = getAllAnnouncementsByTeacherAndIsDeleteFalse(teacherId, session, None, page)
+async def getTeacherAnnouncements(current_user: AsyncTeacherOrAdminUser, teacherId: uuid.UUID, session: AsyncSessionDep, page: int = 1):
+    announcements = await getAllAnnouncementsByTeacherAndIsDeleteFalse(teacherId, session, None, page)
     return announcements
 
 
 @router.get("/student/{studentId}", response_model=PaginatedAnnouncementResponse)
-def getStudentAnnouncements(current_user: TeacherOrAdminUser, studentId: uuid.UUID, session: SessionDep, page: int = 1):
-    announcements = getAllAnnouncementsByStudentAndIsDeleteFalse(studentId, session, None, page)
+async def getStudentAnnouncements(current_user: AsyncTeacherOrAdminUser, studentId: uuid.UUID, session: AsyncSessionDep, page: int = 1):
+    announcements = await getAllAnnouncementsByStudentAndIsDeleteFalse(studentId, session, None, page)
     return announcements
 
 
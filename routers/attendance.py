@@ -1,25 +1,32 @@
 import uuid
 from datetime import date, timedelta, datetime, time
-from typing import List, Optional
+from typing import List, Optional, Literal
 
 from fastapi import APIRouter, Query
 from fastapi import HTTPException
-from deps import AdminUser, StudentOrTeacherOrAdminUser, TeacherOrAdminUser, StudentOrParentUser, StudentOrParentOrAdminUser, ParentUser
-from core.database import SessionDep
+from starlette.responses import StreamingResponse
+from deps import AdminUser, StudentOrTeacherOrAdminUser, TeacherOrAdminUser, StudentOrParentUser
+from deps import AsyncAdminUser, AsyncStudentOrTeacherOrAdminUser, AsyncTeacherOrAdminUser, AsyncStudentOrParentOrAdminUser, \
+    AsyncParentUser
+from core.database import SessionDep, AsyncSessionDep
 from repository.attendance import (
     attendanceOfWeek, attendanceOfStudentOfCurrentYear, attendanceBulkSave,
     attendanceSave, attendanceUpdate, attendanceSoftDelete, getAttendanceByLesson,
     getDashboardSummary, getClasswiseSummary, getClassAttendanceDetail,
     getStudentMonthlyAttendance, getCalendarHeatmap, getTeacherClasses,
     getParentChildrenAttendance, getLessonRoster, getLessonsForDate,
-    takeAttendance, checkAttendanceExists
+    takeAttendance, checkAttendanceExists, streamAttendanceExport, getStudentAttendanceBitset,
+    syncAttendanceBatch
 )
+from repository.attendance_risk import getAtRiskStudents
+from repository.attendance_rollup import rebuildAttendanceRollup
 from schemas import (
     AttendanceBase, AttendanceBulkSaveResponse, AttendanceBulkSave, AttendanceSaveResponse,
     AttendanceSave, AttendanceUpdate, AttendanceListResponse, AttendanceDashboardSummary,
     ClasswiseAttendanceResponse, ClassAttendanceDetailResponse, StudentMonthlyAttendance,
     CalendarHeatmapResponse, TeacherClassSummary, LessonRosterResponse, LessonsForDateResponse,
-    AttendanceTakeRequest, AttendanceTakeResponse
+    AttendanceTakeRequest, AttendanceTakeResponse, StudentAttendanceBitset, PaginatedAtRiskStudentResponse,
+    AttendanceSyncRequest, AttendanceSyncResponse
 )
 
 router = APIRouter(
@@ -30,9 +37,9 @@ router = APIRouter(
 # ===================== Admin Dashboard Endpoints =====================
 
 @router.get("/dashboard/summary", response_model=AttendanceDashboardSummary)
-def getAttendanceDashboardSummary(
-    current_user: AdminUser,
-    session: SessionDep,
+async def getAttendanceDashboardSummary(
+    current_user: AsyncAdminUser,
+    session: AsyncSessionDep,
     target_date: Optional[date] = Query(None, description="Date for summary (defaults to today)")
 ):
     """
@@ -41,13 +48,13 @@ def getAttendanceDashboardSummary(
     """
     if target_date is None:
         target_date = date.today()
-    return getDashboardSummary(target_date, session)
+    return await getDashboardSummary(target_date, session)
 
 
 @router.get("/dashboard/classes", response_model=ClasswiseAttendanceResponse)
-def getClasswiseAttendanceSummary(
-    current_user: AdminUser,
-    session: SessionDep,
+async def getClasswiseAttendanceSummary(
+    current_user: AsyncAdminUser,
+    session: AsyncSessionDep,
     target_date: Optional[date] = Query(None, description="Date for summary (defaults to today)")
 ):
     """
@@ -56,7 +63,7 @@ def getClasswiseAttendanceSummary(
     """
     if target_date is None:
         target_date = date.today()
-    return getClasswiseSummary(target_date, session)
+    return await getClasswiseSummary(target_date, session)
 
 
 @router.get("/class/{class_id}", response_model=ClassAttendanceDetailResponse)
@@ -77,12 +84,65 @@ def getClassAttendance(
     return getClassAttendanceDetail(class_id, target_date, session)
 
 
+@router.post("/dashboard/rollup/rebuild", response_model=dict)
+def rebuildAttendanceDailyRollup(
+    current_user: AdminUser,
+    session: SessionDep,
+    start_date: Optional[date] = Query(None, description="First day to rebuild (defaults to all history)"),
+    end_date: Optional[date] = Query(None, description="Last day to rebuild (defaults to all history)")
+):
+    """
+    Admin: Rebuild the daily attendance rollup that backs the dashboard, class-wise and heatmap views.
+    Use after backfills or direct data fixes in the attendance table.
+    """
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    rebuilt = rebuildAttendanceRollup(session, start_date, end_date)
+    return {"message": "Attendance rollup rebuilt successfully", "rows": rebuilt}
+
+
+@router.get("/dashboard/at-risk", response_model=PaginatedAtRiskStudentResponse)
+def getAtRiskStudentList(current_user: AdminUser, session: SessionDep, page: int = 1):
+    """
+    Admin Dashboard: Students whose rolling attendance rate is below the configured threshold.
+    Computed nightly by the scheduler, lowest attendance first.
+    """
+    return getAtRiskStudents(session, page)
+
+
+@router.get("/export")
+def exportAttendance(
+    current_user: AdminUser,
+    start_date: date = Query(..., description="First day of the export (inclusive)"),
+    end_date: date = Query(..., description="Last day of the export (inclusive)"),
+    class_id: Optional[uuid.UUID] = Query(None, description="Only export this class"),
+    format: Literal["csv", "ndjson"] = Query("csv", description="csv or ndjson")
+):
+    """
+    Admin: Export attendance for a date range as CSV or NDJSON.
+    Rows are streamed from the database in batches, so large ranges (a full term) do not
+    have to fit in memory.
+    """
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date must be on or before end_date")
+
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    filename = f"attendance_{start_date.isoformat()}_{end_date.isoformat()}.{format}"
+
+    return StreamingResponse(
+        streamAttendanceExport(start_date, end_date, class_id, format),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 # ===================== Teacher View Endpoints =====================
 
 @router.get("/teacher/classes", response_model=List[TeacherClassSummary])
-def getTeacherClassesSummary(
-    current_user: TeacherOrAdminUser,
-    session: SessionDep,
+async def getTeacherClassesSummary(
+    current_user: AsyncTeacherOrAdminUser,
+    session: AsyncSessionDep,
     target_date: Optional[date] = Query(None, description="Date for attendance status (defaults to today)")
 ):
     """
@@ -96,7 +156,7 @@ def getTeacherClassesSummary(
     # For admin, this would need a teacher_id parameter
     # For teacher, use their own ID
     if role == "teacher":
-        return getTeacherClasses(user.id, target_date, session)
+        return await getTeacherClasses(user.id, target_date, session)
     else:
         # Admin can optionally pass a teacher_id as query param in future
         # For now, return empty list for admin (they use dashboard instead)
@@ -187,13 +247,31 @@ def submitAttendance(
     return takeAttendance(request, user.id, role, session)
 
 
+@router.post("/take/sync", response_model=AttendanceSyncResponse)
+def syncAttendance(
+    request: AttendanceSyncRequest,
+    current_user: TeacherOrAdminUser,
+    session: SessionDep
+):
+    """
+    Offline sync: submit several lesson rosters in one request.
+
+    Each item is an /attendance/take body plus a client-generated idempotency_key.
+    - Keys already applied by this user are returned as "duplicate" with the original result
+    - New rosters go through the same validation as /attendance/take and are saved in one transaction
+    - An invalid roster is reported as "failed" without discarding the others
+    """
+    user, role = current_user
+    return syncAttendanceBatch(request, user.id, role, session)
+
+
 # ===================== Student/Parent View Endpoints =====================
 
 @router.get("/student/{student_id}/monthly", response_model=StudentMonthlyAttendance)
-def getStudentMonthlyAttendanceRecords(
+async def getStudentMonthlyAttendanceRecords(
     student_id: uuid.UUID,
-    current_user: StudentOrParentOrAdminUser,
-    session: SessionDep,
+    current_user: AsyncStudentOrParentOrAdminUser,
+    session: AsyncSessionDep,
     year: Optional[int] = Query(None, description="Year (defaults to current year)"),
     month: Optional[int] = Query(None, ge=1, le=12, description="Month 1-12 (defaults to current month)")
 ):
@@ -212,7 +290,7 @@ def getStudentMonthlyAttendanceRecords(
         from sqlmodel import select
         from models import Student
         # Verify this student belongs to the parent
-        student = session.exec(select(Student).where(Student.id == student_id, Student.is_delete == False)).first()
+        student = (await session.exec(select(Student).where(Student.id == student_id, Student.is_delete == False))).first()
         if not student or student.parent_id != user.id:
             raise HTTPException(status_code=403, detail="You can only view attendance of your children")
     
@@ -221,14 +299,14 @@ def getStudentMonthlyAttendanceRecords(
     if month is None:
         month = date.today().month
     
-    return getStudentMonthlyAttendance(student_id, year, month, session)
+    return await getStudentMonthlyAttendance(student_id, year, month, session)
 
 
 @router.get("/student/{student_id}/calendar", response_model=CalendarHeatmapResponse)
-def getStudentCalendarHeatmap(
+async def getStudentCalendarHeatmap(
     student_id: uuid.UUID,
-    current_user: StudentOrParentOrAdminUser,
-    session: SessionDep,
+    current_user: AsyncStudentOrParentOrAdminUser,
+    session: AsyncSessionDep,
     year: Optional[int] = Query(None, description="Year (defaults to current year)"),
     month: Optional[int] = Query(None, ge=1, le=12, description="Month 1-12 (defaults to current month)")
 ):
@@ -246,7 +324,7 @@ def getStudentCalendarHeatmap(
         from sqlmodel import select
         from models import Student
         # Verify this student belongs to the parent
-        student = session.exec(select(Student).where(Student.id == student_id, Student.is_delete == False)).first()
+        student = (await session.exec(select(Student).where(Student.id == student_id, Student.is_delete == False))).first()
         if not student or student.parent_id != user.id:
             raise HTTPException(status_code=403, detail="You can only view attendance of your children")
     
@@ -255,13 +333,13 @@ def getStudentCalendarHeatmap(
     if month is None:
         month = date.today().month
     
-    return getCalendarHeatmap(student_id, year, month, session)
+    return await getCalendarHeatmap(student_id, year, month, session)
 
 
 @router.get("/parent/children", response_model=List[StudentMonthlyAttendance])
-def getParentChildrenAttendanceSummary(
-    current_user: ParentUser,
-    session: SessionDep,
+async def getParentChildrenAttendanceSummary(
+    current_user: AsyncParentUser,
+    session: AsyncSessionDep,
     year: Optional[int] = Query(None, description="Year (defaults to current year)"),
     month: Optional[int] = Query(None, ge=1, le=12, description="Month 1-12 (defaults to current month)")
 ):
@@ -276,7 +354,7 @@ def getParentChildrenAttendanceSummary(
     if month is None:
         month = date.today().month
     
-    return getParentChildrenAttendance(user.id, year, month, session)
+    return await getParentChildrenAttendance(user.id, year, month, session)
 
 
 # ===================== Existing Endpoints (kept for backward compatibility) =====================
@@ -307,6 +385,27 @@ def getAttendanceOfStudent(current_user: StudentOrTeacherOrAdminUser, studentId:
     return result
 
 
+@router.get("/student/{student_id}/year-bitset", response_model=StudentAttendanceBitset)
+async def getStudentYearAttendanceBitset(student_id: uuid.UUID, current_user: AsyncStudentOrTeacherOrAdminUser,
+                                         session: AsyncSessionDep):
+    """
+    Compact alternative to /getAttendanceOfStudent: the current school year (from June 1st)
+    as a base64 bit array of present/absent per marked lesson slot, plus a per-day slot index.
+    """
+    user, role = current_user
+
+    if role == "student" and user.id != student_id:
+        raise HTTPException(status_code=403, detail="You can only view your own attendance")
+
+    today = date.today()
+    if today.month >= 6:
+        startDate = date(today.year, 6, 1)
+    else:
+        startDate = date(today.year - 1, 6, 1)
+
+    return await getStudentAttendanceBitset(student_id, startDate, today, session)
+
+
 @router.get("/lesson/{lesson_id}", response_model=AttendanceListResponse)
 def getAttendanceForLesson(lesson_id: uuid.UUID, current_user: TeacherOrAdminUser, session: SessionDep,
                            attendance_date: Optional[date] = Query(None, description="Filter by specific date")):
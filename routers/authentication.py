@@ -1,3 +1,4 @@
+import uuid
 from datetime import timedelta, date, datetime
 from enum import Enum
 from math import dist
@@ -6,17 +7,23 @@ from typing import Any, Union
 from fastapi.params import Form
 from jwt import PyJWTError
 from core.config import settings
-from core.security import get_password_hash
-from deps import CurrentUser, UserRole, AdminUser, TeacherOrAdminUser, AllUser, TokenDep
-from fastapi import APIRouter, Depends, HTTPException, UploadFile
+from deps import CurrentUser, UserRole, AdminUser, TeacherOrAdminUser, AllUser, AsyncAllUser, TokenDep
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session, select
-from core.database import SessionDep
-from core.security import verify_password, create_access_token, create_refresh_token, decode_refresh_token, secureLogout
+from sqlalchemy import literal, union_all
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from core.database import SessionDep, AsyncSessionDep
+from core.security import verify_password_async, get_password_hash_async, create_access_token, issue_refresh_token, \
+    rotate_refresh_token, secureLogout, password_needs_rehash, rehash_password
 from models import User, Admin, Teacher, Parent, Student, BlacklistToken
 from schemas import Token, UserPublic, RefreshTokenRequest, TokenWithUser, AdminResponse, ParentResponse, \
     TeacherResponse, StudentResponse
 from core.FileStorage import process_and_save_image
+from core.principal_cache import invalidate_principal, get_cached_principal_async, cache_principal, reload_principal, \
+    reload_principal_async
+from core.token_blacklist import is_token_revoked
+from core.rate_limit import login_rate_limit, password_change_rate_limit
 
 router = APIRouter(
     prefix="/auth"
@@ -35,56 +42,84 @@ def format_user_response(user: Union[Admin, Teacher, Parent, Student], role: str
     return {}
 
 
-def get_user_by_username(username: str, session: Session) -> tuple[Union[Admin, Teacher, Parent, Student], str] | None:
+ROLE_MODELS = {
+    "admin": Admin,
+    "parent": Parent,
+    "teacher": Teacher,
+    "student": Student,
+}
+
+
+def login_by_username_query(username: str):
     """
-        Search for a user across all role tables.
-        Returns a tuple of (user_object, role_name) or None if not found.
+        Resolve a username across all role tables in one UNION ALL query.
+        Each branch is a lookup on that table's unique username index; when the same
+        username exists in several tables the old precedence (admin, parent, teacher, student) wins.
+        Selects a row of (role, id, password, is_delete).
     """
-    # Check Admin
-    admin = session.exec(select(Admin).where(Admin.username == username)).first()
-    if admin:
-        return (admin, "admin")
-
-    # Check Parent
-    parent = session.exec(select(Parent).where(Parent.username == username)).first()
-    if parent:
-        return (parent, "parent")
+    branches = [
+        select(
+            literal(role).label("role"),
+            literal(priority).label("priority"),
+            model.id.label("id"),
+            model.password.label("password"),
+            model.is_delete.label("is_delete")
+        ).where(model.username == username)
+        for priority, (role, model) in enumerate(ROLE_MODELS.items())
+    ]
+    logins = union_all(*branches).subquery()
+
+    return (
+        select(logins.c.role, logins.c.id, logins.c.password, logins.c.is_delete)
+        .order_by(logins.c.priority)
+        .limit(1)
+    )
 
-    # Check Teacher
-    teacher = session.exec(select(Teacher).where(Teacher.username == username)).first()
-    if teacher:
-        return (teacher, "teacher")
 
-    # Check Student
-    student = session.exec(select(Student).where(Student.username == username)).first()
-    if student:
-        return (student, "student")
+async def get_login_by_username_async(username: str, session: AsyncSession):
+    return (await session.exec(login_by_username_query(username))).first()
 
-    # statement = select(User).where(User.username == username)
-    # session_user = session.exec(statement).first()
-    # return session_user
 
-    return None
+async def load_principal_async(role: str, user_id: uuid.UUID,
+                               session: AsyncSession) -> Union[Admin, Teacher, Parent, Student] | None:
+    user = await get_cached_principal_async(role, user_id, session)
+    if user is None:
+        user = await session.get(ROLE_MODELS[role], user_id)
+        if user:
+            cache_principal(role, user)
+    return user
 
 
-@router.post("/access-token", response_model=TokenWithUser)
-def login_access_token(
-        session: SessionDep,
+@router.post("/access-token", response_model=TokenWithUser, dependencies=[Depends(login_rate_limit)])
+async def login_access_token(
+        session: AsyncSessionDep,
+        background_tasks: BackgroundTasks,
         request: OAuth2PasswordRequestForm = Depends()
 ):
-    user_data = get_user_by_username(request.username, session)
+    # async so a login waiting on the bcrypt pool holds no threadpool worker; saturation surfaces as a 503
+    login = await get_login_by_username_async(request.username, session)
 
-    if not user_data:
+    if not login:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
 
-    db_user, role = user_data
-
-    if not verify_password(request.password, db_user.password):
+    if not await verify_password_async(request.password, login.password):
         raise HTTPException(status_code=400, detail="Incorrect username or password")
 
-    if role != "admin" and getattr(db_user, "is_delete", False):
+    role = login.role
+
+    if role != "admin" and login.is_delete:
         raise HTTPException(status_code=400, detail="Inactive user")
 
+    db_user = await load_principal_async(role, login.id, session)
+
+    if not db_user:
+        raise HTTPException(status_code=400, detail="Incorrect username or password")
+
+    if password_needs_rehash(login.password):
+        background_tasks.add_task(
+            rehash_password, ROLE_MODELS[role], login.id, role, request.password, login.password
+        )
+
     payload = {
         "sub": db_user.username,
         "user_id": str(db_user.id),
@@ -92,7 +127,8 @@ def login_access_token(
     }
 
     access_token = create_access_token(payload)
-    refresh_token = create_refresh_token(payload)
+    refresh_token = issue_refresh_token(payload, session)
+    await session.commit()
 
     user_response = format_user_response(db_user, role)
 
@@ -106,34 +142,26 @@ def login_access_token(
 
 
 @router.post("/refresh", response_model=Token)
-def refresh_access_token(data: RefreshTokenRequest):
+def refresh_access_token(data: RefreshTokenRequest, session: SessionDep):
     refresh_token = data.refresh_token
 
-    try:
-        payload = decode_refresh_token(refresh_token)
-
-        if payload.get("type") != "refresh":
-            raise HTTPException(status_code=401, detail="Invalid token type")
-
-        username = payload.get("sub")
-        user_id = payload.get("user_id")
-        role = payload.get("role")
-
-        if username is None or user_id is None:
-            raise HTTPException(status_code=401, detail="Invalid refresh token")
+    if is_token_revoked(refresh_token, session):
+        raise HTTPException(status_code=401, detail="Refresh token has been revoked")
 
+    try:
+        payload, new_refresh_token = rotate_refresh_token(refresh_token, session)
     except PyJWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired refresh token")
 
     new_access_token = create_access_token({
-        "sub": username,
-        "user_id": user_id,
-        "role": role
+        "sub": payload["sub"],
+        "user_id": payload["user_id"],
+        "role": payload.get("role")
     })
 
     return Token(
         access_token=new_access_token,
-        refresh_token=refresh_token,  # keep same refresh token
+        refresh_token=new_refresh_token,
         token_type="bearer"
     )
 
@@ -165,18 +193,19 @@ def getUserDetail(current_user: AllUser, session: SessionDep):
     return user_response
 
 
-@router.post("/changePassword", response_model=str)
-def changeUserPassword(
-        current_user: AllUser,
-        session: SessionDep,
+@router.post("/changePassword", response_model=str, dependencies=[Depends(password_change_rate_limit)])
+async def changeUserPassword(
+        current_user: AsyncAllUser,
+        session: AsyncSessionDep,
         old_password: str = Form(...),
         new_password: str = Form(...),
         confirm_password: str = Form(...)
 ):
     db_user, role = current_user
+    db_user = await reload_principal_async(db_user, session)
 
     # 1. Check current password
-    if not verify_password(old_password, db_user.password):
+    if not await verify_password_async(old_password, db_user.password):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
 
     # 2. Check new password and confirmation match
@@ -184,13 +213,14 @@ def changeUserPassword(
         raise HTTPException(status_code=400, detail="New passwords do not match")
 
     # 3. Optionally, check new password is different from current
-    if verify_password(new_password, db_user.password):
+    if await verify_password_async(new_password, db_user.password):
         raise HTTPException(status_code=400, detail="New password must be different from current password")
 
     # 4. Update password for the user based on role
-    db_user.password = get_password_hash(new_password)
+    db_user.password = await get_password_hash_async(new_password)
     session.add(db_user)
-    session.commit()
+    await session.commit()
+    invalidate_principal(role, db_user.id)
 
     return "Password changed successfully."
 
@@ -240,6 +270,7 @@ def update_profile(
         )
 
     # Update basic info
+    db_user = reload_principal(db_user, session)
     db_user.first_name = first_name
     db_user.last_name = last_name
     db_user.email = email
@@ -248,6 +279,7 @@ def update_profile(
 
     session.add(db_user)
     session.commit()
+    invalidate_principal(role, db_user.id)
 
     return {"message": "Profile updated successfully", "user": format_user_response(db_user, role)}
 
@@ -287,9 +319,11 @@ async def update_profile_picture(
             raise HTTPException(status_code=400, detail=f"Error processing image: {str(e)}")
 
     # Update user's profile picture URL
+    db_user = reload_principal(db_user, session)
     db_user.img = image_filename
     session.add(db_user)
     session.commit()
+    invalidate_principal(role, db_user.id)
 
     return "Profile picture updated successfully."
 
@@ -3,9 +3,10 @@ from typing import List, Optional
 
 from fastapi.params import Form
 
-from core.database import SessionDep
+from core.database import SessionDep, AsyncSessionDep
 from fastapi import APIRouter, HTTPException
-from deps import CurrentUser, AllUser, StudentOrTeacherOrAdminUser, AdminUser, ParentUser
+from deps import AllUser, AdminUser, ParentUser
+from deps import AsyncCurrentUser, AsyncAllUser, AsyncStudentOrTeacherOrAdminUser
 from models import Day
 from repository.lesson import getAllLessonIsDeleteFalse, getAllLessonOfTeacherIsDeleteFalse, \
     getAllLessonOfClassIsDeleteFalse, getAllLessonOfParentIsDeleteFalse, countAllLessonOfTeacher, \
@@ -165,44 +166,44 @@ def validate_lesson_data(
 
 
 @router.get("/getAll", response_model=PaginatedLessonResponse)
-def getAllLesson(current_user: AllUser, session: SessionDep, search: str = None, page: int = 1):
+async def getAllLesson(current_user: AsyncAllUser, session: AsyncSessionDep, search: str = None, page: int = 1):
     user, role = current_user
     if role == "admin":
-        all_lessons = getAllLessonIsDeleteFalse(session, search, page)
+        all_lessons = await getAllLessonIsDeleteFalse(session, search, page)
     elif role == "teacher":
-        all_lessons = getAllLessonOfTeacherIsDeleteFalse(user.id, session, search, page)
+        all_lessons = await getAllLessonOfTeacherIsDeleteFalse(user.id, session, search, page)
     elif role == "student":
-        all_lessons = getAllLessonOfClassIsDeleteFalse(user.class_id, session, search, page)
+        all_lessons = await getAllLessonOfClassIsDeleteFalse(user.class_id, session, search, page)
     else:
-        all_lessons = getAllLessonOfParentIsDeleteFalse(user.id, session, search, page)
+        all_lessons = await getAllLessonOfParentIsDeleteFalse(user.id, session, search, page)
     return all_lessons
 
 @router.get("/getFullList", response_model=List[LessonRead])
-def getFullListLesson(current_user: AllUser, session: SessionDep):
+async def getFullListLesson(current_user: AsyncAllUser, session: AsyncSessionDep):
     user, role = current_user
-    all_lessons = getAllLessonList(session)
+    all_lessons = await getAllLessonList(session)
     return all_lessons
 
 
 @router.get("/getAllOfCurrentWeek", response_model=List[LessonRead])
-def getAllOfCurrentWeek(current_user: StudentOrTeacherOrAdminUser, session: SessionDep):
+async def getAllOfCurrentWeek(current_user: AsyncStudentOrTeacherOrAdminUser, session: AsyncSessionDep):
     user, role = current_user
 
     if role == "admin":
-        all_lessons = getAllLessonOfCurrentWeekIsDeleteFalse(session)
+        all_lessons = await getAllLessonOfCurrentWeekIsDeleteFalse(session)
     elif role == "teacher":
-        all_lessons = getAllLessonOfTeacherOfCurrentWeekIsDeleteFalse(user.id, session)
+        all_lessons = await getAllLessonOfTeacherOfCurrentWeekIsDeleteFalse(user.id, session)
     else:
-        all_lessons = getAllLessonOfClassOfCurrentWeekIsDeleteFalse(user.class_id, session)
+        all_lessons = await getAllLessonOfClassOfCurrentWeekIsDeleteFalse(user.class_id, session)
 
     return all_lessons
 
 
 @router.get("/getLessonForStudent/{studentId}", response_model=List[LessonRead])
-def getLessonForStudent(studentId: uuid.UUID, current_user: AllUser, session: SessionDep):
+async def getLessonForStudent(studentId: uuid.UUID, current_user: AsyncAllUser, session: AsyncSessionDep):
     user, role = current_user
 
-    all_lessons = getAllLessonOfStudentOfCurrentWeekIsDeleteFalse(studentId, user, role, session)
+    all_lessons = await getAllLessonOfStudentOfCurrentWeekIsDeleteFalse(studentId, user, role, session)
 
     return all_lessons
 
@@ -284,34 +285,34 @@ def getById(lessonId: uuid.UUID, current_user: AllUser, session: SessionDep):
 
 
 @router.get("/teacher/{teacherId}", response_model=PaginatedLessonResponse)
-def getLessonOfTeacher(teacherId: uuid.UUID, current_user: CurrentUser, session: SessionDep, search: str = None,
-                       page: int = 1):
-    all_lessons = getAllLessonOfTeacherIsDeleteFalse(teacherId, session, search, page)
+async def getLessonOfTeacher(teacherId: uuid.UUID, current_user: AsyncCurrentUser, session: AsyncSessionDep, search: str = None,
+                             page: int = 1):
+    all_lessons = await getAllLessonOfTeacherIsDeleteFalse(teacherId, session, search, page)
     return all_lessons
 
 
 @router.get("/teacher/weekly/{teacherId}", response_model=List[LessonRead])
-def getAllLessonOfTeacher(teacherId: uuid.UUID, current_user: CurrentUser, session: SessionDep):
-    all_lessons = getAllLessonOfTeacherIsDeleteFalse(teacherId, session, None, 1, False)
+async def getAllLessonOfTeacher(teacherId: uuid.UUID, current_user: AsyncCurrentUser, session: AsyncSessionDep):
+    all_lessons = await getAllLessonOfTeacherIsDeleteFalse(teacherId, session, None, 1, False)
     return all_lessons
 
 
 @router.get("/countByTeacher/{teacherId}", response_model=int)
-def countLessonByTeacher(teacherId: uuid.UUID, current_user: CurrentUser, session: SessionDep):
-    total_lessons = countAllLessonOfTeacher(teacherId, session)
+async def countLessonByTeacher(teacherId: uuid.UUID, current_user: AsyncCurrentUser, session: AsyncSessionDep):
+    total_lessons = await countAllLessonOfTeacher(teacherId, session)
     return total_lessons
 
 
 @router.get("/countByStudent/{studentId}", response_model=int)
-def countLessonByStudent(studentId: uuid.UUID, current_user: StudentOrTeacherOrAdminUser, session: SessionDep):
-    total_lesson = countAllLessonOfStudent(studentId, session)
+async def countLessonByStudent(studentId: uuid.UUID, current_user: AsyncStudentOrTeacherOrAdminUser, session: AsyncSessionDep):
+    total_lesson = await countAllLessonOfStudent(studentId, session)
     return total_lesson
 
 
 @router.get("/class/{classId}", response_model=PaginatedLessonResponse)
-def getAllLessonOfClass(classId: uuid.UUID, current_user: CurrentUser, session: SessionDep, search: str = None,
-                        page: int = 1):
-    all_lessons = getAllLessonOfClassIsDeleteFalse(classId, session, search, page)
+async def getAllLessonOfClass(classId: uuid.UUID, current_user: AsyncCurrentUser, session: AsyncSessionDep, search: str = None,
+                              page: int = 1):
+    all_lessons = await getAllLessonOfClassIsDeleteFalse(classId, session, search, page)
     return all_lessons
 
 
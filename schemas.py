@@ -649,6 +649,19 @@ class StudentMonthlyAttendance(SQLModel):
     records: List[StudentAttendanceRecord]
 
 
+class StudentAttendanceBitset(SQLModel):
+    """Compact attendance history: one bit per marked lesson slot (1 = present)"""
+    student_id: uuid.UUID
+    start_date: date
+    end_date: date
+    total_slots: int
+    present_count: int
+    absent_count: int
+    bits: str  # base64 of the packed bits, most significant bit first
+    days: List[date]  # days that have at least one marked slot, ascending
+    day_offsets: List[int]  # index of the first slot of each entry in days
+
+
 class CalendarDayData(SQLModel):
     """Attendance data for a single day (for calendar heatmap)"""
     date: date
@@ -706,6 +719,24 @@ class TeacherClassSummary(SQLModel):
     absent_count: int
 
 
+class AtRiskStudentItem(SQLModel):
+    """Student below the attendance threshold over the rolling window"""
+    student_id: uuid.UUID
+    student_name: str
+    username: str
+    class_id: Optional[uuid.UUID] = None
+    class_name: Optional[str] = None
+    present_count: int
+    absent_count: int
+    attendance_rate: float  # Percentage
+    window_start: date
+    window_end: date
+
+
+class PaginatedAtRiskStudentResponse(PaginatedBaseResponse):
+    data: List[AtRiskStudentItem]
+
+
 # ===================== Take Attendance Workflow Schemas =====================
 
 class StudentRosterItem(SQLModel):
@@ -784,3 +815,35 @@ class AttendanceTakeResponse(SQLModel):
     updated_count: int
     present_count: int
     absent_count: int
+
+
+class AttendanceSyncItem(AttendanceTakeRequest):
+    """One lesson roster in an offline sync batch"""
+    idempotency_key: str = Field(..., min_length=1, max_length=64, description="Client-generated key, reused on retries")
+
+
+class AttendanceSyncRequest(SQLModel):
+    """Request body for syncing several lesson rosters at once"""
+    items: List[AttendanceSyncItem]
+
+    @field_validator('items')
+    def validate_items_not_empty(cls, v):
+        if not v or len(v) == 0:
+            raise ValueError("At least one roster is required.")
+        return v
+
+
+class AttendanceSyncItemResult(SQLModel):
+    """Outcome of one roster in a sync batch"""
+    idempotency_key: str
+    status: str  # "applied", "duplicate", "failed"
+    result: Optional[AttendanceTakeResponse] = None
+    error: Optional[dict] = None
+
+
+class AttendanceSyncResponse(SQLModel):
+    """Response for an offline sync batch"""
+    applied_count: int
+    duplicate_count: int
+    failed_count: int
+    results: List[AttendanceSyncItemResult]
@@ -0,0 +1,92 @@
+import os
+import tempfile
+
+# Settings are read at import time; tests run against in-memory SQLite, never the configured Postgres
+os.environ.setdefault("PROJECT_NAME", "zenith-tests")
+os.environ.setdefault("POSTGRES_SERVER", "localhost")
+os.environ.setdefault("POSTGRES_USER", "tests")
+os.environ.setdefault("FIRST_SUPERUSER", "admin@example.com")
+os.environ.setdefault("FIRST_SUPERUSER_PASSWORD", "tests")
+os.environ.setdefault("UPLOAD_DIR_DP", os.path.join(tempfile.gettempdir(), "zenith-tests", "images"))
+# Any N+1 or blown query budget inside a collect_db_stats() block fails the test
+os.environ.setdefault("REQUEST_METRICS_ENABLED", "true")
+os.environ.setdefault("QUERY_GUARD_MODE", "raise")
+
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import NullPool, StaticPool
+from sqlmodel import SQLModel, Session, create_engine
+
+import models  # noqa: F401  (registers every table on SQLModel.metadata)
+from core.query_guard import instrument_query_guard
+from core.request_metrics import instrument_request_metrics
+
+
+def _instrument(engine) -> None:
+    instrument_request_metrics(engine)
+    instrument_query_guard(engine)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    _instrument(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine):
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.fixture
+def file_engine(tmp_path):
+    # Async tests need a database both a sync seeding engine and aiosqlite can open
+    engine = create_engine(f"sqlite:///{tmp_path / 'zenith.db'}")
+    SQLModel.metadata.create_all(engine)
+    _instrument(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def async_engine(file_engine):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{file_engine.url.database}", poolclass=NullPool)
+    _instrument(engine.sync_engine)
+    yield engine
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture(params=["sqlite", "postgresql"])
+def upsert_session(request, engine):
+    """
+        Session for code built on INSERT ... ON CONFLICT / RETURNING: in-memory SQLite always, and
+        Postgres when TEST_DATABASE_URL points at a scratch database (its tables are recreated).
+    """
+    if request.param == "sqlite":
+        with Session(engine) as session:
+            yield session
+        return
+
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    pg_engine = create_engine(url)
+    SQLModel.metadata.drop_all(pg_engine)
+    SQLModel.metadata.create_all(pg_engine)
+    with pg_engine.begin() as connection:
+        # create_all makes attendance partitioned but creates no partitions
+        connection.execute(text("CREATE TABLE attendance_default PARTITION OF attendance DEFAULT"))
+    _instrument(pg_engine)
+
+    with Session(pg_engine) as session:
+        yield session
+    SQLModel.metadata.drop_all(pg_engine)
+    pg_engine.dispose()
@@ -0,0 +1,106 @@
+import uuid
+from datetime import date, datetime, time
+
+from sqlmodel import Session
+
+from models import Attendance, Class, Grade, Lesson, Parent, Student, Subject, Teacher, UserSex, Day
+from repository.attendance_rollup import refreshAttendanceRollup
+
+
+def _unique() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def make_teacher(session: Session) -> Teacher:
+    key = _unique()
+    teacher = Teacher(
+        username=f"teacher_{key}", first_name="Test", last_name="Teacher", email=f"{key}@teacher.test",
+        phone=key, address="Test address", blood_type="A+", sex=UserSex.FEMALE, password="-"
+    )
+    session.add(teacher)
+    return teacher
+
+
+def make_parent(session: Session) -> Parent:
+    key = _unique()
+    parent = Parent(
+        username=f"parent_{key}", first_name="Test", last_name="Parent", email=f"{key}@parent.test",
+        phone=key, address="Test address", password="-"
+    )
+    session.add(parent)
+    return parent
+
+
+def make_class(session: Session, grade: Grade, students: int = 5, parent: Parent | None = None,
+               lessons: int = 1, day: Day = Day.MONDAY, teacher: Teacher | None = None,
+               subject: Subject | None = None) -> tuple[Class, list[Student], list[Lesson]]:
+    """A class with its students and lessons; `parent` (if given) gets the first student."""
+    key = _unique()
+    related_class = Class(name=f"class_{key}", capacity=max(students, 1), grade_id=grade.id)
+    session.add(related_class)
+
+    class_students = []
+    for index in range(students):
+        student_key = _unique()
+        student = Student(
+            username=f"student_{student_key}", first_name="Test", last_name=f"Student {index}",
+            email=f"{student_key}@student.test", address="Test address", blood_type="O+", sex=UserSex.MALE,
+            password="-", class_id=related_class.id, parent_id=parent.id if parent and index == 0 else None
+        )
+        session.add(student)
+        class_students.append(student)
+
+    class_lessons = []
+    for index in range(lessons):
+        lesson = Lesson(
+            name=f"Lesson {index}", day=day, start_time=time(8 + index), end_time=time(9 + index),
+            class_id=related_class.id, teacher_id=teacher.id if teacher else None,
+            subject_id=subject.id if subject else None
+        )
+        session.add(lesson)
+        class_lessons.append(lesson)
+
+    return related_class, class_students, class_lessons
+
+
+def mark_attendance(session: Session, lessons: list[Lesson], students: list[Student], day: date) -> None:
+    """
+    Mark every student of every lesson on day, alternating present/absent, and refresh the
+    daily rollup the way the attendance write paths do.
+    """
+    for lesson in lessons:
+        for index, student in enumerate(students):
+            session.add(Attendance(
+                student_id=student.id, lesson_id=lesson.id, attendance_date=datetime.combine(day, time(9)),
+                attendance_day=day, present=index % 2 == 0
+            ))
+    if lessons:
+        refreshAttendanceRollup([(student.id, day) for student in students], session)
+
+
+def seed_school(session: Session, classes: int, students_per_class: int = 5, lessons_per_class: int = 1,
+                day: date | None = None, parent: Parent | None = None) -> dict:
+    """
+    Seed `classes` classes sharing one teacher and subject, with lessons on `day`'s weekday
+    and attendance taken on `day`. `parent` gets the first student of every class.
+    """
+    day = day or date(2026, 10, 12)  # A Monday
+    grade = Grade(level=int(uuid.uuid4().int % 10 ** 9))
+    teacher = make_teacher(session)
+    subject = Subject(name=f"subject_{_unique()}")
+    session.add_all([grade, subject])
+
+    seeded = {"teacher": teacher, "subject": subject, "classes": [], "students": [], "lessons": []}
+    for _ in range(classes):
+        related_class, students, lessons = make_class(
+            session, grade, students_per_class, parent, lessons_per_class,
+            list(Day)[day.weekday()], teacher, subject
+        )
+        mark_attendance(session, lessons, students, day)
+        seeded["classes"].append(related_class)
+        seeded["students"].extend(students)
+        seeded["lessons"].extend(lessons)
+
+    session.commit()
+    seeded["day"] = day
+    return seeded
@@ -0,0 +1,34 @@
+from core.request_metrics import collect_db_stats
+from repository.attendance import getLessonsForDate
+from tests.factories import seed_school
+
+
+def _lessons_for_date_queries(session, seeded, role="admin"):
+    teacher_id, day = seeded["teacher"].id, seeded["day"]
+    session.expire_all()
+    with collect_db_stats() as stats:
+        response = getLessonsForDate(day, None, teacher_id, role, session)
+    return response, stats.queries
+
+
+def test_lessons_for_date_query_count_does_not_grow_with_lessons(engine, session):
+    one = seed_school(session, classes=1)
+    response, single_lesson_queries = _lessons_for_date_queries(session, one)
+    assert response.total_lessons == 1
+
+    seed_school(session, classes=12, lessons_per_class=2)
+    response, many_lessons_queries = _lessons_for_date_queries(session, one)
+    assert response.total_lessons == 25
+
+    assert many_lessons_queries == single_lesson_queries == 1
+
+
+def test_lessons_for_date_counts_come_from_the_same_query(engine, session):
+    seeded = seed_school(session, classes=3, students_per_class=4)
+    response, queries = _lessons_for_date_queries(session, seeded, role="teacher")
+
+    assert queries == 1
+    for lesson in response.lessons:
+        assert lesson.students_count == 4
+        assert (lesson.present_count, lesson.absent_count) == (2, 2)
+        assert lesson.attendance_status == "complete"
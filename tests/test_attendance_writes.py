@@ -0,0 +1,166 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import select, func
+
+from models import Attendance, AttendanceSyncKey
+from repository.attendance import _upsertAttendanceRows, takeAttendance, syncAttendanceBatch
+from schemas import AttendanceRecord, AttendanceTakeRequest, AttendanceSyncItem, AttendanceSyncRequest
+from tests.factories import seed_school
+
+
+@pytest.fixture
+def school(upsert_session):
+    seeded = seed_school(upsert_session, classes=2, students_per_class=3)
+    # seed_school marks its own day; these tests write the following week
+    seeded["day"] += timedelta(days=7)
+    return seeded
+
+
+def roster(students, present=True) -> list[AttendanceRecord]:
+    return [AttendanceRecord(student_id=student.id, present=present) for student in students]
+
+
+def class_students(school, index: int):
+    return school["students"][index * 3:(index + 1) * 3]
+
+
+def stored_presence(session, lesson, day) -> dict:
+    session.expire_all()
+    return dict(session.exec(
+        select(Attendance.student_id, Attendance.present)
+        .where(Attendance.lesson_id == lesson.id, Attendance.attendance_day == day, Attendance.is_delete == False)
+    ).all())
+
+
+def sync_item(key: str, lesson, day, records, overwrite=False) -> AttendanceSyncItem:
+    return AttendanceSyncItem(
+        idempotency_key=key, lesson_id=lesson.id, attendance_date=day, records=records, overwrite_existing=overwrite
+    )
+
+
+def test_upsert_reports_created_then_updated_rows(upsert_session, school):
+    lesson, students, day = school["lessons"][0], class_students(school, 0), school["day"]
+
+    written = _upsertAttendanceRows(lesson.id, day, roster(students, present=True), False, upsert_session)
+    assert written == {student.id: True for student in students}
+
+    written = _upsertAttendanceRows(lesson.id, day, roster(students, present=False), True, upsert_session)
+    upsert_session.commit()
+
+    assert written == {student.id: False for student in students}
+    assert stored_presence(upsert_session, lesson, day) == {student.id: False for student in students}
+
+
+def test_upsert_without_overwrite_skips_existing_rows(upsert_session, school):
+    lesson, students, day = school["lessons"][0], class_students(school, 0), school["day"]
+    _upsertAttendanceRows(lesson.id, day, roster(students[:2], present=True), False, upsert_session)
+
+    written = _upsertAttendanceRows(lesson.id, day, roster(students, present=False), False, upsert_session)
+    upsert_session.commit()
+
+    assert written == {students[2].id: True}
+    assert stored_presence(upsert_session, lesson, day) == {
+        students[0].id: True, students[1].id: True, students[2].id: False
+    }
+
+
+def test_take_attendance_conflict_without_overwrite_is_409_and_writes_nothing(upsert_session, school):
+    lesson, students, day = school["lessons"][0], class_students(school, 0), school["day"]
+    takeAttendance(
+        AttendanceTakeRequest(lesson_id=lesson.id, attendance_date=day, records=roster(students[:1])),
+        school["teacher"].id, "teacher", upsert_session
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        takeAttendance(
+            AttendanceTakeRequest(lesson_id=lesson.id, attendance_date=day, records=roster(students, present=False)),
+            school["teacher"].id, "teacher", upsert_session
+        )
+
+    assert exc.value.status_code == 409
+    assert exc.value.detail["existing_students"] == [str(students[0].id)]
+    # The two new rows of the rejected roster were rolled back with it
+    assert stored_presence(upsert_session, lesson, day) == {students[0].id: True}
+
+
+def test_take_attendance_with_overwrite_counts_created_and_updated(upsert_session, school):
+    lesson, students, day = school["lessons"][0], class_students(school, 0), school["day"]
+    takeAttendance(
+        AttendanceTakeRequest(lesson_id=lesson.id, attendance_date=day, records=roster(students[:1])),
+        school["teacher"].id, "teacher", upsert_session
+    )
+
+    response = takeAttendance(
+        AttendanceTakeRequest(
+            lesson_id=lesson.id, attendance_date=day, records=roster(students, present=False), overwrite_existing=True
+        ),
+        school["teacher"].id, "teacher", upsert_session
+    )
+
+    assert (response.created_count, response.updated_count) == (2, 1)
+    assert (response.present_count, response.absent_count) == (0, 3)
+    assert stored_presence(upsert_session, lesson, day) == {student.id: False for student in students}
+
+
+def test_replayed_sync_key_returns_duplicate_without_writing(upsert_session, school):
+    lesson, students, day = school["lessons"][0], class_students(school, 0), school["day"]
+    teacher_id = school["teacher"].id
+    first = syncAttendanceBatch(
+        AttendanceSyncRequest(items=[sync_item("offline-1", lesson, day, roster(students, present=True))]),
+        teacher_id, "teacher", upsert_session
+    )
+    assert first.applied_count == 1
+
+    # A retry whose payload changed in the meantime must still not be applied twice
+    replay = syncAttendanceBatch(
+        AttendanceSyncRequest(items=[sync_item("offline-1", lesson, day, roster(students, present=False), True)]),
+        teacher_id, "teacher", upsert_session
+    )
+
+    assert (replay.applied_count, replay.duplicate_count) == (0, 1)
+    assert replay.results[0].status == "duplicate"
+    assert replay.results[0].result.created_count == first.results[0].result.created_count == 3
+    assert stored_presence(upsert_session, lesson, day) == {student.id: True for student in students}
+
+
+def test_failed_sync_item_rolls_back_only_its_own_savepoint(upsert_session, school):
+    first_lesson, second_lesson = school["lessons"]
+    first_students, second_students = class_students(school, 0), class_students(school, 1)
+    day, teacher_id = school["day"], school["teacher"].id
+    next_day = day + timedelta(days=1)
+
+    # One student is already marked on next_day, so a roster for it without overwrite conflicts
+    _upsertAttendanceRows(first_lesson.id, next_day, roster(first_students[:1]), False, upsert_session)
+    upsert_session.commit()
+
+    response = syncAttendanceBatch(
+        AttendanceSyncRequest(items=[
+            sync_item("ok-1", first_lesson, day, roster(first_students)),
+            # Inserts two rows, then fails with a 409 on the third
+            sync_item("conflict", first_lesson, next_day, roster(first_students, present=False)),
+            sync_item("ok-2", second_lesson, day, roster(second_students)),
+        ]),
+        teacher_id, "teacher", upsert_session
+    )
+
+    assert (response.applied_count, response.duplicate_count, response.failed_count) == (2, 0, 1)
+    assert [result.status for result in response.results] == ["applied", "failed", "applied"]
+    assert response.results[1].error["status_code"] == 409
+
+    assert len(stored_presence(upsert_session, first_lesson, day)) == 3
+    assert len(stored_presence(upsert_session, second_lesson, day)) == 3
+    assert stored_presence(upsert_session, first_lesson, next_day) == {first_students[0].id: True}
+
+    keys = upsert_session.exec(select(AttendanceSyncKey.idempotency_key)).all()
+    assert sorted(keys) == ["ok-1", "ok-2"]
+
+    # The failed key was released, so a corrected retry applies
+    retry = syncAttendanceBatch(
+        AttendanceSyncRequest(items=[sync_item("conflict", first_lesson, next_day, roster(first_students, False), True)]),
+        teacher_id, "teacher", upsert_session
+    )
+    assert retry.results[0].status == "applied"
+    assert (retry.results[0].result.created_count, retry.results[0].result.updated_count) == (2, 1)
+    assert upsert_session.exec(select(func.count()).select_from(AttendanceSyncKey)).one() == 3
@@ -0,0 +1,21 @@
+from datetime import date, datetime
+
+from sqlmodel import select
+
+from models import Attendance
+from tests.factories import seed_school
+
+
+def test_attendance_day_is_derived_from_attendance_date(session):
+    seeded = seed_school(session, classes=1, students_per_class=1)
+    student, lesson = seeded["students"][0], seeded["lessons"][0]
+    marked_at = datetime(2024, 2, 29, 23, 30)
+
+    attendance = Attendance(student_id=student.id, lesson_id=lesson.id, attendance_date=marked_at, present=True)
+    session.add(attendance)
+    session.commit()
+
+    assert attendance.attendance_day == date(2024, 2, 29)
+    assert session.exec(
+        select(Attendance.attendance_day).where(Attendance.attendance_date == marked_at)
+    ).one() == date(2024, 2, 29)
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from core import security
+from core.config import settings
+from core.database import get_async_db
+from core.principal_cache import principal_cache
+from core.rate_limit import InMemoryRateLimitBackend, set_rate_limit_backend
+from models import Admin
+from routers import authentication
+
+PASSWORD = "old-password-1"
+
+
+@pytest.fixture(autouse=True)
+def isolated_state():
+    set_rate_limit_backend(InMemoryRateLimitBackend())
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+
+@pytest.fixture
+def admin(file_engine):
+    with Session(file_engine) as session:
+        admin = Admin(username="admin", password=security.pwd_context.hash(PASSWORD))
+        session.add(admin)
+        session.commit()
+        session.refresh(admin)
+        return admin
+
+
+@pytest.fixture
+def client(async_engine):
+    app = FastAPI()
+    app.include_router(authentication.router)
+
+    async def override_async_db():
+        async with AsyncSession(async_engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_async_db] = override_async_db
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def saturated_pool(monkeypatch):
+    """Occupy every pending slot of the bcrypt pool until the test releases the gate."""
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 2)
+    gate = threading.Event()
+    blockers = [security._submit_password_job(gate.wait) for _ in range(2)]
+    yield gate
+    gate.set()
+    for blocker in blockers:
+        blocker.result()
+
+
+def login(client: TestClient, password: str):
+    return client.post("/auth/access-token", data={"username": "admin", "password": password})
+
+
+def test_verify_rejects_with_503_when_backlog_is_full(saturated_pool):
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(security.verify_password_async(PASSWORD, "unused"))
+
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "1"
+
+
+def test_login_returns_503_while_pool_is_saturated(client, admin, saturated_pool):
+    response = login(client, PASSWORD)
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+    saturated_pool.set()
+
+    response = login(client, PASSWORD)
+    assert response.status_code == 200
+    assert response.json()["role"] == "admin"
+
+
+def test_change_password_runs_on_the_async_session(client, admin):
+    token = login(client, PASSWORD).json()["access_token"]
+
+    response = client.post(
+        "/auth/changePassword",
+        headers={"Authorization": f"Bearer {token}"},
+        data={"old_password": PASSWORD, "new_password": "new-password-2", "confirm_password": "new-password-2"}
+    )
+    assert response.status_code == 200, response.text
+
+    assert login(client, PASSWORD).status_code == 400
+    assert login(client, "new-password-2").status_code == 200
@@ -0,0 +1,94 @@
+import uuid
+
+import pytest
+from sqlmodel import Session
+
+from core import principal_cache as cache_module
+from core.principal_cache import PrincipalCache, get_cached_principal, cache_principal, reload_principal
+from models import Admin
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def principal(username: str = "admin") -> Admin:
+    return Admin(id=uuid.uuid4(), username=username, password="-")
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PrincipalCache(max_size=10, ttl_seconds=30)
+    admin = principal()
+    cache.put("admin", admin.id, admin)
+
+    clock.now += 29.9
+    assert cache.get("admin", admin.id) is admin
+
+    clock.now += 0.2
+    assert cache.get("admin", admin.id) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = PrincipalCache(max_size=2, ttl_seconds=30)
+    first, second, third = principal("first"), principal("second"), principal("third")
+    cache.put("admin", first.id, first)
+    cache.put("admin", second.id, second)
+
+    # Reading first makes second the oldest
+    assert cache.get("admin", first.id) is first
+    cache.put("admin", third.id, third)
+
+    assert cache.get("admin", second.id) is None
+    assert cache.get("admin", first.id) is first
+    assert cache.get("admin", str(third.id)) is third
+    assert cache.stats()["evictions"] == 1
+
+
+def test_invalidate_drops_only_that_principal(clock):
+    cache = PrincipalCache(max_size=10, ttl_seconds=30)
+    admin, other = principal(), principal("other")
+    cache.put("admin", admin.id, admin)
+    cache.put("admin", other.id, other)
+
+    cache.invalidate("admin", str(admin.id))
+
+    assert cache.get("admin", admin.id) is None
+    assert cache.get("admin", other.id) is other
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_reload_replaces_stale_cached_values(engine, monkeypatch):
+    monkeypatch.setattr(cache_module, "principal_cache", PrincipalCache(max_size=10, ttl_seconds=30))
+
+    with Session(engine) as session:
+        admin = Admin(username="before", password="old-hash")
+        session.add(admin)
+        session.commit()
+        session.refresh(admin)
+        cache_principal("admin", admin)
+        admin_id = admin.id
+
+    # Another worker changes the row; this process still holds the old snapshot
+    with Session(engine) as session:
+        session.get(Admin, admin_id).password = "new-hash"
+        session.commit()
+
+    with Session(engine) as session:
+        cached = get_cached_principal("admin", admin_id, session)
+        assert cached.password == "old-hash"
+
+        fresh = reload_principal(cached, session)
+        assert fresh is cached
+        assert fresh.password == "new-hash"
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy.orm import selectinload
+from sqlmodel import select
+
+from core.config import settings
+from core.query_guard import QueryGuardViolation
+from core.request_metrics import collect_db_stats
+from models import Class
+from tests.factories import seed_school
+
+
+def test_guard_is_installed_in_raise_mode():
+    assert settings.QUERY_GUARD_MODE == "raise"
+
+
+def test_lazy_load_per_row_raises(engine, session):
+    seed_school(session, classes=settings.QUERY_GUARD_REPEAT_THRESHOLD)
+    session.expire_all()
+
+    with pytest.raises(QueryGuardViolation, match="Possible N\\+1"):
+        with collect_db_stats():
+            for related_class in session.exec(select(Class)).all():
+                len(related_class.students)
+
+
+def test_eager_load_passes(engine, session):
+    seed_school(session, classes=settings.QUERY_GUARD_REPEAT_THRESHOLD)
+    session.expire_all()
+
+    with collect_db_stats() as stats:
+        classes = session.exec(select(Class).options(selectinload(Class.students))).all()
+        assert sum(len(related_class.students) for related_class in classes) == 5 * len(classes)
+
+    assert stats.queries == 2
+
+
+def test_query_budget_raises(engine, session, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_GUARD_BUDGET", 3)
+    seed_school(session, classes=1)
+
+    with pytest.raises(QueryGuardViolation, match="Query budget exceeded"):
+        with collect_db_stats():
+            for _ in range(4):
+                session.exec(select(Class.id)).all()
@@ -0,0 +1,114 @@
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.testclient import TestClient
+
+from core import rate_limit
+from core.config import settings
+from core.rate_limit import InMemoryRateLimitBackend, login_rate_limit, set_rate_limit_backend
+
+PASSWORD = "correct-horse"
+
+
+@pytest.fixture(autouse=True)
+def fresh_backend():
+    set_rate_limit_backend(InMemoryRateLimitBackend())
+    yield
+    set_rate_limit_backend(InMemoryRateLimitBackend())
+
+
+@pytest.fixture
+def app():
+    app = FastAPI()
+
+    # Stands in for /auth/access-token: the 400 on a wrong password is what the limiter charges
+    @app.post("/login", dependencies=[Depends(login_rate_limit)])
+    def login(form: OAuth2PasswordRequestForm = Depends()):
+        if form.password != PASSWORD:
+            raise HTTPException(status_code=400, detail="Incorrect username or password")
+        return {"ok": True}
+
+    @app.get("/ip")
+    def ip(request: Request):
+        return {"ip": rate_limit._client_ip(request)}
+
+    return app
+
+
+def client_from(app, ip: str) -> TestClient:
+    return TestClient(app, client=(ip, 50000))
+
+
+def login(client: TestClient, username: str, password: str, **kwargs):
+    return client.post("/login", data={"username": username, "password": password}, **kwargs)
+
+
+def test_ip_is_locked_out_after_failed_logins(app, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_IP_ATTEMPTS", 3)
+    client = client_from(app, "203.0.113.1")
+
+    # Different usernames, so only the per-IP bucket can trip
+    for i in range(3):
+        assert login(client, f"user{i}", "wrong").status_code == 400
+
+    response = login(client, "someone-else", PASSWORD)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+    assert login(client_from(app, "203.0.113.2"), "someone-else", PASSWORD).status_code == 200
+
+
+def test_username_is_locked_out_across_ips(app, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_ACCOUNT_ATTEMPTS", 3)
+
+    for i in range(3):
+        assert login(client_from(app, f"198.51.100.{i}"), "victim", "wrong").status_code == 400
+
+    # A fresh address still cannot guess, even with the right password
+    assert login(client_from(app, "198.51.100.200"), "Victim ", PASSWORD).status_code == 429
+    assert login(client_from(app, "198.51.100.200"), "other", PASSWORD).status_code == 200
+
+
+def test_successful_login_resets_username_buckets(app, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_ACCOUNT_ATTEMPTS", 3)
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_ATTEMPTS", 3)
+    client = client_from(app, "192.0.2.10")
+
+    for _ in range(2):
+        assert login(client, "teacher", "wrong").status_code == 400
+    assert login(client, "teacher", PASSWORD).status_code == 200
+
+    # Without the reset the third failure would exhaust both buckets
+    for _ in range(2):
+        assert login(client, "teacher", "wrong").status_code == 400
+    assert login(client, "teacher", PASSWORD).status_code == 200
+
+
+def test_successful_logins_do_not_charge_the_ip(app, monkeypatch):
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_IP_ATTEMPTS", 2)
+    client = client_from(app, "192.0.2.20")
+
+    for i in range(5):
+        assert login(client, f"student{i}", PASSWORD).status_code == 200
+
+
+def test_client_ip_ignores_forwarded_for_from_untrusted_peer(app, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", "10.0.0.0/8")
+    client = client_from(app, "203.0.113.5")
+
+    response = client.get("/ip", headers={"X-Forwarded-For": "1.1.1.1"})
+    assert response.json() == {"ip": "203.0.113.5"}
+
+
+def test_client_ip_takes_nearest_untrusted_hop_behind_trusted_proxies(app, monkeypatch):
+    monkeypatch.setattr(settings, "RATE_LIMIT_TRUSTED_PROXIES", "10.0.0.0/8, 172.16.0.1")
+    client = client_from(app, "10.0.0.2")
+
+    # 1.1.1.1 was supplied by the client; 203.0.113.7 is what the outer proxy saw
+    response = client.get("/ip", headers={"X-Forwarded-For": "1.1.1.1, 203.0.113.7, 172.16.0.1"})
+    assert response.json() == {"ip": "203.0.113.7"}
+
+    response = client.get("/ip", headers={"X-Forwarded-For": "10.1.1.1"})
+    assert response.json() == {"ip": "10.1.1.1"}
+
+    assert client.get("/ip").json() == {"ip": "10.0.0.2"}
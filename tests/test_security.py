@@ -0,0 +1,107 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlmodel import select
+
+from core import security
+from models import BlacklistToken, RefreshToken
+
+USER = {"sub": "teacher", "user_id": str(uuid.uuid4()), "role": "teacher"}
+
+
+@pytest.fixture
+def security_engine(engine, monkeypatch):
+    """Point the jobs in core.security that open their own session at the test database."""
+    monkeypatch.setattr(security, "engine", engine)
+    monkeypatch.setattr(security, "load_token_blacklist", lambda: None)
+    return engine
+
+
+def test_logout_stores_the_later_token_expiry(session):
+    access_token = security.create_access_token(USER, timedelta(days=9))
+    refresh_token = security.create_refresh_token(USER, timedelta(days=2))
+
+    security.secureLogout(uuid.UUID(USER["user_id"]), access_token, refresh_token, session)
+
+    row = session.exec(select(BlacklistToken)).one()
+    assert datetime.now() + timedelta(days=8, hours=23) < row.expires_at < datetime.now() + timedelta(days=9, minutes=1)
+
+
+def test_cleanup_deletes_only_rows_past_expires_at(session, security_engine):
+    user_id = uuid.uuid4()
+    now = datetime.now()
+    session.add_all([
+        # Created long ago but its tokens are still valid: the old created_at cutoff purged these
+        BlacklistToken(user_id=user_id, access_token="a.b.live", refresh_token="r.b.live",
+                       created_at=now - timedelta(days=30), expires_at=now + timedelta(hours=1)),
+        BlacklistToken(user_id=user_id, access_token="a.b.dead", refresh_token="r.b.dead",
+                       created_at=now - timedelta(hours=1), expires_at=now - timedelta(minutes=1)),
+    ])
+    session.commit()
+
+    security.delete_old_blacklisted_tokens()
+
+    session.expire_all()
+    assert [row.access_token for row in session.exec(select(BlacklistToken)).all()] == ["a.b.live"]
+
+
+def _family_rows(session, refresh_token: str) -> list[RefreshToken]:
+    family_id = uuid.UUID(security.decode_refresh_token(refresh_token)["fam"])
+    session.expire_all()
+    return session.exec(select(RefreshToken).where(RefreshToken.family_id == family_id)).all()
+
+
+def test_rotation_issues_the_next_token_in_the_family(session):
+    first = security.issue_refresh_token(USER, session)
+    session.commit()
+
+    payload, second = security.rotate_refresh_token(first, session)
+
+    assert payload["user_id"] == USER["user_id"]
+    assert security.decode_refresh_token(second)["fam"] == security.decode_refresh_token(first)["fam"]
+    rows = _family_rows(session, second)
+    assert len(rows) == 2
+    assert sorted(row.used_at is None for row in rows) == [False, True]
+
+    _, third = security.rotate_refresh_token(second, session)
+    assert len(_family_rows(session, third)) == 3
+
+
+def test_reusing_a_rotated_token_revokes_the_family(session):
+    first = security.issue_refresh_token(USER, session)
+    session.commit()
+    _, second = security.rotate_refresh_token(first, session)
+
+    with pytest.raises(HTTPException, match="reuse detected"):
+        security.rotate_refresh_token(first, session)
+
+    assert all(row.revoked for row in _family_rows(session, first))
+    # The legitimate holder's newer token dies with the family
+    with pytest.raises(HTTPException, match="revoked"):
+        security.rotate_refresh_token(second, session)
+
+
+def test_logout_revokes_the_family(session):
+    first = security.issue_refresh_token(USER, session)
+    session.commit()
+    _, second = security.rotate_refresh_token(first, session)
+
+    security.secureLogout(uuid.UUID(USER["user_id"]), security.create_access_token(USER), second, session)
+
+    assert all(row.revoked for row in _family_rows(session, second))
+    with pytest.raises(HTTPException, match="revoked"):
+        security.rotate_refresh_token(second, session)
+
+
+def test_legacy_token_without_jti_is_accepted_once(session):
+    legacy = security.create_refresh_token(USER)
+
+    _, adopted = security.rotate_refresh_token(legacy, session)
+    assert security.decode_refresh_token(adopted)["jti"]
+    assert len(_family_rows(session, adopted)) == 2
+
+    with pytest.raises(HTTPException, match="reuse detected"):
+        security.rotate_refresh_token(legacy, session)
+    assert all(row.revoked for row in _family_rows(session, adopted))
@@ -0,0 +1,105 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import Session
+
+from core import token_blacklist as blacklist_module
+from core.token_blacklist import BloomFilter, TokenBlacklist
+from models import BlacklistToken
+
+
+@pytest.fixture
+def blacklist(engine, monkeypatch):
+    monkeypatch.setattr(blacklist_module, "engine", engine)
+    return TokenBlacklist()
+
+
+def logout(engine, access_token: str, refresh_token: str, created_at: datetime | None = None) -> None:
+    """A logout committed by another worker: the row exists, this process never saw add()."""
+    now = datetime.now()
+    with Session(engine) as session:
+        session.add(BlacklistToken(
+            user_id=uuid.uuid4(), access_token=access_token, refresh_token=refresh_token,
+            created_at=created_at or now, expires_at=now + timedelta(days=1)
+        ))
+        session.commit()
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=2000, error_rate=0.01)
+    tokens = [f"token-{i}" for i in range(2000)]
+    for token in tokens:
+        bloom.add(token)
+
+    assert all(token in bloom for token in tokens)
+    # A new token whose bits are all set already (a false positive) is not counted
+    assert 1990 <= bloom.count <= 2000
+
+    false_positives = sum(f"probe-{i}" in bloom for i in range(10000))
+    assert false_positives < 10000 * 0.01 * 3
+
+
+def test_bloom_filter_counts_a_token_once():
+    bloom = BloomFilter(capacity=100, error_rate=0.01)
+    bloom.add("token")
+    bloom.add("token")
+    assert bloom.count == 1
+
+
+def test_every_lookup_hits_the_database_until_loaded(blacklist, session):
+    assert blacklist.is_revoked("never-blacklisted", session) is False
+    assert blacklist._needs_db_check("never-blacklisted")
+
+    blacklist.load()
+    assert not blacklist._needs_db_check("never-blacklisted")
+
+
+def test_load_and_sync_pick_up_other_workers_logouts(blacklist, engine, session):
+    logout(engine, "access-1", "refresh-1")
+    blacklist.load()
+    assert blacklist.is_revoked("access-1", session)
+    assert blacklist.is_revoked("refresh-1", session)
+
+    logout(engine, "access-2", "refresh-2")
+    # Committed late with an older created_at than rows already seen; the look-back still reads it
+    logout(engine, "access-3", "refresh-3", created_at=datetime.now() - timedelta(seconds=30))
+    blacklist.sync()
+
+    for token in ["access-2", "refresh-2", "access-3", "refresh-3"]:
+        assert blacklist.is_revoked(token, session), token
+
+
+def test_tokens_added_during_load_survive_the_swap(blacklist, engine, session, monkeypatch):
+    blacklist.load()
+    read_filter = blacklist._read_filter
+
+    def read_then_logout():
+        result = read_filter()
+        # A local logout commits after the table was read but before the new filter is swapped in
+        logout(engine, "late-access", "late-refresh")
+        blacklist.add("late-access", "late-refresh")
+        return result
+
+    monkeypatch.setattr(blacklist, "_read_filter", read_then_logout)
+    blacklist.load()
+
+    assert blacklist._needs_db_check("late-access")
+    assert blacklist.is_revoked("late-access", session)
+    assert blacklist.is_revoked("late-refresh", session)
+    assert blacklist._load_journals == []
+
+
+def test_failed_load_keeps_the_old_filter(blacklist, engine, session, monkeypatch):
+    logout(engine, "access-1", "refresh-1")
+    blacklist.load()
+
+    def broken_read():
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(blacklist, "_read_filter", broken_read)
+    with pytest.raises(RuntimeError):
+        blacklist.load()
+
+    assert blacklist.is_revoked("access-1", session)
+    assert blacklist._load_journals == []